@@ -1,191 +1,34 @@
 # **1. Importing Necessary Libraries**
 
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import pickle
 import time
 import streamlit as st
 from db import *
+from feature_encoder import profile_from_answers
+from prediction_cache import get_prediction_cache
+from model_registry import fast_model_version, get_fast_model, get_resource, start_watching
+from micro_batcher import get_micro_batcher, label_batch_fn
 
-pickleFile = open("weights.pkl", "rb")
-regressor = pickle.load(pickleFile)  # our model
-
-# **2. Loading Dataset**
-
-df = pd.read_csv("./data/mldata.csv")
-df.head()
-
-df["workshops"] = df["workshops"].replace(["testing"], "Testing")
-df.head()
-
-print(df.columns.unique)
-
-n = df["Suggested Job Role"].unique()
-print(len(n))
-
-print(
-    "The shape of our training set: %s professionals and %s features"
-    % (df.shape[0], df.shape[1])
-)
-
-
-# **5. Feature Engineering**
-
-## (a) Binary Encoding for Categorical Variables
-
-newdf = df
-newdf.head(10)
-
-cols = df[
-    [
-        "self-learning capability?",
-        "Extra-courses did",
-        "Taken inputs from seniors or elders",
-        "worked in teams ever?",
-        "Introvert",
-    ]
-]
-for i in cols:
-    print(i)
-    cleanup_nums = {i: {"yes": 1, "no": 0}}
-    df = df.replace(cleanup_nums)
-
-print(
-    "\n\nList of Categorical features: \n",
-    df.select_dtypes(include=["object"]).columns.tolist(),
-)
-
-## (b) Number Encoding for Categorical
-
-mycol = df[["reading and writing skills", "memory capability score"]]
-for i in mycol:
-    print(i)
-    cleanup_nums = {i: {"poor": 0, "medium": 1, "excellent": 2}}
-    df = df.replace(cleanup_nums)
-
-category_cols = df[
-    [
-        "certifications",
-        "workshops",
-        "Interested subjects",
-        "interested career area ",
-        "Type of company want to settle in?",
-        "Interested Type of Books",
-    ]
-]
-for i in category_cols:
-    df[i] = df[i].astype("category")
-    df[i + "_code"] = df[i].cat.codes
-
-print(
-    "\n\nList of Categorical features: \n",
-    df.select_dtypes(include=["object"]).columns.tolist(),
-)
-
-## (c) Dummy Variable Encoding
-
-print(df["Management or Technical"].unique())
-print(df["hard/smart worker"].unique())
-
-df = pd.get_dummies(
-    df, columns=["Management or Technical", "hard/smart worker"], prefix=["A", "B"]
-)
-df.head()
-
-df.sort_values(by=["certifications"])
-
-print(
-    "List of Numerical features: \n",
-    df.select_dtypes(include=np.number).columns.tolist(),
-)
-
-
-category_cols = df[
-    [
-        "certifications",
-        "workshops",
-        "Interested subjects",
-        "interested career area ",
-        "Type of company want to settle in?",
-        "Interested Type of Books",
-    ]
-]
-for i in category_cols:
-    print(i)
-
-Certifi = list(df["certifications"].unique())
-print(Certifi)
-certi_code = list(df["certifications_code"].unique())
-print(certi_code)
-
-Workshops = list(df["workshops"].unique())
-print(Workshops)
-Workshops_code = list(df["workshops_code"].unique())
-print(Workshops_code)
-
-Certi_l = list(df["certifications"].unique())
-certi_code = list(df["certifications_code"].unique())
-C = dict(zip(Certi_l, certi_code))
-
-Workshops = list(df["workshops"].unique())
-print(Workshops)
-Workshops_code = list(df["workshops_code"].unique())
-print(Workshops_code)
-W = dict(zip(Workshops, Workshops_code))
-
-Interested_subjects = list(df["Interested subjects"].unique())
-print(Interested_subjects)
-Interested_subjects_code = list(df["Interested subjects_code"].unique())
-ISC = dict(zip(Interested_subjects, Interested_subjects_code))
-
-interested_career_area = list(df["interested career area "].unique())
-print(interested_career_area)
-interested_career_area_code = list(df["interested career area _code"].unique())
-ICA = dict(zip(interested_career_area, interested_career_area_code))
-
-Typeofcompany = list(df["Type of company want to settle in?"].unique())
-print(Typeofcompany)
-Typeofcompany_code = list(df["Type of company want to settle in?_code"].unique())
-TOCO = dict(zip(Typeofcompany, Typeofcompany_code))
-
-Interested_Books = list(df["Interested Type of Books"].unique())
-print(Interested_subjects)
-Interested_Books_code = list(df["Interested Type of Books_code"].unique())
-IB = dict(zip(Interested_Books, Interested_Books_code))
-
-Range_dict = {"poor": 0, "medium": 1, "excellent": 2}
-print(Range_dict)
-
-
-A = "yes"
-B = "No"
-col = [A, B]
-for i in col:
-    if i == "yes":
-        i = 1
-    print(i)
-
-
-f = []
-A = "r programming"
-clms = ["r programming", 0]
-for i in clms:
-    for key in C:
-        if i == key:
-            i = C[key]
-            f.append(i)
-print(f)
-
-C = dict(zip(Certifi, certi_code))
-
-print(C)
+# Pick up retrained models without restarting the app (no-op on Streamlit reruns)
+start_watching()
 
-import numpy as np
+# **2. Feature Encoding**
+# The category vocabularies come from weights.schema.json, saved by retrain_model.py,
+# so startup does not read or preprocess data/mldata.csv
+
+# Identical questionnaires are common, so answers are cached across sessions and restarts,
+# keyed on the backend serving base_model (cascade, ONNX, bundle or pickle) and its version
+prediction_cache = get_prediction_cache("weights.pkl", persist_path="prediction_cache.pkl",
+                                        version_fn=lambda: fast_model_version("base_model"))
 
-array = np.array([1, 2, 3, 4])
-array.reshape(-1, 1)
+# Clicks from concurrent sessions within a few milliseconds share one predict_proba call;
+# once cascade.py has calibrated weights.pkl, confident rows stop after the first trees
+batcher = get_micro_batcher("base_model", label_batch_fn(lambda: get_fast_model("base_model")))
+
+# Loads the schema and checks weights.pkl against it now, so a mismatch fails at startup
+get_resource("base_encoder")
 
 
 def inputlist(
@@ -212,15 +55,11 @@ def inputlist(
     Type_of_company_want_to_settle_in,
     interested_career_area,
 ):
-    # 1,1,1,1,'Yes','Yes''Yes''Yes''Yes',"poor","poor","Smart worker", "Management","programming","Series","information security"."testing","BPA","testing"
-    Afeed = [
+    profile = profile_from_answers(
         Logical_quotient_rating,
         coding_skills_rating,
         hackathons,
         public_speaking_points,
-    ]
-
-    input_list_col = [
         self_learning_capability,
         Extra_courses_did,
         Taken_inputs_from_seniors_or_elders,
@@ -236,106 +75,10 @@ def inputlist(
         workshops,
         Type_of_company_want_to_settle_in,
         interested_career_area,
-    ]
-    feed = []
-    K = 0
-    j = 0
-    for i in input_list_col:
-        if i == "Yes":
-            j = 2
-            feed.append(j)
-
-            print("feed 1", i)
-
-        elif i == "No":
-            j = 3
-            feed.append(j)
-
-            print("feed 2", j)
-
-        elif i == "Management":
-            j = 1
-            k = 0
-            feed.append(j)
-            feed.append(k)
-
-            print("feed 10,11", i, j, k)
-
-        elif i == "Technical":
-            j = 0
-            k = 1
-            feed.append(j)
-            feed.append(k)
-
-            print("feed 12,13", i, j, k)
-
-        elif i == "Smart worker":
-            j = 1
-            k = 0
-            feed.append(j)
-            feed.append(k)
-
-            print("feed 14,15", i, j, k)
-
-        elif i == "Hard Worker":
-            j = 0
-            k = 1
-            feed.append(j)
-            feed.append(k)
-            print("feed 16,17", i, j, k)
-
-        else:
-            for key in Range_dict:
-                if i == key:
-                    j = Range_dict[key]
-                    feed.append(j)
-
-                    print("feed 3", i, j)
-
-            for key in C:
-                if i == key:
-                    j = C[key]
-                    feed.append(j)
-
-                    print("feed 4", i, j)
-
-            for key in W:
-                if i == key:
-                    j = W[key]
-                    feed.append(j)
-
-                    print("feed 5", i, j)
-
-            for key in ISC:
-                if i == key:
-                    j = ISC[key]
-                    feed.append(j)
-
-                    print("feed 6", i, j)
-
-            for key in ICA:
-                if i == key:
-                    j = ICA[key]
-                    feed.append(j)
-
-                    print("feed 7", i, j)
-
-            for key in TOCO:
-                if i == key:
-                    j = TOCO[key]
-                    feed.append(j)
-
-                    print("feed 8", i, j)
-
-            for key in IB:
-                if i == key:
-                    j = IB[key]
-                    feed.append(j)
-
-                    print("feed 9", i, j)
-
-    t = Afeed + feed
-    output = regressor.predict([t])
+    )
+    # Model and encoder are loaded once per process, on the first prediction
+    features = get_resource("base_encoder").encode_profile(profile)
+    output = prediction_cache.get_or_compute(features, lambda: np.array([batcher.predict(features[0])]))
 
     return output
 
@@ -592,14 +335,8 @@ def main():
         st.success("Predicted Career Option : " "{}".format(result))
 
         # Plot
-        corr = df[
-            [
-                "Logical quotient rating",
-                "hackathons",
-                "coding skills rating",
-                "public speaking points",
-            ]
-        ].corr()
+        # Read from data/mldata.csv on the first prediction only, not at startup
+        corr = get_resource("rating_correlations")
         f, axes = plt.subplots(1, 1, figsize=(10, 10))
         sns.heatmap(corr, square=True, annot=True, linewidth=0.4, center=2, ax=axes)
         st.subheader("Here are some nerdy analytics 😁")
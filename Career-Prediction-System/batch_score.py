@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Streaming Batch Scorer
+Scores whole cohorts from CSV, XLSX or Parquet in bounded-size chunks
+
+Example:
+    python batch_score.py "pythonFunctions/sample data/Sample_data.xlsx" -o cohort_scores.csv --top-k 3
+"""
+
+import os
+import time
+import argparse
+import warnings
+from collections import deque
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import FeatureSchema, load_or_build_schema, schema_path
+from model_registry import get_pickle, load_training_data
+from ranking import CategoryIndex, top_k
+
+# Per-process state, filled once by init_scorer() so chunks never reload the model
+_scorer = {}
+
+
+def read_chunks(path, chunk_size):
+    """Yield DataFrames of at most chunk_size rows without loading the whole file"""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+    elif ext in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = list(next(rows))
+            batch = []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                batch.append(row)
+                if len(batch) == chunk_size:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+
+    elif ext == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet needs pyarrow: pip install pyarrow")
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+    else:
+        raise ValueError(f"Unsupported input format: {ext} (use .csv, .xlsx or .parquet)")
+
+
+def load_encoder(model_path, model, feature_names=None, training_data="./data/mldata.csv"):
+    """The encoder of the schema saved with the model, built from training_data only if there is none"""
+    names = (lambda: feature_names) if feature_names is not None else None
+    schema = load_or_build_schema(model_path, model, lambda: load_training_data(training_data), names)
+    return schema.encoder()
+
+
+def init_scorer(model_path, features_path, training_data, categories_path=None):
+    """Load the model and its encoder (and category index) once per process"""
+    # The encoder already orders columns by name, so sklearn's name check is redundant
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    model = get_pickle(model_path)
+    feature_names = get_pickle(features_path) if features_path else None
+
+    _scorer["model"] = model
+    _scorer["encoder"] = load_encoder(model_path, model, feature_names, training_data)
+    _scorer["categories"] = CategoryIndex(model.classes_, get_pickle(categories_path)) if categories_path else None
+
+
+def prepare_chunk(chunk):
+    """Apply the same value fixes training does before encoding"""
+    if "workshops" in chunk.columns:
+        chunk["workshops"] = chunk["workshops"].replace(["testing"], "Testing")
+    return chunk
+
+
+def score_chunk(chunk, k, min_probability=None):
+    """Encode and score one chunk, returning the result frame and stage timings"""
+    start = time.perf_counter()
+    X = _scorer["encoder"].transform(prepare_chunk(chunk))
+    encoded = time.perf_counter()
+
+    model = _scorer["model"]
+    proba = model.predict_proba(X)
+    ranking = top_k(proba, k, min_probability)
+    categories = _scorer["categories"]
+    if categories is not None:
+        category_ranking = categories.top_categories(proba, k, min_probability)
+    predicted = time.perf_counter()
+
+    result = pd.DataFrame(index=chunk.index)
+    labels = ranking.labels(model.classes_)
+    for rank in range(labels.shape[1]):
+        result[f"career_{rank + 1}"] = labels[:, rank]
+        result[f"probability_{rank + 1}"] = ranking.scores[:, rank]
+    if categories is not None:
+        labels = category_ranking.labels(categories.categories)
+        for rank in range(labels.shape[1]):
+            result[f"category_{rank + 1}"] = labels[:, rank]
+            result[f"category_probability_{rank + 1}"] = category_ranking.scores[:, rank]
+
+    return result, encoded - start, predicted - encoded
+
+
+def score_file(input_path, output_path, model_path="weights.pkl", features_path=None,
+               training_data="./data/mldata.csv", k=3, chunk_size=10000, workers=1,
+               min_probability=None, categories_path=None):
+    """Stream input_path through the model and append top-k careers to output_path"""
+    timings = {"read": 0.0, "encode": 0.0, "predict": 0.0, "write": 0.0}
+    total_rows = 0
+    wall_start = time.perf_counter()
+
+    pool = None
+    if workers > 1:
+        pool = Pool(workers, initializer=init_scorer,
+                    initargs=(model_path, features_path, training_data, categories_path))
+    else:
+        init_scorer(model_path, features_path, training_data, categories_path)
+
+    chunks = read_chunks(input_path, chunk_size)
+    # Only this many chunks are ever in memory, however long the input is
+    pending = deque()
+    max_pending = max(1, workers * 2)
+    offset = 0
+
+    with open(output_path, "w", newline="") as out:
+        header = True
+
+        def write_result(result, encode_time, predict_time):
+            nonlocal header, total_rows
+            timings["encode"] += encode_time
+            timings["predict"] += predict_time
+            start = time.perf_counter()
+            result.to_csv(out, header=header, index_label="row")
+            timings["write"] += time.perf_counter() - start
+            header = False
+            total_rows += len(result)
+
+        try:
+            while True:
+                start = time.perf_counter()
+                chunk = next(chunks, None)
+                timings["read"] += time.perf_counter() - start
+                if chunk is None:
+                    break
+
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+
+                if pool is None:
+                    write_result(*score_chunk(chunk, k, min_probability))
+                    continue
+
+                pending.append(pool.apply_async(score_chunk, (chunk, k, min_probability)))
+                if len(pending) >= max_pending:
+                    write_result(*pending.popleft().get())
+
+            while pending:
+                write_result(*pending.popleft().get())
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    wall = time.perf_counter() - wall_start
+    print_throughput_report(total_rows, timings, wall, workers)
+    return total_rows
+
+
+def check_parity(input_path, model_path="weights.pkl", features_path=None,
+                 training_data="./data/mldata.csv", rows=2000):
+    """Check the scorer encodes and predicts the first rows exactly as the model's saved schema does"""
+    init_scorer(model_path, features_path, training_data)
+    chunk = prepare_chunk(next(read_chunks(input_path, rows)))
+    model = _scorer["model"]
+    reference = FeatureSchema.load(schema_path(model_path)).validate(model).encoder()
+
+    X = _scorer["encoder"].transform(chunk)
+    X_ref = reference.transform(chunk)
+    differing = int(np.sum(np.any(X != X_ref, axis=1)))
+    labels = model.predict(X)
+    changed = int(np.sum(labels != model.predict(X_ref)))
+
+    print(f"🔍 Encoder parity on {len(chunk)} rows of {input_path}")
+    print(f"  rows with differing features {differing}")
+    print(f"  changed predictions          {changed}")
+    if differing or changed:
+        print("❌ Batch scorer disagrees with the saved schema")
+        return False
+    print("✅ Batch scorer matches the saved schema")
+    return True
+
+
+def print_throughput_report(rows, timings, wall, workers):
+    """Print rows/sec for every stage and end to end"""
+    print(f"\n📊 Throughput report ({rows} rows, {workers} worker(s))")
+    for stage, seconds in timings.items():
+        rate = rows / seconds if seconds > 0 else float("inf")
+        print(f"  {stage:<8} {seconds:8.3f} s  {rate:14,.0f} rows/sec")
+    rate = rows / wall if wall > 0 else float("inf")
+    print(f"  {'total':<8} {wall:8.3f} s  {rate:14,.0f} rows/sec (wall clock)")
+    if workers > 1:
+        print("  encode/predict times are summed across worker processes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a cohort file with the career model")
+    parser.add_argument("input", help="CSV, XLSX or Parquet file with questionnaire columns")
+    parser.add_argument("-o", "--output", default="cohort_scores.csv")
+    parser.add_argument("--model", default="weights.pkl")
+    parser.add_argument("--features", help="pickled feature name list, e.g. feature_names.pkl")
+    parser.add_argument("--training-data", default="./data/mldata.csv",
+                        help="dataset the vocabularies are rebuilt from when the model has no saved schema")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--min-probability", type=float,
+                        help="leave out careers (and categories) scoring below this")
+    parser.add_argument("--categories", help="pickled {category: [careers]}, e.g. mega_career_database.pkl; "
+                                             "adds the top categories")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--check-parity", type=int, metavar="ROWS",
+                        help="compare the encoding of the first ROWS rows with the saved schema and exit")
+    args = parser.parse_args()
+
+    if args.check_parity:
+        ok = check_parity(args.input, args.model, args.features, args.training_data, args.check_parity)
+        raise SystemExit(0 if ok else 1)
+
+    rows = score_file(args.input, args.output, args.model, args.features, args.training_data,
+                      args.top_k, args.chunk_size, args.workers, args.min_probability, args.categories)
+    print(f"✅ Wrote top-{args.top_k} careers for {rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Confidence-Gated Prediction Cascade
+A cheap model answers first; only rows it is unsure about are escalated to the full model
+
+Thresholds are calibrated offline on the held-out split the training scripts leave out:
+    python cascade.py forest weights.pkl --prefix-trees 10
+    python cascade.py models --model-dir pythonFunctions/pkl
+"""
+
+import json
+import time
+import pickle
+import argparse
+import warnings
+from datetime import datetime
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import read_dataset
+from feature_encoder import FeatureEncoder, model_feature_names, LEGACY_FEATURE_NAMES
+from forest_engine import FlatForest
+
+CASCADE_FILE = "cascade_thresholds.json"
+MODELS_KEY = "model1.pkl-model4.pkl"
+
+
+def confidence(proba, kind="margin"):
+    """Top-class probability, or its margin over the runner-up"""
+    if kind == "probability":
+        return proba.max(axis=1)
+    top2 = np.partition(proba, proba.shape[1] - 2, axis=1)[:, -2:]
+    return top2[:, 1] - top2[:, 0]
+
+
+def forest_prefix(flat, n_trees):
+    """A FlatForest over the first n_trees trees, sharing the full forest's arrays"""
+    return FlatForest(flat.feature, flat.threshold, flat.children, flat.missing_left,
+                      flat.value_offset, flat.leaf_values, flat.roots[:n_trees],
+                      flat.classes_, flat.n_features_in_, flat.max_depth)
+
+
+class CascadeStats:
+    """Counts rows answered by the cheap stage and rows escalated"""
+
+    def __init__(self):
+        self.rows = 0
+        self.escalated = 0
+
+    def record(self, rows, escalated):
+        self.rows += rows
+        self.escalated += escalated
+
+    @property
+    def escalation_rate(self):
+        return self.escalated / self.rows if self.rows else 0.0
+
+
+class ForestCascade:
+    """
+    The first prefix_trees trees vote first; rows whose confidence falls below
+    threshold are finished with the remaining trees, reusing the prefix sums.
+    """
+
+    def __init__(self, forest, prefix_trees, threshold, kind="margin"):
+        self.flat = forest if isinstance(forest, FlatForest) else FlatForest.from_sklearn(forest)
+        self.prefix_trees = min(prefix_trees, self.flat.n_trees)
+        self.threshold = threshold
+        self.kind = kind
+        self.classes_ = self.flat.classes_
+        self.n_features_in_ = self.flat.n_features_in_
+        self.stats = CascadeStats()
+
+    def predict_proba(self, X):
+        X = self.flat._prepare(X)
+        prefix = slice(0, self.prefix_trees)
+        sums = self.flat._sum_leaves(self.flat.apply(X, trees=prefix))
+        proba = sums / self.prefix_trees
+
+        escalate = np.flatnonzero(confidence(proba, self.kind) < self.threshold)
+        if escalate.size and self.prefix_trees < self.flat.n_trees:
+            rest = slice(self.prefix_trees, None)
+            sums = sums[escalate] + self.flat._sum_leaves(self.flat.apply(X[escalate], trees=rest))
+            proba[escalate] = sums / self.flat.n_trees
+        self.stats.record(X.shape[0], escalate.size)
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class ModelCascade:
+    """model1.pkl's decision tree answers first; unsure rows go to the four-model ensemble"""
+
+    def __init__(self, ensemble, threshold, kind="margin", first=0):
+        self.ensemble = ensemble
+        self.threshold = threshold
+        self.kind = kind
+        self.first = first
+        self.stats = CascadeStats()
+
+    @property
+    def classes_(self):
+        return self.ensemble.classes_
+
+    def cheap_proba(self, X):
+        """The first member's probabilities, aligned to the ensemble's classes"""
+        models, classes, columns = self.ensemble._state
+        proba = np.zeros((X.shape[0], len(classes)))
+        proba[:, columns[self.first]] = models[self.first].predict_proba(X)
+        return proba
+
+    def vote(self, X):
+        """Return (kept rows, their cheap-stage vote, escalated rows, their ensemble vote or None)"""
+        from ensemble import EnsembleVote, MemberResult
+
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        start = time.perf_counter()
+        proba = self.cheap_proba(X)
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        confident = confidence(proba, self.kind) >= self.threshold
+        kept, escalated = np.flatnonzero(confident), np.flatnonzero(~confident)
+        self.stats.record(X.shape[0], escalated.size)
+
+        name = self.ensemble.names[self.first]
+        kept_proba = proba[kept]
+        labels = self.classes_.take(np.argmax(kept_proba, axis=1))
+        cheap = EnsembleVote(self.classes_, kept_proba,
+                             {name: MemberResult(name, labels, kept_proba, kept_proba, latency_ms)},
+                             [other for other in self.ensemble.names if other != name])
+        full = self.ensemble.vote(X[escalated]) if escalated.size else None
+        return kept, cheap, escalated, full
+
+    def predict_proba(self, X):
+        kept, cheap, escalated, full = self.vote(X)
+        proba = np.empty((len(kept) + len(escalated), len(self.classes_)))
+        proba[kept] = cheap.proba
+        if full is not None:
+            proba[escalated] = full.proba
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def calibrate_threshold(conf, cheap_labels, full_labels, y_true, max_accuracy_drop=0.005):
+    """
+    Pick the threshold that escalates the fewest rows while the cascade stays
+    within max_accuracy_drop of the full model's accuracy.
+    """
+    y_true = np.asarray(y_true)
+    order = np.argsort(-conf, kind="stable")
+    cheap_correct = (np.asarray(cheap_labels) == y_true)[order]
+    full_correct = (np.asarray(full_labels) == y_true)[order]
+    n = len(y_true)
+
+    # Keeping the i most confident rows on the cheap stage, for i = 0..n
+    kept_cheap = np.concatenate([[0], np.cumsum(cheap_correct)])
+    kept_full = np.concatenate([[0], np.cumsum(full_correct)])
+    accuracy = (kept_cheap + (full_correct.sum() - kept_full)) / n
+    full_accuracy = accuracy[0]
+
+    # Only cut where the confidence changes, so equal scores share a fate
+    sorted_conf = conf[order]
+    valid = np.concatenate([[True], sorted_conf[:-1] > sorted_conf[1:], [True]])
+    candidates = np.flatnonzero(valid & (accuracy >= full_accuracy - max_accuracy_drop))
+    kept = candidates.max()
+
+    threshold = float(np.inf) if kept == 0 else float(sorted_conf[kept - 1])
+    return {
+        "threshold": threshold,
+        "escalation_rate": 1 - kept / n,
+        "accuracy": float(accuracy[kept]),
+        "full_accuracy": float(full_accuracy),
+        "cheap_accuracy": float(cheap_correct.mean()),
+    }
+
+
+def held_out_split(model_features, data_path="./data/mldata.csv", fix_workshops=True):
+    """
+    Encode the dataset and return the 20% test split used by retrain_model and training.py.
+    retrain_model.py merges workshops "testing" into "Testing" before encoding;
+    training.py (model1-4) does not, so it passes fix_workshops=False.
+    """
+    df = read_dataset(data_path)
+    if fix_workshops:
+        df["workshops"] = df["workshops"].replace(["testing"], "Testing")
+    X = FeatureEncoder.from_dataframe(df, model_features).transform(df)
+    y = df["Suggested Job Role"].to_numpy()
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_test, y_test
+
+
+def save_cascade_config(key, config, path=CASCADE_FILE):
+    try:
+        with open(path) as f:
+            configs = json.load(f)
+    except FileNotFoundError:
+        configs = {}
+    configs[key] = dict(config, calibrated=datetime.now().isoformat(timespec="seconds"))
+    with open(path, "w") as f:
+        json.dump(configs, f, indent=2)
+
+
+def load_cascade_config(key, path=CASCADE_FILE):
+    """Calibrated settings for key; KeyError if it was never calibrated"""
+    with open(path) as f:
+        configs = json.load(f)
+    return configs[key]
+
+
+def load_forest_cascade(load_model, model_path, path=CASCADE_FILE):
+    """
+    ForestCascade for the forest load_model() returns, with the thresholds calibrated
+    for model_path; the forest is only loaded once a calibration exists
+    """
+    config = load_cascade_config(model_path, path)
+    return ForestCascade(load_model(), config["prefix_trees"], config["threshold"], config["kind"])
+
+
+def load_model_cascade(ensemble, path=CASCADE_FILE):
+    """ModelCascade over the four-model ensemble, or None if it was never calibrated"""
+    try:
+        config = load_cascade_config(MODELS_KEY, path)
+    except (FileNotFoundError, KeyError):
+        return None
+    return ModelCascade(ensemble, config["threshold"], config["kind"])
+
+
+def throughput(fn, X, repeats=3):
+    """Best-of rows/sec of fn(X)"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - start)
+    return X.shape[0] / best
+
+
+def print_report(title, result, rows):
+    print(f"\n📊 {title}")
+    print(f"  threshold        {result['threshold']:.4f} ({result['kind']})")
+    print(f"  escalation rate  {result['escalation_rate']:.1%}")
+    print(f"  accuracy         {result['accuracy']:.4f} (full {result['full_accuracy']:.4f}, "
+          f"cheap stage alone {result['cheap_accuracy']:.4f})")
+    print(f"\n{'mode':<10}{'rows/sec':>14}{'single row (ms)':>18}")
+    for name, (rate, single_ms) in rows.items():
+        print(f"{name:<10}{rate:>14,.0f}{single_ms:>18.3f}")
+
+
+def single_row_ms(fn, X, repeats=200):
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(X[i % X.shape[0]][np.newaxis, :])
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def calibrate_forest(model_path, prefix_trees=10, kind="margin", max_accuracy_drop=0.005,
+                     data_path="./data/mldata.csv", features_path=None):
+    """Calibrate a forest-prefix cascade for model_path on half the held-out split, test on the other"""
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    fallback = None
+    if features_path:
+        with open(features_path, "rb") as f:
+            fallback = pickle.load(f)
+
+    X, y = held_out_split(model_feature_names(model, fallback), data_path)
+    half = len(y) // 2
+    flat = FlatForest.from_sklearn(model)
+    prefix = forest_prefix(flat, prefix_trees)
+
+    cheap = prefix.predict_proba(X[:half])
+    result = calibrate_threshold(confidence(cheap, kind), prefix.classes_.take(cheap.argmax(axis=1)),
+                                 flat.predict(X[:half]), y[:half], max_accuracy_drop)
+
+    cascade = ForestCascade(flat, prefix_trees, result["threshold"], kind)
+    # Report on the half the threshold was not tuned on
+    evaluation = dict(result, kind=kind, prefix_trees=prefix_trees,
+                      accuracy=float(np.mean(cascade.predict(X[half:]) == y[half:])),
+                      full_accuracy=float(np.mean(flat.predict(X[half:]) == y[half:])),
+                      cheap_accuracy=float(np.mean(prefix.predict(X[half:]) == y[half:])),
+                      escalation_rate=cascade.stats.escalation_rate)
+    save_cascade_config(model_path, {k: evaluation[k] for k in ("threshold", "kind", "prefix_trees")})
+
+    X_eval = X[half:]
+    print_report(f"{model_path}: first {prefix_trees} of {flat.n_trees} trees, then the rest", evaluation, {
+        "full": (throughput(flat.predict_proba, X_eval), single_row_ms(flat.predict_proba, X_eval)),
+        "cascade": (throughput(cascade.predict_proba, X_eval), single_row_ms(cascade.predict_proba, X_eval)),
+    })
+    print(f"\n✅ Saved threshold for {model_path} to {CASCADE_FILE}")
+
+
+def calibrate_models(model_dir=".", kind="margin", max_accuracy_drop=0.005, data_path="./data/mldata.csv"):
+    """Calibrate the decision tree -> four-model ensemble cascade used by predict.py"""
+    from ensemble import CareerEnsemble
+    from prediction_server import load_models
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    ensemble = CareerEnsemble(load_models(model_dir))
+    # model1-4 were encoded without the workshops fix
+    X, y = held_out_split(LEGACY_FEATURE_NAMES, data_path, fix_workshops=False)
+    half = len(y) // 2
+
+    probe = ModelCascade(ensemble, threshold=0.0, kind=kind)
+    cheap = probe.cheap_proba(X[:half])
+    result = calibrate_threshold(confidence(cheap, kind), ensemble.classes_.take(cheap.argmax(axis=1)),
+                                 ensemble.predict(X[:half]), y[:half], max_accuracy_drop)
+
+    cascade = ModelCascade(ensemble, result["threshold"], kind)
+    cheap_labels = ensemble.classes_.take(cascade.cheap_proba(X[half:]).argmax(axis=1))
+    evaluation = dict(result, kind=kind,
+                      accuracy=float(np.mean(cascade.predict(X[half:]) == y[half:])),
+                      full_accuracy=float(np.mean(ensemble.predict(X[half:]) == y[half:])),
+                      cheap_accuracy=float(np.mean(cheap_labels == y[half:])),
+                      escalation_rate=cascade.stats.escalation_rate)
+    save_cascade_config(MODELS_KEY, {k: evaluation[k] for k in ("threshold", "kind")})
+
+    X_eval = X[half:]
+    print_report("Decision Tree first, then the four-model ensemble", evaluation, {
+        "ensemble": (throughput(ensemble.predict_proba, X_eval), single_row_ms(ensemble.predict_proba, X_eval, 50)),
+        "cascade": (throughput(cascade.predict_proba, X_eval), single_row_ms(cascade.predict_proba, X_eval, 50)),
+    })
+    print(f"\n✅ Saved threshold for {MODELS_KEY} to {CASCADE_FILE}")
+    ensemble.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate and benchmark prediction cascades")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    forest = sub.add_parser("forest", help="forest prefix -> full forest")
+    forest.add_argument("model", nargs="?", default="weights.pkl")
+    forest.add_argument("--prefix-trees", type=int, default=10)
+    forest.add_argument("--features", help="pickled feature name list, e.g. feature_names.pkl")
+
+    models = sub.add_parser("models", help="model1.pkl decision tree -> four-model ensemble")
+    models.add_argument("--model-dir", default=".")
+
+    for command in (forest, models):
+        command.add_argument("--confidence", choices=["margin", "probability"], default="margin")
+        command.add_argument("--max-accuracy-drop", type=float, default=0.005)
+        command.add_argument("--data", default="./data/mldata.csv", help="dataset the held-out split comes from")
+
+    args = parser.parse_args()
+    if args.command == "forest":
+        calibrate_forest(args.model, args.prefix_trees, args.confidence, args.max_accuracy_drop,
+                         args.data, args.features)
+    else:
+        calibrate_models(args.model_dir, args.confidence, args.max_accuracy_drop, args.data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Columnar Dataset Cache
+Converts a training CSV once into memory-mappable .npy columns, with string columns
+dictionary-encoded against a vocabulary, keyed by the CSV's content hash
+
+Example:
+    python dataset_cache.py data/mldata.csv mega_training_data.csv
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT_VERSION = 1
+CACHE_DIR = "dataset_cache"
+MANIFEST_FILE = "manifest.json"
+
+# (path, size, mtime) -> content hash, so an unchanged CSV is not re-hashed on every load
+DIGEST_INDEX = "digests.json"
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def source_digest(path, cache_dir=CACHE_DIR):
+    """Content hash of path, reused while its size and mtime are unchanged"""
+    index_path = os.path.join(cache_dir, DIGEST_INDEX)
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    entry = index.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["digest"]
+
+    digest = file_digest(path)
+    index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return digest
+
+
+def cache_path(path, cache_dir=CACHE_DIR):
+    """<cache_dir>/<csv name>-<content hash>"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}-{source_digest(path, cache_dir)}")
+
+
+def code_dtype(n_values):
+    """Smallest signed integer type holding codes 0..n_values-1 and -1 for missing"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def build_cache(path, cache_dir=CACHE_DIR, **read_csv_kwargs):
+    """Parse path once and write its columns; returns the cache directory"""
+    target = cache_path(path, cache_dir)
+    if os.path.exists(os.path.join(target, MANIFEST_FILE)):
+        return target
+
+    df = pd.read_csv(path, **read_csv_kwargs)
+    tmp_dir = f"{target}.tmp{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    columns, vocabularies = [], {}
+    for i, name in enumerate(df.columns):
+        values = df[name]
+        entry = {"name": name, "file": f"{i}.npy"}
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            array = values.to_numpy()
+            entry["kind"] = "numeric"
+        else:
+            categorical = pd.Categorical(values)
+            vocabularies[name] = [str(v) for v in categorical.categories]
+            array = categorical.codes.astype(code_dtype(len(categorical.categories)))
+            entry["kind"] = "category"
+        np.save(os.path.join(tmp_dir, entry["file"]), np.ascontiguousarray(array), allow_pickle=False)
+        columns.append(entry)
+
+    manifest = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source": os.path.basename(path),
+        "n_rows": len(df),
+        "columns": columns,
+        "vocabularies": vocabularies,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+
+    # Another process may have finished the same cache first; either copy is complete
+    try:
+        os.rename(tmp_dir, target)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    _prune(path, target, cache_dir)
+    return target
+
+
+def _prune(path, keep, cache_dir):
+    """Drop caches of earlier contents of the same CSV"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for entry in os.listdir(cache_dir):
+        full = os.path.join(cache_dir, entry)
+        if full != keep and entry.rsplit("-", 1)[0] == stem and os.path.isdir(full):
+            shutil.rmtree(full, ignore_errors=True)
+
+
+def load_cache(target, columns=None, categorical=False):
+    """
+    DataFrame from a cache directory. Column files are memory-mapped, so only the
+    requested columns are read. String columns come back as str like read_csv
+    gives, or as pandas categoricals over the cached codes with categorical=True.
+    """
+    with open(os.path.join(target, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != CACHE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset cache format {manifest.get('format_version')} in {target}")
+
+    wanted = None if columns is None else set(columns)
+    data = {}
+    for entry in manifest["columns"]:
+        name = entry["name"]
+        if wanted is not None and name not in wanted:
+            continue
+        array = np.load(os.path.join(target, entry["file"]), mmap_mode="r", allow_pickle=False)
+        if entry["kind"] == "category":
+            vocabulary = manifest["vocabularies"][name]
+            if categorical:
+                data[name] = pd.Categorical.from_codes(array, vocabulary)
+            else:
+                # The trailing None is what a missing value's code (-1) indexes
+                lookup = np.array(vocabulary + [None], dtype=object)
+                data[name] = lookup.take(array)
+        else:
+            data[name] = array
+    df = pd.DataFrame(data)
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def read_dataset(path, columns=None, categorical=False, cache_dir=CACHE_DIR):
+    """
+    pd.read_csv(path) through the cache: the first read of each version of the
+    file converts it, later reads memory-map the columns.
+    """
+    return load_cache(build_cache(path, cache_dir), columns, categorical)
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def benchmark(paths, repeats=5, cache_dir=CACHE_DIR):
+    """Size and load time of each CSV vs its cache"""
+    print(f"{'file':<28}{'CSV (MB)':>10}{'cache (MB)':>12}{'read_csv':>11}{'convert':>10}"
+          f"{'cached':>9}{'1 column':>10}")
+    for path in paths:
+        target = cache_path(path, cache_dir)
+        shutil.rmtree(target, ignore_errors=True)
+
+        def timed(fn):
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                result = fn()
+                samples.append((time.perf_counter() - start) * 1000)
+            return float(np.median(samples)), result
+
+        csv_ms, expected = timed(lambda: pd.read_csv(path))
+        start = time.perf_counter()
+        build_cache(path, cache_dir)
+        convert_ms = (time.perf_counter() - start) * 1000
+        cached_ms, actual = timed(lambda: read_dataset(path, cache_dir=cache_dir))
+        column_ms, _ = timed(lambda: read_dataset(path, [expected.columns[0]], cache_dir=cache_dir))
+
+        print(f"{os.path.basename(path):<28}{os.path.getsize(path) / 1e6:>10.2f}"
+              f"{directory_size(target) / 1e6:>12.2f}{csv_ms:>9.1f}ms{convert_ms:>8.1f}ms"
+              f"{cached_ms:>7.1f}ms{column_ms:>8.1f}ms")
+        try:
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        except AssertionError as e:
+            print(f"❌ Cached frame differs from read_csv: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build columnar caches of training CSVs and compare load times")
+    parser.add_argument("csv", nargs="+", help="CSV files to cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.csv, args.repeats, args.cache_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Forest Distillation
+Fits a small student forest on the soft probabilities of a large teacher forest and
+reports how closely it follows the teacher next to its size, load time and latency
+
+Example:
+    python distill.py mega_weights.pkl mega_training_data.csv --scaler mega_scaler.pkl \\
+        --features mega_feature_names.pkl --trees 30 --depth 12
+"""
+
+import time
+import pickle
+import argparse
+import warnings
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import read_dataset
+from forest_engine import FlatForest
+
+# Student shape: a few shallow trees instead of 200 trees of depth 20
+DEFAULT_STUDENT_TREES = 30
+DEFAULT_STUDENT_DEPTH = 12
+
+# Noisy copies of the training rows added to the transfer set, and their noise in scaled units
+DEFAULT_COPIES = 1
+DEFAULT_NOISE = 0.3
+
+
+class DistilledForest(RandomForestRegressor):
+    """
+    Random forest regressing the teacher's class probabilities.
+
+    Every leaf stores a mean of teacher probability vectors, so predictions are
+    valid distributions and the student can stand in for the classifier
+    (predict_proba, predict, classes_) and be flattened like one.
+    """
+
+    def fit_teacher(self, X, proba, classes):
+        self.fit(X, proba)
+        self.classes_ = np.asarray(classes)
+        return self
+
+    def predict_proba(self, X):
+        return np.asarray(super().predict(X), dtype=np.float64).reshape(-1, len(self.classes_))
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def transfer_set(X, copies=DEFAULT_COPIES, noise=DEFAULT_NOISE, seed=42):
+    """Training rows plus jittered copies, so the student also sees the teacher between samples"""
+    X = np.asarray(X, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    jittered = [X + rng.normal(0, noise, size=X.shape) for _ in range(copies)]
+    return np.vstack([X] + jittered)
+
+
+def distill(teacher, X, n_trees=DEFAULT_STUDENT_TREES, max_depth=DEFAULT_STUDENT_DEPTH,
+            copies=DEFAULT_COPIES, noise=DEFAULT_NOISE, random_state=42):
+    """Fit a DistilledForest on the teacher's probabilities over the transfer set"""
+    X_transfer = transfer_set(X, copies, noise, random_state)
+    soft_targets = FlatForest.from_sklearn(teacher).predict_proba(X_transfer)
+    student = DistilledForest(
+        n_estimators=n_trees,
+        max_depth=max_depth,
+        min_samples_leaf=3,
+        max_features="sqrt",
+        random_state=random_state,
+        n_jobs=-1,
+    )
+    return student.fit_teacher(X_transfer, soft_targets, teacher.classes_)
+
+
+def fidelity(teacher_proba, student_proba, k=5):
+    """(top-1 agreement, mean overlap of the top-k careers) between teacher and student"""
+    top1 = np.mean(np.argmax(teacher_proba, axis=1) == np.argmax(student_proba, axis=1))
+    teacher_top = np.argpartition(-teacher_proba, k - 1, axis=1)[:, :k]
+    student_top = np.argpartition(-student_proba, k - 1, axis=1)[:, :k]
+    overlap = [len(np.intersect1d(a, b)) / k for a, b in zip(teacher_top, student_top)]
+    return float(top1), float(np.mean(overlap))
+
+
+def serving_profile(model, X, repeats=50):
+    """Pickle size (MB), unpickle time (ms) and flattened 1-row / batch latency (ms)"""
+    blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    start = time.perf_counter()
+    pickle.loads(blob)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    flat = FlatForest.from_sklearn(model)
+    latencies = []
+    for i in range(repeats):
+        row = X[i % len(X)]
+        start = time.perf_counter()
+        flat.predict_proba(row)
+        latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    flat.predict_proba(X)
+    batch_ms = (time.perf_counter() - start) * 1000
+    return len(blob) / 1e6, load_ms, float(np.median(latencies)), batch_ms
+
+
+def report(teacher, student, X_test, y_test=None):
+    """Print fidelity, accuracy and serving cost of the student against its teacher"""
+    teacher_proba = FlatForest.from_sklearn(teacher).predict_proba(X_test)
+    student_proba = FlatForest.from_sklearn(student).predict_proba(X_test)
+    top1, top5 = fidelity(teacher_proba, student_proba)
+    print(f"🎯 Student fidelity on {len(X_test):,} held-out rows: "
+          f"top-1 agreement {top1:.1%}, top-5 overlap {top5:.1%}")
+
+    print(f"\n{'model':<10}{'trees':>7}{'depth':>7}{'size (MB)':>11}{'load (ms)':>11}"
+          f"{'1 row (ms)':>12}{f'{len(X_test):,} rows (ms)':>18}{'accuracy':>10}")
+    for name, model, proba in (("teacher", teacher, teacher_proba), ("student", student, student_proba)):
+        size_mb, load_ms, row_ms, batch_ms = serving_profile(model, X_test)
+        accuracy = "" if y_test is None else (
+            f"{np.mean(np.asarray(model.classes_).take(np.argmax(proba, axis=1)) == np.asarray(y_test)):.3f}"
+        )
+        depth = max(tree.tree_.max_depth for tree in model.estimators_)
+        print(f"{name:<10}{len(model.estimators_):>7}{depth:>7}{size_mb:>11.1f}{load_ms:>11.1f}"
+              f"{row_ms:>12.3f}{batch_ms:>18.1f}{accuracy:>10}")
+    return top1, top5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill a pickled forest into a compact student")
+    parser.add_argument("teacher", help="pickled RandomForestClassifier")
+    parser.add_argument("data", help="training CSV with the feature columns and a 'career' column")
+    parser.add_argument("--scaler", help="pickled StandardScaler the teacher was trained behind")
+    parser.add_argument("--features", help="pickled feature name list (default: every other column)")
+    parser.add_argument("--output", default="mega_student.pkl")
+    parser.add_argument("--trees", type=int, default=DEFAULT_STUDENT_TREES)
+    parser.add_argument("--depth", type=int, default=DEFAULT_STUDENT_DEPTH)
+    parser.add_argument("--copies", type=int, default=DEFAULT_COPIES, help="jittered copies per row")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    with open(args.teacher, "rb") as f:
+        teacher = pickle.load(f)
+    df = read_dataset(args.data)
+    if args.features:
+        with open(args.features, "rb") as f:
+            feature_columns = pickle.load(f)
+    else:
+        feature_columns = [c for c in df.columns if c != "career"]
+    X = df[feature_columns].to_numpy(dtype=np.float64)
+    if args.scaler:
+        with open(args.scaler, "rb") as f:
+            X = pickle.load(f).transform(X)
+
+    # Same split as train_mega_model, so the report is on rows the teacher never saw
+    X_train, X_test, _, y_test = train_test_split(X, df["career"], test_size=0.2, random_state=42,
+                                                  stratify=df["career"])
+    print(f"🧪 Distilling {args.teacher} into {args.trees} trees of depth {args.depth}...")
+    start = time.perf_counter()
+    student = distill(teacher, X_train, args.trees, args.depth, args.copies)
+    print(f"⏱️ Student fitted in {time.perf_counter() - start:.1f} s")
+    report(teacher, student, X_test, y_test)
+
+    with open(args.output, "wb") as f:
+        pickle.dump(student, f)
+    print(f"💾 Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,30 +4,31 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import pickle
 import time
 import streamlit as st
 from db import *
+from feature_encoder import profile_from_answers
+from prediction_cache import get_prediction_cache
+from model_registry import check_saved_schema, fast_model_version, get_fast_model, get_resource, start_watching
+from micro_batcher import get_micro_batcher, label_batch_fn
 
-# Load the enhanced trained model
-try:
-    with open("enhanced_weights.pkl", "rb") as pickleFile:
-        regressor = pickle.load(pickleFile)
-    
-    with open("feature_names.pkl", "rb") as f:
-        model_features = pickle.load(f)
-    
-    with open("career_list.pkl", "rb") as f:
-        available_careers = pickle.load(f)
-        
-    print(f"✅ Enhanced model loaded successfully!")
-    print(f"📊 Available career predictions: {len(available_careers)}")
-    
-except FileNotFoundError:
-    print("⚠️ Enhanced model not found, falling back to basic model")
-    with open("weights.pkl", "rb") as pickleFile:
-        regressor = pickle.load(pickleFile)
-    available_careers = None
+# Pick up retrained models without restarting the app (no-op on Streamlit reruns)
+start_watching()
+
+def load_prediction_model():
+    """Return (registry name, encoder, artifact path) of the model, falling back to the basic one"""
+    # The registry loads each artifact once per process, on the first prediction
+    try:
+        get_resource("enhanced_model")
+        return "enhanced_model", get_resource("enhanced_encoder"), "enhanced_weights.pkl"
+    except FileNotFoundError:
+        print("⚠️ Enhanced model not found, falling back to basic model")
+        get_resource("base_model")
+        return "base_model", get_resource("base_encoder"), "weights.pkl"
+
+# Check the feature schema at startup without unpickling the model; the registry
+# loads and validates the model itself on the first prediction
+check_saved_schema("enhanced_model") or check_saved_schema("base_model")
 
 # Enhanced career options beyond just tech roles
 EXPANDED_CAREER_OPTIONS = [
@@ -85,71 +86,6 @@ INDUSTRY_SECTORS = [
     'Aerospace', 'Automotive', 'Food & Beverage', 'Tourism', 'Agriculture'
 ]
 
-# Load and preprocess data
-df = pd.read_csv("./data/mldata.csv")
-df["workshops"] = df["workshops"].replace(["testing"], "Testing")
-
-# Enhanced preprocessing for better predictions
-def enhanced_preprocessing(df):
-    newdf = df.copy()
-    
-    # Binary encoding for Yes/No variables
-    cols = df[["self-learning capability?", "Extra-courses did", 
-               "Taken inputs from seniors or elders", "worked in teams ever?", "Introvert"]]
-    for i in cols:
-        cleanup_nums = {i: {"yes": 1, "no": 0}}
-        newdf = newdf.replace(cleanup_nums)
-    
-    # Skill level encoding
-    mycol = df[["reading and writing skills", "memory capability score"]]
-    for i in mycol:
-        cleanup_nums = {i: {"poor": 0, "medium": 1, "excellent": 2}}
-        newdf = newdf.replace(cleanup_nums)
-    
-    # Category encoding
-    category_cols = df[["certifications", "workshops", "Interested subjects", 
-                       "interested career area ", "Type of company want to settle in?", 
-                       "Interested Type of Books"]]
-    for i in category_cols:
-        newdf[i] = newdf[i].astype("category")
-        newdf[i + "_code"] = newdf[i].cat.codes
-    
-    # Dummy encoding
-    newdf = pd.get_dummies(newdf, columns=["Management or Technical", "hard/smart worker"], 
-                          prefix=["A", "B"])
-    
-    return newdf
-
-# Preprocess the data
-processed_df = enhanced_preprocessing(df)
-
-# Create mapping dictionaries
-certifications_list = list(df["certifications"].unique())
-certifications_code = list(processed_df["certifications_code"].unique())
-C = dict(zip(certifications_list, certifications_code))
-
-workshops_list = list(df["workshops"].unique())
-workshops_code = list(processed_df["workshops_code"].unique())
-W = dict(zip(workshops_list, workshops_code))
-
-subjects_list = list(df["Interested subjects"].unique())
-subjects_code = list(processed_df["Interested subjects_code"].unique())
-S = dict(zip(subjects_list, subjects_code))
-
-career_area_list = list(df["interested career area "].unique())
-career_area_code = list(processed_df["interested career area _code"].unique())
-CA = dict(zip(career_area_list, career_area_code))
-
-company_type_list = list(df["Type of company want to settle in?"].unique())
-company_type_code = list(processed_df["Type of company want to settle in?_code"].unique())
-CT = dict(zip(company_type_list, company_type_code))
-
-books_list = list(df["Interested Type of Books"].unique())
-books_code = list(processed_df["Interested Type of Books_code"].unique())
-B = dict(zip(books_list, books_code))
-
-Range_dict = {"poor": 0, "medium": 1, "excellent": 2}
-
 def enhanced_inputlist(
     Name, Contact_Number, Email_address, Logical_quotient_rating, coding_skills_rating,
     hackathons, public_speaking_points, self_learning_capability, Extra_courses_did,
@@ -165,53 +101,26 @@ def enhanced_inputlist(
 ):
     """Enhanced prediction function with additional personality and preference factors"""
     
-    # Basic features
-    feed1 = [Logical_quotient_rating, coding_skills_rating, hackathons, public_speaking_points]
-    
-    # Core categorical features
-    input_list_col = [
+    profile = profile_from_answers(
+        Logical_quotient_rating, coding_skills_rating, hackathons, public_speaking_points,
         self_learning_capability, Extra_courses_did, Taken_inputs_from_seniors_or_elders,
         worked_in_teams_ever, Introvert, reading_and_writing_skills, memory_capability_score,
         smart_or_hard_work, Management_or_Technical, Interested_subjects, Interested_Type_of_Books,
         certifications, workshops, Type_of_company_want_to_settle_in, interested_career_area
-    ]
-    
-    feed = []
-    
-    # Process categorical features
-    for i in input_list_col:
-        if i == "Yes":
-            feed.append(2)
-        elif i == "No":
-            feed.append(3)
-        elif i == "Management":
-            feed.append(1)
-            feed.append(0)
-        elif i == "Technical":
-            feed.append(0)
-            feed.append(1)
-        elif i == "Smart worker":
-            feed.append(1)
-            feed.append(0)
-        elif i == "Hard Worker":
-            feed.append(0)
-            feed.append(1)
-        else:
-            # Handle range and categorical mappings
-            if i in Range_dict:
-                feed.append(Range_dict[i])
-            else:
-                # Check various mapping dictionaries
-                for mapping_dict in [C, W, S, CA, CT, B]:
-                    if i in mapping_dict:
-                        feed.append(mapping_dict[i])
-                        break
-    
-    # Combine all features
-    total_feed = feed1 + feed
+    )
     
     # Get base prediction
-    base_prediction = regressor.predict([total_feed])[0]
+    model_name, encoder, model_path = load_prediction_model()
+    # Identical questionnaires are common, so base predictions are cached across sessions,
+    # keyed on the backend serving the model and its version
+    prediction_cache = get_prediction_cache(model_path, persist_path="enhanced_prediction_cache.pkl",
+                                            version_fn=lambda: fast_model_version(model_name))
+    # Clicks from concurrent sessions within a few milliseconds share one predict_proba call
+    batcher = get_micro_batcher(model_name, label_batch_fn(lambda: get_fast_model(model_name)))
+    features = encoder.encode_profile(profile)
+    base_prediction = prediction_cache.get_or_compute(
+        features, lambda: batcher.predict(features[0])
+    )
     
     # Enhanced prediction logic based on new features
     enhanced_predictions = get_enhanced_predictions(
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Career Model Ensemble
+Runs the Decision Tree, SVM, Random Forest and XGBoost models concurrently and
+combines them into one weighted soft-vote ranking
+
+Example:
+    python ensemble.py --model-dir pythonFunctions/pkl --rows 1000 --budget-ms 5
+"""
+
+import time
+import argparse
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from forest_engine import FlatForest
+from ranking import top_k
+from prediction_server import MODEL_NAMES, load_models
+
+# Forests vote with more weight than the single tree; overridable per ensemble
+DEFAULT_WEIGHTS = {"Decision Tree": 0.5, "SVM": 1.0, "Random Forest": 1.5, "XGBoost": 1.5}
+
+# Smoothing of the running per-model latency estimate used by fast mode
+LATENCY_SMOOTHING = 0.2
+
+
+def softmax(scores):
+    """Row-wise softmax, used to turn SVM margins into a probability-like vote"""
+    shifted = scores - scores.max(axis=1, keepdims=True)
+    np.exp(shifted, out=shifted)
+    shifted /= shifted.sum(axis=1, keepdims=True)
+    return shifted
+
+
+def member_scores(model, X):
+    """Return (raw scores, probabilities) for one estimator"""
+    # SVC trained without probability=True hides predict_proba, so fall back to its margins
+    if hasattr(model, "predict_proba"):
+        proba = np.asarray(model.predict_proba(X), dtype=np.float64)
+        return proba, proba
+    raw = np.asarray(model.decision_function(X), dtype=np.float64)
+    margins = np.column_stack([-raw, raw]) if raw.ndim == 1 else raw
+    return raw, softmax(margins)
+
+
+def flatten_tree_model(model):
+    """Swap sklearn trees and forests for the equivalent FlatForest, leave anything else as is"""
+    if isinstance(model, (DecisionTreeClassifier, RandomForestClassifier, ExtraTreesClassifier)):
+        return FlatForest.from_sklearn(model)
+    return model
+
+
+def batch_bucket(n_rows):
+    """Latency is tracked per power-of-two batch size"""
+    return int(n_rows).bit_length()
+
+
+class MemberResult:
+    """One estimator's output for a batch, with its classes aligned to the ensemble"""
+
+    def __init__(self, name, labels, raw, proba, latency_ms):
+        self.name = name
+        self.labels = labels
+        self.raw = raw
+        self.proba = proba
+        self.latency_ms = latency_ms
+
+
+class EnsembleVote:
+    """Weighted soft vote over the members that answered in time"""
+
+    def __init__(self, classes, proba, members, skipped):
+        self.classes = classes
+        self.proba = proba
+        self.members = members
+        self.skipped = skipped
+
+    @property
+    def labels(self):
+        return self.classes.take(np.argmax(self.proba, axis=1))
+
+    @property
+    def latency_ms(self):
+        return {name: member.latency_ms for name, member in self.members.items()}
+
+    def ranking(self, k=5):
+        """Top-k (career, probability) pairs per row, best first"""
+        return top_k(self.proba, k).rows(self.classes)
+
+
+class CareerEnsemble:
+    """
+    Runs every member in a thread pool; sklearn and XGBoost release the GIL in
+    their compiled predict paths, so the members overlap instead of queueing.
+
+    With a latency budget, members whose running latency estimate exceeds it
+    are not started, and members still running when it expires are left out
+    of the vote.
+
+    Tree members are flattened into FlatForest by default: same probabilities,
+    without sklearn's per-tree Python overhead that holds the GIL.
+    """
+
+    def __init__(self, models, names=None, weights=None, max_workers=None, flatten_trees=True):
+        self.names = list(names or MODEL_NAMES[:len(models)])
+        weights = weights or DEFAULT_WEIGHTS
+        self.weights = {name: float(weights.get(name, 1.0)) for name in self.names}
+        self.flatten_trees = flatten_trees
+        self._pool = ThreadPoolExecutor(max_workers or len(self.names), thread_name_prefix="ensemble")
+        self._latency = {}
+        self._latency_lock = threading.Lock()
+        self._sources = None
+        self._models_lock = threading.Lock()
+        self.set_models(models)
+
+    def set_models(self, models):
+        """Swap in a new set of models, e.g. after a hot reload; unchanged models are kept"""
+        sources = tuple(models)
+        if len(sources) != len(self.names):
+            raise ValueError(f"Expected {len(self.names)} models, got {len(sources)}")
+        with self._models_lock:
+            if self._sources is not None and all(a is b for a, b in zip(sources, self._sources)):
+                return
+            models = tuple(flatten_tree_model(m) for m in sources) if self.flatten_trees else sources
+            classes = np.unique(np.concatenate([np.asarray(m.classes_, dtype=object) for m in models]))
+            lookup = {label: j for j, label in enumerate(classes)}
+            columns = [np.array([lookup[label] for label in m.classes_]) for m in models]
+            # One tuple assignment, so a concurrent vote sees either the old or the new set
+            self._state = (models, classes, columns)
+            self._sources = sources
+
+    @property
+    def classes_(self):
+        return self._state[1]
+
+    def expected_latency_ms(self, name, n_rows=1):
+        """Running latency estimate for a batch of about n_rows, or None if never run"""
+        return self._latency.get((name, batch_bucket(n_rows)))
+
+    def _record_latency(self, name, n_rows, ms):
+        key = (name, batch_bucket(n_rows))
+        with self._latency_lock:
+            previous = self._latency.get(key)
+            self._latency[key] = ms if previous is None else (
+                (1 - LATENCY_SMOOTHING) * previous + LATENCY_SMOOTHING * ms
+            )
+
+    def _run_member(self, name, model, column, n_classes, X):
+        start = time.perf_counter()
+        raw, proba = member_scores(model, X)
+        # For SVC this is the argmax of the ovr margins, not a second (ovo) predict() pass
+        labels = np.asarray(model.classes_).take(np.argmax(proba, axis=1))
+        aligned = np.zeros((X.shape[0], n_classes))
+        aligned[:, column] = proba
+        latency_ms = (time.perf_counter() - start) * 1000
+        self._record_latency(name, X.shape[0], latency_ms)
+        return MemberResult(name, labels, raw, aligned, latency_ms)
+
+    def vote(self, X, latency_budget_ms=None):
+        """Run the members concurrently and combine their probabilities"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        models, classes, columns = self._state
+
+        members = list(zip(self.names, models, columns))
+        skipped = []
+        if latency_budget_ms is not None:
+            estimates = {name: self.expected_latency_ms(name, X.shape[0]) for name in self.names}
+            fits = [m for m in members if estimates[m[0]] is None or estimates[m[0]] <= latency_budget_ms]
+            if not fits:
+                fits = [min(members, key=lambda m: estimates[m[0]])]
+            skipped = [m[0] for m in members if m not in fits]
+            members = fits
+
+        futures = {
+            self._pool.submit(self._run_member, name, model, column, len(classes), X): name
+            for name, model, column in members
+        }
+        if latency_budget_ms is None:
+            done = wait(futures).done
+        else:
+            done, not_done = wait(futures, timeout=latency_budget_ms / 1000)
+            if not done:
+                # Nothing made the budget: take whichever member finishes first
+                done, not_done = wait(futures, return_when=FIRST_COMPLETED)
+            skipped += [futures[f] for f in not_done]
+
+        results = {}
+        for future in done:
+            result = future.result()
+            results[result.name] = result
+
+        combined = np.zeros((X.shape[0], len(classes)))
+        total_weight = 0.0
+        for name in self.names:
+            if name in results:
+                combined += self.weights[name] * results[name].proba
+                total_weight += self.weights[name]
+        combined /= total_weight
+        return EnsembleVote(classes, combined, results, skipped)
+
+    def predict_proba(self, X, latency_budget_ms=None):
+        return self.vote(X, latency_budget_ms).proba
+
+    def predict(self, X, latency_budget_ms=None):
+        return self.vote(X, latency_budget_ms).labels
+
+    def latency_report(self, n_rows=1):
+        """Running mean latency per member in milliseconds, for batches of about n_rows"""
+        estimates = {name: self.expected_latency_ms(name, n_rows) for name in self.names}
+        return {name: ms for name, ms in estimates.items() if ms is not None}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+def time_call(fn, repeats):
+    """Median wall time of fn() in milliseconds, after one warm-up call"""
+    fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def sequential_scores(models, X):
+    """The pre-ensemble predict.py work: every model's labels and scores, one model after another"""
+    return [(model.predict(X), member_scores(model, X)[0]) for model in models]
+
+
+def benchmark(model_dir=".", n_rows=1000, repeats=20, latency_budget_ms=None):
+    """The old one-model-after-another predict.py path vs the concurrent ensemble"""
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    models = load_models(model_dir)
+    ensemble = CareerEnsemble(models)
+
+    rng = np.random.default_rng(0)
+    n_features = models[0].n_features_in_
+    X = rng.integers(0, 10, size=(n_rows, n_features)).astype(np.float64)
+
+    print(f"🚀 Ensemble of {', '.join(ensemble.names)} over {len(ensemble.classes_)} careers")
+    print(f"\n{'workload':<14}{'sequential (ms)':>17}{'ensemble (ms)':>15}{'speedup':>10}")
+    for label, data in (("single row", X[:1]), (f"{n_rows:,} rows", X)):
+        sequential = time_call(lambda: sequential_scores(models, data), repeats)
+        voted = time_call(lambda: ensemble.vote(data), repeats)
+        print(f"{label:<14}{sequential:>17.2f}{voted:>15.2f}{sequential / voted:>9.1f}x")
+
+    print("\n⏱️ Per-model latency inside the ensemble (running mean, ms):")
+    single, batch = ensemble.latency_report(1), ensemble.latency_report(n_rows)
+    for name in ensemble.names:
+        print(f"  {name:<14} {single[name]:8.2f} (1 row) {batch[name]:10.2f} ({n_rows:,} rows)"
+              f"  weight {ensemble.weights[name]}")
+
+    if latency_budget_ms is not None:
+        fast = time_call(lambda: ensemble.vote(X[:1], latency_budget_ms), repeats)
+        print(f"\n⚡ Fast mode, {latency_budget_ms} ms budget: {fast:.2f} ms per row")
+
+    vote = ensemble.vote(X[:1], latency_budget_ms)
+    print(f"\n🏆 Top careers for the first row (skipped: {', '.join(vote.skipped) or 'none'})")
+    for career, probability in vote.ranking(5)[0]:
+        print(f"  {career:<40} {probability:.3f}")
+    ensemble.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the four-model career ensemble")
+    parser.add_argument("--model-dir", default=".", help="directory holding model1.pkl - model4.pkl")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, help="fast mode: latency budget for the final vote")
+    args = parser.parse_args()
+    benchmark(args.model_dir, args.rows, args.repeats, args.budget_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Vectorized Feature Encoder
+Turns raw questionnaire answers into the model's feature matrix in one pass, and
+preprocesses training frames the same way
+
+Example:
+    python feature_encoder.py --replicas 100
+    python feature_encoder.py --startup weights.pkl
+"""
+
+import os
+import json
+import time
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLUMNS = [
+    "Logical quotient rating",
+    "coding skills rating",
+    "hackathons",
+    "public speaking points",
+]
+
+YES_NO_COLUMNS = [
+    "self-learning capability?",
+    "Extra-courses did",
+    "Taken inputs from seniors or elders",
+    "worked in teams ever?",
+    "Introvert",
+]
+YES_NO_CODES = {"yes": 1, "no": 0}
+
+SKILL_COLUMNS = ["reading and writing skills", "memory capability score"]
+SKILL_CODES = {"poor": 0, "medium": 1, "excellent": 2}
+
+CATEGORY_COLUMNS = [
+    "certifications",
+    "workshops",
+    "Interested subjects",
+    "interested career area ",
+    "Type of company want to settle in?",
+    "Interested Type of Books",
+]
+
+# get_dummies prefixes used by every training script
+DUMMY_PREFIXES = {"A": "Management or Technical", "B": "hard/smart worker"}
+
+# Column order of the original training.py feed, used when a model carries no names
+LEGACY_FEATURE_NAMES = [
+    "Logical quotient rating",
+    "coding skills rating",
+    "hackathons",
+    "public speaking points",
+    "self-learning capability?",
+    "Extra-courses did",
+    "Taken inputs from seniors or elders",
+    "worked in teams ever?",
+    "Introvert",
+    "reading and writing skills",
+    "memory capability score",
+    "B_hard worker",
+    "B_smart worker",
+    "A_Management",
+    "A_Technical",
+    "Interested subjects_code",
+    "Interested Type of Books_code",
+    "certifications_code",
+    "workshops_code",
+    "Type of company want to settle in?_code",
+    "interested career area _code",
+]
+
+# Argument order of the inputlist() functions in the Streamlit and Gradio apps
+QUESTIONNAIRE_COLUMNS = NUMERIC_COLUMNS + YES_NO_COLUMNS + SKILL_COLUMNS + [
+    "hard/smart worker",
+    "Management or Technical",
+    "Interested subjects",
+    "Interested Type of Books",
+    "certifications",
+    "workshops",
+    "Type of company want to settle in?",
+    "interested career area ",
+]
+
+
+def profile_from_answers(*answers):
+    """Build a raw profile dict from answers given in QUESTIONNAIRE_COLUMNS order"""
+    return dict(zip(QUESTIONNAIRE_COLUMNS, answers))
+
+
+def vocabularies_from_dataframe(df):
+    """Category vocabularies learned the same way .astype("category") does"""
+    return {
+        col: pd.Categorical(df[col]).categories.tolist()
+        for col in CATEGORY_COLUMNS
+        if col in df.columns
+    }
+
+
+def ordinal_codes(values, codes):
+    """
+    Map a column through codes ({"yes": 1, ...}, matched case-insensitively) as
+    int64. Only the distinct values are looked up; unmapped values and NaN give -1.
+    """
+    categorical = pd.Categorical(values)
+    # The trailing -1 is what NaN's code (-1) indexes
+    lookup = np.array([codes.get(str(c).lower(), -1) for c in categorical.categories] + [-1], dtype=np.int64)
+    return lookup[categorical.codes]
+
+
+def preprocess_frame(df):
+    """
+    The training encoding of a raw mldata-style frame in one pass:
+    - yes/no and skill columns become their integer codes
+    - category columns become pandas categoricals plus a <col>_code column
+    - Management or Technical and hard/smart worker become A_/B_ dummy columns
+
+    Columns come out in the order the per-column replace/astype/get_dummies steps
+    produced them. df itself is neither modified nor copied; the result is
+    assembled once from the column arrays.
+    """
+    columns = {}
+    for col in df.columns:
+        if col in YES_NO_COLUMNS:
+            columns[col] = ordinal_codes(df[col], YES_NO_CODES)
+        elif col in SKILL_COLUMNS:
+            columns[col] = ordinal_codes(df[col], SKILL_CODES)
+        elif col in CATEGORY_COLUMNS:
+            columns[col] = pd.Categorical(df[col])
+        elif col not in DUMMY_PREFIXES.values():
+            columns[col] = df[col]
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            columns[col + "_code"] = columns[col].codes
+    for prefix, col in DUMMY_PREFIXES.items():
+        if col in df.columns:
+            categorical = pd.Categorical(df[col])
+            for code, value in enumerate(categorical.categories):
+                columns[f"{prefix}_{value}"] = categorical.codes == code
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def model_feature_names(model, fallback=None):
+    """Return the feature order a fitted model expects"""
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        return list(names)
+    return list(fallback) if fallback is not None else list(LEGACY_FEATURE_NAMES)
+
+
+class FeatureEncoder:
+    """
+    Encodes profiles with the training vocabularies, in the model's column order.
+
+    Missing or unseen answers are encoded the way pandas encodes NaN during
+    training: -1 for mapped and category codes, all-zero dummy columns.
+    """
+
+    def __init__(self, vocabularies, feature_names):
+        self.vocabularies = {col: list(values) for col, values in vocabularies.items()}
+        self.feature_names = list(feature_names)
+        self._plan = [self._compile(name) for name in self.feature_names]
+
+    @classmethod
+    def from_dataframe(cls, df, feature_names):
+        """Learn category vocabularies the same way .astype("category") does"""
+        return cls(vocabularies_from_dataframe(df), feature_names)
+
+    def _compile(self, name):
+        """Resolve a feature name into (kind, source column, lookup table)"""
+        if name in YES_NO_COLUMNS:
+            return "map", name, YES_NO_CODES
+        if name in SKILL_COLUMNS:
+            return "map", name, SKILL_CODES
+        if name.endswith("_code") and name[: -len("_code")] in self.vocabularies:
+            source = name[: -len("_code")]
+            codes = {value: code for code, value in enumerate(self.vocabularies[source])}
+            return "code", source, codes
+        prefix, _, value = name.partition("_")
+        if prefix in DUMMY_PREFIXES and value:
+            return "dummy", DUMMY_PREFIXES[prefix], value.lower()
+        return "numeric", name, None
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    def transform(self, profiles):
+        """Encode a DataFrame of raw profiles into a C-contiguous float64 matrix"""
+        out = np.empty((len(profiles), self.n_features), dtype=np.float64)
+        for j, (kind, source, table) in enumerate(self._plan):
+            if source not in profiles.columns:
+                out[:, j] = 0 if kind == "dummy" else -1
+                continue
+
+            values = profiles[source]
+            if kind == "numeric":
+                out[:, j] = pd.to_numeric(values).to_numpy(dtype=np.float64)
+            elif kind == "code":
+                out[:, j] = values.astype(object).map(table).fillna(-1).to_numpy(dtype=np.float64)
+            elif kind == "map":
+                out[:, j] = ordinal_codes(values, table)
+            else:
+                out[:, j] = (values.astype(str).str.lower() == table).to_numpy()
+        return out
+
+    def encode_profile(self, profile):
+        """Encode a single profile dict into a (1, n_features) matrix"""
+        out = np.empty((1, self.n_features), dtype=np.float64)
+        row = out[0]
+        for j, (kind, source, table) in enumerate(self._plan):
+            value = profile.get(source)
+            if kind == "numeric":
+                row[j] = -1 if value is None else float(value)
+            elif kind == "code":
+                row[j] = table.get(value, -1)
+            elif kind == "map":
+                row[j] = table.get(str(value).lower(), -1)
+            else:
+                row[j] = str(value).lower() == table
+        return out
+
+
+class SchemaMismatchError(ValueError):
+    """A model does not match the feature schema saved with it"""
+
+
+def schema_path(model_path):
+    """Where the schema of a pickled model lives: weights.pkl -> weights.schema.json"""
+    return os.path.splitext(model_path)[0] + ".schema.json"
+
+
+class FeatureSchema:
+    """
+    The feature contract of a trained model: column names in training order, the
+    category vocabularies behind the _code columns, and the class order.
+
+    Saved next to the model by the training scripts and checked against the model
+    once at load time, so a mismatch fails at startup instead of per request.
+    """
+
+    def __init__(self, feature_names, vocabularies=None, classes=None):
+        self.feature_names = list(feature_names)
+        self.vocabularies = {col: list(values) for col, values in (vocabularies or {}).items()}
+        self.classes = None if classes is None else [str(c) for c in classes]
+
+    @classmethod
+    def from_training(cls, df, feature_names, model=None):
+        """Schema of a model trained on df with feature_names"""
+        classes = None if model is None else model.classes_
+        return cls(feature_names, vocabularies_from_dataframe(df), classes)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["feature_names"], data.get("vocabularies"), data.get("classes"))
+
+    def save(self, path):
+        data = {
+            "feature_names": self.feature_names,
+            "vocabularies": self.vocabularies,
+            "classes": self.classes,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def validate(self, model):
+        """Raise SchemaMismatchError unless model takes these features and predicts these classes"""
+        problems = []
+        n_features = getattr(model, "n_features_in_", None)
+        if n_features is not None and n_features != len(self.feature_names):
+            problems.append(f"model takes {n_features} features, schema lists {len(self.feature_names)}")
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None and list(names) != self.feature_names:
+            problems.append("feature names or their order differ")
+        if self.classes is not None and [str(c) for c in model.classes_] != self.classes:
+            problems.append("class list or its order differs")
+
+        missing = [name for name in self.feature_names
+                   if name.endswith("_code") and name[: -len("_code")] not in self.vocabularies]
+        if missing:
+            problems.append(f"no vocabulary for {', '.join(missing)}")
+        if problems:
+            raise SchemaMismatchError("; ".join(problems))
+        return self
+
+    def encoder(self):
+        return FeatureEncoder(self.vocabularies, self.feature_names)
+
+
+def load_or_build_schema(model_path, model, training_data, feature_names=None):
+    """
+    The schema saved next to model_path, validated against model. Models trained
+    before schemas were saved get one built from training_data() and
+    feature_names() (both loaders, only called then) and written next to the
+    model, so only the first start after an upgrade reads the dataset.
+    """
+    path = schema_path(model_path)
+    if os.path.exists(path):
+        return FeatureSchema.load(path).validate(model)
+
+    names = feature_names() if feature_names is not None else model_feature_names(model)
+    schema = FeatureSchema.from_training(training_data(), names, model).validate(model)
+    try:
+        schema.save(path)
+    except OSError as e:
+        warnings.warn(f"Could not save feature schema to {path}: {e}")
+    return schema
+
+
+def replace_loop_preprocess(df):
+    """The per-column df.replace() pipeline the training scripts used before preprocess_frame()"""
+    newdf = df.copy()
+    for col in YES_NO_COLUMNS:
+        newdf = newdf.replace({col: YES_NO_CODES})
+    for col in SKILL_COLUMNS:
+        newdf = newdf.replace({col: SKILL_CODES})
+    for col in CATEGORY_COLUMNS:
+        newdf[col] = newdf[col].astype("category")
+        newdf[col + "_code"] = newdf[col].cat.codes
+    return pd.get_dummies(newdf, columns=list(DUMMY_PREFIXES.values()), prefix=list(DUMMY_PREFIXES))
+
+
+def benchmark(data_path="./data/mldata.csv", replicas=100, repeats=3):
+    """Rows/sec of preprocess_frame() vs the replace loop on mldata.csv stacked replicas times"""
+    df = pd.read_csv(data_path)
+    df["workshops"] = df["workshops"].replace(["testing"], "Testing")
+    df = pd.concat([df] * replicas, ignore_index=True)
+    print(f"🚀 {len(df):,} rows ({replicas}x {data_path}), best of {repeats}")
+
+    results = {}
+    for label, fn in (("replace loop", replace_loop_preprocess), ("single pass", preprocess_frame)):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results[label] = fn(df)
+            samples.append(time.perf_counter() - start)
+        print(f"  {label:<14}{min(samples):8.2f} s  {len(df) / min(samples):12,.0f} rows/sec")
+
+    # The replace loop leaves mapped columns as object dtype; values and order must still match
+    try:
+        pd.testing.assert_frame_equal(results["single pass"], results["replace loop"], check_dtype=False)
+        print("✅ Same columns, order and values as the replace loop")
+    except AssertionError as e:
+        print(f"❌ Output differs from the replace loop: {e}")
+
+
+def benchmark_startup(model_path, data_path="./data/mldata.csv", repeats=5):
+    """Encoder setup at app startup: dataset read + preprocessing vs the saved schema"""
+    import pickle
+
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+
+    def from_dataset():
+        df = pd.read_csv(data_path)
+        df["workshops"] = df["workshops"].replace(["testing"], "Testing")
+        preprocess_frame(df)
+        return FeatureEncoder.from_dataframe(df, model_feature_names(model))
+
+    def from_schema():
+        return FeatureSchema.load(schema_path(model_path)).validate(model).encoder()
+
+    print(f"🚀 Encoder for {model_path}, median of {repeats}")
+    encoders = {}
+    for label, fn in (("mldata.csv", from_dataset), ("saved schema", from_schema)):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            encoders[label] = fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"  {label:<14}{np.median(samples):8.2f} ms")
+    same = encoders["mldata.csv"].vocabularies == encoders["saved schema"].vocabularies
+    print(f"✅ Same vocabularies: {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training-frame preprocessing")
+    parser.add_argument("--data", default="./data/mldata.csv")
+    parser.add_argument("--replicas", type=int, default=100, help="times to stack the dataset")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--startup", metavar="MODEL",
+                        help="instead compare app startup encoder setup from the dataset vs MODEL's saved schema")
+    args = parser.parse_args()
+    if args.startup:
+        benchmark_startup(args.startup, args.data, max(args.repeats, 5))
+    else:
+        benchmark(args.data, args.replicas, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
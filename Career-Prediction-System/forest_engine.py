@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Flattened Random Forest Inference Engine
+Exports every tree of a fitted RandomForestClassifier into contiguous numpy node arrays
+and evaluates all trees for a batch of rows in one vectorized traversal
+
+Example:
+    python forest_engine.py enhanced_weights.pkl --rows 10000
+    python forest_engine.py mega_weights.pkl --anytime --batch-rows 64 --budget-ms 1 2
+"""
+
+import time
+import pickle
+import argparse
+import warnings
+
+import numpy as np
+
+# Upper bound on the (rows x trees x classes) block gathered at once when summing leaves
+BLOCK_ELEMENTS = 1 << 22
+
+
+def stores_leaf_counts():
+    """Older sklearn trees store class counts in tree_.value; 1.4+ stores fractions"""
+    import sklearn
+
+    major, minor = (int(part) for part in sklearn.__version__.split(".")[:2])
+    return (major, minor) < (1, 4)
+
+
+class FlatForest:
+    """
+    All trees of a forest laid out as flat node arrays.
+
+    Child indices are global, so one gather walks every tree at once. Leaves point
+    to themselves, which lets the traversal run a fixed number of levels. Only
+    leaves own a row in leaf_values; value_offset maps a node to that row.
+    """
+
+    def __init__(self, feature, threshold, children, missing_left, value_offset,
+                 leaf_values, roots, classes, n_features, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.value_offset = value_offset
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten a fitted RandomForestClassifier (or a single DecisionTreeClassifier)"""
+        from sklearn.base import is_regressor
+
+        estimators = getattr(forest, "estimators_", [forest])
+        # A distilled student regresses one output per class, so its leaves already hold probabilities
+        per_class_outputs = is_regressor(forest) and hasattr(forest, "classes_")
+        if getattr(forest, "n_outputs_", 1) != 1 and not per_class_outputs:
+            raise ValueError("Multi-output forests are not supported")
+        normalize = stores_leaf_counts() and not per_class_outputs
+
+        features, thresholds, children, missing = [], [], [], []
+        offsets, leaf_blocks, roots = [], [], []
+        node_base = 0
+        leaf_base = 0
+        max_depth = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(node_base, node_base + n_nodes)
+
+            feature = tree.feature.astype(np.intp)
+            feature[is_leaf] = 0
+            left = np.where(is_leaf, node_ids, tree.children_left + node_base)
+            right = np.where(is_leaf, node_ids, tree.children_right + node_base)
+
+            if per_class_outputs:
+                leaf_values = tree.value[is_leaf, :, 0].astype(np.float64)
+            else:
+                leaf_values = tree.value[is_leaf, 0, :].astype(np.float64)
+            if normalize:
+                # Same per-row normalisation older DecisionTreeClassifier.predict_proba applied
+                normalizer = leaf_values.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                leaf_values /= normalizer
+
+            offset = np.full(n_nodes, -1, dtype=np.intp)
+            offset[is_leaf] = np.arange(leaf_base, leaf_base + leaf_values.shape[0])
+
+            features.append(feature)
+            thresholds.append(tree.threshold.astype(np.float64))
+            # children[2 * node] is the left child, children[2 * node + 1] the right one
+            children.append(np.stack([left, right], axis=1).ravel())
+            missing.append(np.asarray(getattr(tree, "missing_go_to_left", np.zeros(n_nodes)), dtype=bool))
+            offsets.append(offset)
+            leaf_blocks.append(leaf_values)
+            roots.append(node_base)
+
+            node_base += n_nodes
+            leaf_base += leaf_values.shape[0]
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            children=np.ascontiguousarray(np.concatenate(children)),
+            missing_left=np.ascontiguousarray(np.concatenate(missing)),
+            value_offset=np.ascontiguousarray(np.concatenate(offsets)),
+            leaf_values=np.ascontiguousarray(np.concatenate(leaf_blocks)),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=np.asarray(forest.classes_),
+            n_features=forest.n_features_in_,
+            max_depth=max_depth,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_classes(self):
+        return self.leaf_values.shape[1]
+
+    def _prepare(self, X):
+        # sklearn's trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, forest expects {self.n_features_in_}")
+        return X
+
+    def apply(self, X, trees=None):
+        """Return the leaf node reached in every tree, shape (n_rows, n_trees)"""
+        X = self._prepare(X)
+        roots = self.roots if trees is None else self.roots[trees]
+        nodes = np.broadcast_to(roots, (X.shape[0], len(roots))).copy()
+        # Flat offsets into X so each level is a single take() instead of 2-D fancy indexing
+        flat_X = X.ravel()
+        row_base = (np.arange(X.shape[0]) * X.shape[1])[:, np.newaxis]
+        has_nan = np.isnan(flat_X).any()
+
+        for _ in range(self.max_depth):
+            values = flat_X.take(row_base + self.feature.take(nodes))
+            go_right = ~(values <= self.threshold.take(nodes))
+            if has_nan:
+                go_right &= ~(np.isnan(values) & self.missing_left.take(nodes))
+            next_nodes = self.children.take(2 * nodes + go_right)
+            if np.array_equal(next_nodes, nodes):
+                break
+            nodes = next_nodes
+        return nodes
+
+    def _sum_leaves(self, leaves):
+        """Sum leaf probabilities tree by tree, in the same order sklearn accumulates them"""
+        n_rows, n_trees = leaves.shape
+        offsets = self.value_offset.take(leaves)
+
+        if n_rows * n_trees * self.n_classes <= BLOCK_ELEMENTS:
+            # Small batches: one gather, and cumsum adds strictly left to right like "+="
+            return np.cumsum(self.leaf_values.take(offsets, axis=0), axis=1)[:, -1]
+
+        out = np.zeros((n_rows, self.n_classes), dtype=np.float64)
+        for t in range(n_trees):
+            out += self.leaf_values.take(offsets[:, t], axis=0)
+        return out
+
+    def predict_proba(self, X):
+        """Class probabilities, equal to RandomForestClassifier.predict_proba with n_jobs=1"""
+        proba = self._sum_leaves(self.apply(X))
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def predict_proba_anytime(self, X, chunk_trees=10, time_budget_ms=None):
+        """
+        Evaluate trees chunk by chunk, retiring a row once the remaining trees can
+        no longer overturn its leading class, or stopping every row once the time
+        budget is spent. Returns (probabilities, trees used per row).
+        """
+        start = time.perf_counter()
+        X = self._prepare(X)
+        n_trees = self.n_trees
+        sums = np.zeros((X.shape[0], self.n_classes), dtype=np.float64)
+        trees_used = np.zeros(X.shape[0], dtype=np.intp)
+        active = np.arange(X.shape[0])
+
+        # A lead can be at most the trees counted so far, so without a budget nothing
+        # retires before half the forest has voted: take that half in one pass
+        boundaries = list(range(chunk_trees, n_trees, chunk_trees))
+        if time_budget_ms is None:
+            boundaries = [b for b in boundaries if 2 * b > n_trees]
+        boundaries.append(n_trees)
+
+        first = 0
+        for last in boundaries:
+            sums[active] += self._sum_leaves(self.apply(X[active], trees=slice(first, last)))
+            trees_used[active] = last
+            first = last
+            remaining = n_trees - last
+            if remaining == 0:
+                break
+
+            # Each tree adds at most 1 to any class, so a lead above `remaining` is final
+            top2 = np.partition(sums[active], self.n_classes - 2, axis=1)[:, -2:]
+            active = active[top2[:, 1] - top2[:, 0] <= remaining]
+            if active.size == 0:
+                break
+            if time_budget_ms is not None and (time.perf_counter() - start) * 1000 >= time_budget_ms:
+                break
+
+        return sums / trees_used[:, np.newaxis], trees_used
+
+
+def load_flat_forest(path):
+    """Unpickle a forest and flatten it"""
+    with open(path, "rb") as f:
+        return FlatForest.from_sklearn(pickle.load(f))
+
+
+def sample_inputs(flat, n_rows, seed=0):
+    """Random rows spanning the thresholds each feature is split on"""
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(0, 10, size=(n_rows, flat.n_features_in_))
+    internal = flat.value_offset == -1
+    for j in range(flat.n_features_in_):
+        used = flat.threshold[internal & (flat.feature == j)]
+        if used.size:
+            X[:, j] = rng.uniform(used.min() - 1, used.max() + 1, size=n_rows)
+    return X
+
+
+def time_call(fn, X, repeats):
+    """Median wall time of fn(X) in milliseconds"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def benchmark(model_path, n_rows=10000, repeats=50):
+    """Compare the flattened engine against the stock estimator"""
+    with open(model_path, "rb") as f:
+        forest = pickle.load(f)
+    # Benchmark rows are plain arrays, so skip the feature-name check warning
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    start = time.perf_counter()
+    flat = FlatForest.from_sklearn(forest)
+    export_ms = (time.perf_counter() - start) * 1000
+
+    print(f"🌲 {model_path}: {flat.n_trees} trees, {len(flat.feature):,} nodes, "
+          f"{flat.n_classes} classes, depth {flat.max_depth} (exported in {export_ms:.0f} ms)")
+
+    X = sample_inputs(flat, n_rows)
+    sequential = forest.get_params().get("n_jobs")
+    forest.set_params(n_jobs=1)
+    expected = forest.predict_proba(X)
+    forest.set_params(n_jobs=sequential)
+    actual = flat.predict_proba(X)
+    print(f"✅ Bit-for-bit equal to sklearn (n_jobs=1): {np.array_equal(expected, actual)}")
+    print(f"   max |difference|: {np.abs(expected - actual).max():.3e}")
+
+    single = X[:1]
+    results = [
+        ("single row", single, repeats),
+        (f"{n_rows:,} rows", X, max(3, repeats // 10)),
+    ]
+    print(f"\n{'workload':<14}{'sklearn (ms)':>14}{'flat (ms)':>12}{'speedup':>10}")
+    for name, data, reps in results:
+        stock = time_call(forest.predict_proba, data, reps)
+        fast = time_call(flat.predict_proba, data, reps)
+        print(f"{name:<14}{stock:>14.3f}{fast:>12.3f}{stock / fast:>9.1f}x")
+
+
+def benchmark_anytime(model_path, n_rows=10000, batch_rows=64, chunk_trees=10, budgets_ms=(1.0, 2.0, 5.0)):
+    """Per-batch latency, trees used and top-1 agreement of anytime evaluation vs all trees"""
+    flat = load_flat_forest(model_path)
+    X = sample_inputs(flat, n_rows)
+    expected = np.argmax(flat.predict_proba(X), axis=1)
+    batches = [slice(i, i + batch_rows) for i in range(0, n_rows, batch_rows)]
+
+    def run(fn):
+        latencies, labels, used = [], [], []
+        for batch in batches:
+            start = time.perf_counter()
+            proba, trees = fn(X[batch])
+            latencies.append((time.perf_counter() - start) * 1000)
+            labels.append(np.argmax(proba, axis=1))
+            used.append(trees)
+        return np.array(latencies), np.concatenate(labels), np.concatenate(used)
+
+    modes = [("all trees", lambda x: (flat.predict_proba(x), np.full(len(x), flat.n_trees)))]
+    modes.append(("exact stop", lambda x: flat.predict_proba_anytime(x, chunk_trees)))
+    for budget in budgets_ms:
+        modes.append((f"{budget} ms", lambda x, b=budget: flat.predict_proba_anytime(x, chunk_trees, b)))
+
+    print(f"🌲 {model_path}: {flat.n_trees} trees in chunks of {chunk_trees}, "
+          f"{len(batches)} requests of {batch_rows} rows")
+    print(f"\n{'mode':<12}{'p50 (ms)':>10}{'p99 (ms)':>10}{'trees used':>12}{'top-1 agree':>13}")
+    for name, fn in modes:
+        latencies, labels, used = run(fn)
+        print(f"{name:<12}{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}"
+              f"{used.mean():>12.1f}{np.mean(labels == expected):>12.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the flattened forest engine")
+    parser.add_argument("model", nargs="?", default="enhanced_weights.pkl")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--anytime", action="store_true", help="benchmark early-stopping evaluation instead")
+    parser.add_argument("--batch-rows", type=int, default=64, help="rows per request in --anytime mode")
+    parser.add_argument("--chunk-trees", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, nargs="*", default=[1.0, 2.0, 5.0])
+    args = parser.parse_args()
+    if args.anytime:
+        benchmark_anytime(args.model, args.rows, args.batch_rows, args.chunk_trees, args.budget_ms)
+    else:
+        benchmark(args.model, args.rows, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
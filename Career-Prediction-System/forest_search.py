@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Forest Hyperparameter Search
+Successive halving over the enhanced and mega random forests: candidates from
+forest_search.json are fitted on growing tree/sample budgets in worker processes,
+the best third goes on to the next rung, and the most accurate model within the
+latency and size budget is saved for the training scripts
+
+Example:
+    python forest_search.py enhanced --workers 4
+    python forest_search.py mega --config forest_search.json
+"""
+
+import os
+import json
+import math
+import time
+import pickle
+import shutil
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+from forest_engine import FlatForest, time_call
+
+SEARCH_CONFIG = "forest_search.json"
+
+# Trial logs, selections and cached folds
+SEARCH_DIR = "forest_search_runs"
+FOLDS_FORMAT_VERSION = 1
+
+# Single-row predict_proba calls timed per trial
+LATENCY_REPEATS = 50
+
+TARGETS = ("enhanced", "mega")
+
+
+def load_config(path=SEARCH_CONFIG):
+    with open(path) as f:
+        return json.load(f)
+
+
+def selection_path(target, search_dir=SEARCH_DIR):
+    return os.path.join(search_dir, f"{target}-best.json")
+
+
+def forest_params(target, config_path=SEARCH_CONFIG, search_dir=SEARCH_DIR):
+    """
+    RandomForestClassifier parameters for target: the "params" of the config,
+    updated with the last search selection when there is one
+    """
+    params = dict(load_config(config_path)[target]["params"])
+    try:
+        with open(selection_path(target, search_dir)) as f:
+            params.update(json.load(f)["params"])
+    except FileNotFoundError:
+        pass
+    return params
+
+
+def training_data(target, config):
+    """(X, y) the target's training script fits on, before its train/test split"""
+    if target == "enhanced":
+        from train_enhanced_model import prepare_training_data
+        _, _, X, y = prepare_training_data()
+        return X.to_numpy(dtype=np.float64), y.to_numpy()
+
+    from train_mega_model import MEGA_CAREER_DATABASE, MEGA_FEATURE_COLUMNS
+    from synthetic_data import generate_dataset
+    data = config.get("data", {})
+    df = generate_dataset(MEGA_CAREER_DATABASE, scale=data.get("scale", 1), seed=data.get("seed", 42))
+    # train_mega_model.py standardizes the inputs first; forest splits do not change under
+    # per-feature scaling, so the search works on the raw features
+    return df[MEGA_FEATURE_COLUMNS].to_numpy(dtype=np.float64), df['career'].to_numpy()
+
+
+def folds_key(target, config):
+    """Hash of everything the cached folds depend on"""
+    if target == "enhanced":
+        from dataset_cache import source_digest
+        source = source_digest("./data/mldata.csv")
+    else:
+        from train_mega_model import MEGA_CAREER_DATABASE
+        source = json.dumps([MEGA_CAREER_DATABASE, config.get("data", {})], sort_keys=True)
+    key = json.dumps([FOLDS_FORMAT_VERSION, target, source, config["folds"], config["seed"]])
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def nested_order(y, rng):
+    """
+    Row order in which every prefix is close to stratified, so a rung's sample
+    fraction is a class-balanced superset of the previous rung's
+    """
+    order = rng.permutation(len(y))
+    _, codes, counts = np.unique(y[order], return_inverse=True, return_counts=True)
+    rank = np.zeros(len(y))
+    for c in range(len(counts)):
+        rank[codes == c] = np.arange(counts[c])
+    return order[np.argsort((rank + rng.random(len(y))) / counts[codes], kind="stable")]
+
+
+def build_folds(target, config, search_dir=SEARCH_DIR):
+    """
+    Preprocess the target's data once and write X, y and the folds' row indices as
+    .npy files under <search_dir>/folds/<target>-<hash>; workers memory-map them.
+    Only the training part of the training script's 80/20 split is searched.
+    """
+    target_dir = os.path.join(search_dir, "folds", f"{target}-{folds_key(target, config)}")
+    if os.path.exists(os.path.join(target_dir, "manifest.json")):
+        return target_dir
+
+    X, y = training_data(target, config)
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    classes, codes = np.unique(y_train, return_inverse=True)
+
+    tmp_dir = f"{target_dir}.tmp{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    np.save(os.path.join(tmp_dir, "X.npy"), np.ascontiguousarray(X_train))
+    np.save(os.path.join(tmp_dir, "y.npy"), codes.astype(np.int32))
+    rng = np.random.default_rng(config["seed"])
+    splitter = StratifiedKFold(config["folds"], shuffle=True, random_state=config["seed"])
+    for k, (train, valid) in enumerate(splitter.split(X_train, codes)):
+        np.save(os.path.join(tmp_dir, f"train{k}.npy"), train[nested_order(codes[train], rng)])
+        np.save(os.path.join(tmp_dir, f"valid{k}.npy"), valid)
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump({"format_version": FOLDS_FORMAT_VERSION, "target": target, "n_rows": len(codes),
+                   "n_features": X_train.shape[1], "folds": config["folds"],
+                   "classes": [str(c) for c in classes]}, f)
+    try:
+        os.rename(tmp_dir, target_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target_dir
+
+
+# Memory-mapped folds, opened once per worker process
+_FOLDS = {}
+
+
+def load_fold(folds_dir, k):
+    if folds_dir not in _FOLDS:
+        arrays = {"X": np.load(os.path.join(folds_dir, "X.npy"), mmap_mode="r"),
+                  "y": np.load(os.path.join(folds_dir, "y.npy"), mmap_mode="r")}
+        _FOLDS[folds_dir] = arrays
+    arrays = _FOLDS[folds_dir]
+    train = np.load(os.path.join(folds_dir, f"train{k}.npy"))
+    valid = np.load(os.path.join(folds_dir, f"valid{k}.npy"))
+    return arrays["X"], arrays["y"], train, valid
+
+
+class _ByteCounter:
+    """File-like sink that only counts what pickle writes"""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += memoryview(data).nbytes
+
+
+def pickled_size_mb(model):
+    """Size of the model's pickle, without holding a second copy of its arrays in memory"""
+    counter = _ByteCounter()
+    pickle.dump(model, counter, protocol=pickle.HIGHEST_PROTOCOL)
+    return counter.size / 1e6
+
+
+def run_trial(folds_dir, k, params, trees, samples):
+    """Fit one candidate on one fold at one budget; returns its metrics"""
+    X, y, train, valid = load_fold(folds_dir, k)
+    train = train[:max(1, int(round(len(train) * samples)))]
+    X_valid = np.asarray(X[valid])
+    model = RandomForestClassifier(**dict(params, n_estimators=trees), random_state=42, n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(np.asarray(X[train]), y[train])
+    fit_s = time.perf_counter() - start
+
+    accuracy = float(np.mean(model.predict(X_valid) == y[valid]))
+    size_mb = pickled_size_mb(model)
+    # Latency as the apps serve the forest: flattened, one questionnaire at a time
+    latency_ms = time_call(FlatForest.from_sklearn(model).predict_proba, X_valid[:1], LATENCY_REPEATS)
+    return {"fold": k, "trees": trees, "samples": samples, "n_train": len(train),
+            "accuracy": accuracy, "fit_s": fit_s, "size_mb": size_mb, "latency_ms": latency_ms}
+
+
+def candidates(config):
+    """Up to config["candidates"] distinct settings from the grid in config["space"], seeded"""
+    space = config["space"]
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    rng = np.random.default_rng(config["seed"])
+    n = min(config.get("candidates", len(grid)), len(grid))
+    return [dict(config["params"], **grid[i]) for i in sorted(rng.choice(len(grid), n, replace=False))]
+
+
+def within_budget(result, budget):
+    return (result["latency_ms"] <= budget.get("latency_ms", math.inf)
+            and result["size_mb"] <= budget.get("size_mb", math.inf))
+
+
+def summarize(trials):
+    """Mean accuracy and fit time over folds, worst-case size and latency"""
+    return {
+        "accuracy": float(np.mean([t["accuracy"] for t in trials])),
+        "fit_s": float(np.mean([t["fit_s"] for t in trials])),
+        "size_mb": float(max(t["size_mb"] for t in trials)),
+        "latency_ms": float(max(t["latency_ms"] for t in trials)),
+    }
+
+
+def evaluate(pool, folds_dir, alive, trees, samples, n_folds, log, tags):
+    """Fit every (candidate id, params) in alive on every fold; per-candidate summaries"""
+    futures = {
+        (i, k): pool.submit(run_trial, folds_dir, k, params, trees, samples)
+        for i, params in alive for k in range(n_folds)
+    }
+    results = []
+    for i, params in alive:
+        trials = [futures[i, k].result() for k in range(n_folds)]
+        logged = dict(params, n_estimators=trees)
+        for trial in trials:
+            log.write(json.dumps(dict(trial, candidate=i, params=logged, **tags)) + "\n")
+        results.append(dict(summarize(trials), candidate=i, trees=trees, samples=samples, params=params))
+    log.flush()
+    return results
+
+
+def print_results(results, config, budget):
+    print(f"{'cand':>5}{'accuracy':>10}{'fit':>9}{'size':>10}{'latency':>10}  params")
+    for res in results:
+        flag = "" if within_budget(res, budget) else "  ⚠️ over budget"
+        space = {key: res["params"][key] for key in config["space"] if key in res["params"]}
+        print(f"{res['candidate']:>5}{res['accuracy']:>10.4f}{res['fit_s']:>8.2f}s"
+              f"{res['size_mb']:>8.1f}MB{res['latency_ms']:>8.2f}ms  {space}{flag}")
+
+
+def search(target, config, workers=None, search_dir=SEARCH_DIR):
+    """
+    Successive halving: every surviving candidate is fitted on every fold at the
+    rung's trees and sample fraction; candidates over the latency or size budget
+    are dropped (both only grow with trees and samples) and the best 1/eta of the
+    rest by mean accuracy go on. Returns the selection written to
+    <search_dir>/<target>-best.json.
+    """
+    start = time.perf_counter()
+    folds_dir = build_folds(target, config, search_dir)
+    print(f"📁 Folds: {folds_dir} ({time.perf_counter() - start:.1f} s)")
+
+    budget = config.get("budget", {})
+    pool_size = workers or config.get("workers") or os.cpu_count()
+    alive = list(enumerate(candidates(config)))
+    log_path = os.path.join(search_dir, f"{target}-trials.jsonl")
+    finished = []
+
+    with ProcessPoolExecutor(pool_size) as pool, open(log_path, "a") as log:
+        for r, rung in enumerate(config["rungs"]):
+            results = evaluate(pool, folds_dir, alive, rung["trees"], rung["samples"], config["folds"],
+                               log, {"target": target, "rung": r})
+            results.sort(key=lambda res: -res["accuracy"])
+            print(f"\n🔍 Rung {r}: {len(alive)} candidate(s), {rung['trees']} trees, "
+                  f"{rung['samples']:.0%} of the rows")
+            print_results(results, config, budget)
+
+            if rung["samples"] >= 1.0:
+                finished += results
+            feasible = [res for res in results if within_budget(res, budget)]
+            keep = max(1, math.ceil(len(alive) / config.get("eta", 3)))
+            alive = [(res["candidate"], res["params"]) for res in feasible[:keep]]
+            if not alive:
+                print("⚠️ No candidate left within the budget")
+                break
+        search_s = time.perf_counter() - start
+
+        # Reference point: the parameters the training script would use without a search
+        configured = dict(config["params"])
+        reference = evaluate(pool, folds_dir, [(-1, configured)], configured["n_estimators"], 1.0,
+                             config["folds"], log, {"target": target, "rung": "configured"})
+        print(f"\n📊 Configured parameters ({configured['n_estimators']} trees, all rows):")
+        print_results(reference, config, budget)
+
+    feasible = [res for res in finished if within_budget(res, budget)]
+    if not feasible:
+        print("⚠️ Nothing trained on all rows fits the budget; keeping the configured parameters")
+        return None
+    best = max(feasible, key=lambda res: (res["accuracy"], -res["latency_ms"]))
+
+    selection = dict(best, target=target, params=dict(best["params"], n_estimators=best["trees"]),
+                     budget=budget, search_s=search_s, configured=reference[0])
+    path = selection_path(target, search_dir)
+    with open(path + ".tmp", "w") as f:
+        json.dump(selection, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+    print(f"\n✅ Selected candidate {best['candidate']} at {best['trees']} trees: "
+          f"accuracy {best['accuracy']:.4f}, {best['latency_ms']:.2f} ms/row, {best['size_mb']:.1f} MB")
+    print(f"📊 Parameters: {selection['params']}")
+    print(f"⏱️ Search took {search_s:.1f} s; trials logged to {log_path}")
+    if search_dir == SEARCH_DIR:
+        print(f"💾 {path} is used by train_{target}_model.py from now on")
+    else:
+        print(f"💾 Saved to {path}; training scripts only read selections from {SEARCH_DIR}")
+    return selection
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive halving search over the career forests")
+    parser.add_argument("target", choices=TARGETS)
+    parser.add_argument("--config", default=SEARCH_CONFIG)
+    parser.add_argument("--workers", type=int, help="trial processes (default: config, then all cores)")
+    parser.add_argument("--search-dir", default=SEARCH_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.search_dir, exist_ok=True)
+    search(args.target, load_config(args.config)[args.target], args.workers, args.search_dir)
+
+
+if __name__ == "__main__":
+    main()
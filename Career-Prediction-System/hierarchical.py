@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Hierarchical Career Classifier
+A category forest followed by small per-category career forests, fitted in parallel
+processes and combined into one probability matrix over all careers
+
+Example:
+    python hierarchical.py mega_training_data.csv --database mega_career_database.pkl --workers 4
+"""
+
+import os
+import time
+import pickle
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from dataset_cache import read_dataset
+from forest_engine import FlatForest
+from forest_search import forest_params
+from ranking import top_k
+
+# Defaults under the parameters fit() is given; train_mega_model.py passes its flat
+# forest's forest_params("mega"), so a forest_search.py selection applies to both models
+FOREST_PARAMS = {
+    "n_estimators": 200,
+    "max_depth": 20,
+    "min_samples_split": 5,
+    "min_samples_leaf": 2,
+    "random_state": 42,
+}
+
+
+def career_categories(database):
+    """{career: category}; a career listed under several categories keeps the first"""
+    mapping = {}
+    for category, careers in database.items():
+        for career in careers:
+            mapping.setdefault(career, category)
+    return mapping
+
+
+def _fit_forest(X, y, params):
+    model = RandomForestClassifier(**params, n_jobs=1)
+    return model.fit(X, y)
+
+
+class HierarchicalForest:
+    """
+    P(career) = P(category) * P(career | category).
+
+    Each per-category forest only stores histograms over its own careers, so
+    leaves are ~20 wide instead of 300+. Career forests are only evaluated for
+    rows that give their category a non-zero probability.
+
+    With max_categories set, each row only visits its most probable categories;
+    careers of the others get 0, trading a little probability mass for latency.
+
+    The sklearn forests are what gets pickled; predictions run on FlatForest
+    copies rebuilt after loading.
+    """
+
+    def __init__(self, category_model, career_models, classes, categories, max_categories=None):
+        self.category_model = category_model
+        self.career_models = career_models
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.categories_ = list(categories)
+        self.max_categories = max_categories
+        self.n_features_in_ = category_model.n_features_in_
+        self._build_engines()
+
+    def _build_engines(self):
+        lookup = {career: j for j, career in enumerate(self.classes_)}
+        category_index = {category: g for g, category in enumerate(self.category_model.classes_)}
+        self._category_engine = FlatForest.from_sklearn(self.category_model)
+        # Per category: its column in P(category), its careers' columns in the output, its forest
+        self._routes = [
+            (category_index[category], np.array([lookup[c] for c in model.classes_]),
+             FlatForest.from_sklearn(model))
+            for category, model in self.career_models.items()
+        ]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_category_engine"], state["_routes"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_engines()
+
+    @classmethod
+    def fit(cls, X, y, mapping, params=None, workers=None):
+        """Fit the category forest, then one career forest per category in worker processes"""
+        params = dict(FOREST_PARAMS, **(params or {}))
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=object)
+        groups = np.array([mapping.get(career, "Other") for career in y], dtype=object)
+        categories = sorted(set(groups))
+
+        with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+            category_future = pool.submit(_fit_forest, X, groups, params)
+            futures = {
+                category: pool.submit(_fit_forest, X[groups == category], y[groups == category], params)
+                for category in categories
+            }
+            category_model = category_future.result()
+            career_models = {category: future.result() for category, future in futures.items()}
+
+        return cls(category_model, career_models, np.unique(y), categories)
+
+    def predict_category_proba(self, X):
+        return self._category_engine.predict_proba(X)
+
+    def predict_proba(self, X, max_categories=None):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        category_proba = self._category_engine.predict_proba(X)
+        max_categories = max_categories or self.max_categories
+        if max_categories and max_categories < category_proba.shape[1]:
+            dropped = np.argpartition(-category_proba, max_categories - 1, axis=1)[:, max_categories:]
+            np.put_along_axis(category_proba, dropped, 0.0, axis=1)
+        out = np.zeros((X.shape[0], len(self.classes_)))
+        for g, columns, model in self._routes:
+            weight = category_proba[:, g]
+            rows = np.flatnonzero(weight)
+            if rows.size == 0:
+                continue
+            proba = model.predict_proba(X[rows]) * weight[rows, np.newaxis]
+            out[np.ix_(rows, columns)] = proba
+        return out
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def ranking(self, X, k=10, min_probability=None):
+        """Top-k careers across all categories"""
+        return top_k(self.predict_proba(X), k, min_probability)
+
+
+def models_of(model):
+    """Every sklearn estimator making up a flat forest or a HierarchicalForest"""
+    if isinstance(model, HierarchicalForest):
+        return [model.category_model] + list(model.career_models.values())
+    return [model]
+
+
+def leaf_width(model):
+    """Mean width of the per-node class histograms across the model's trees"""
+    widths = [tree.tree_.value.shape[2] * tree.tree_.node_count
+              for forest in models_of(model) for tree in forest.estimators_]
+    nodes = [tree.tree_.node_count for forest in models_of(model) for tree in forest.estimators_]
+    return sum(widths) / sum(nodes)
+
+
+def profile(name, model, X_test, y_test, mapping, repeats=50):
+    """One row of the comparison table; both models predict through FlatForest"""
+    blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    start = time.perf_counter()
+    pickle.loads(blob)
+    load_ms = (time.perf_counter() - start) * 1000
+    engine = model if isinstance(model, HierarchicalForest) else FlatForest.from_sklearn(model)
+
+    latencies = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        engine.predict_proba(X_test[i:i + 1])
+        latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    proba = engine.predict_proba(X_test)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    ranking = top_k(proba, 5)
+    classes = np.asarray(model.classes_, dtype=object)
+    truth = np.asarray(y_test, dtype=object)
+    top1 = np.mean(classes.take(ranking.indices[:, 0]) == truth)
+    top5 = np.mean((classes.take(ranking.indices) == truth[:, np.newaxis]).any(axis=1))
+    predicted = [mapping.get(c, "Other") for c in classes.take(ranking.indices[:, 0])]
+    category = np.mean(np.array(predicted, dtype=object) == np.array([mapping.get(c, "Other") for c in truth]))
+
+    print(f"{name:<14}{top1:>7.3f}{top5:>7.3f}{category:>10.3f}{len(blob) / 1e6:>11.1f}{leaf_width(model):>8.0f}"
+          f"{load_ms:>11.1f}{np.median(latencies):>11.2f}{batch_ms:>13.1f}")
+
+
+def benchmark(data_path, database, workers=None, params=None, max_categories=(1, 2)):
+    """Flat vs hierarchical forest on train_mega_model's split of its training data"""
+    warnings.filterwarnings("ignore")
+    df = read_dataset(data_path)
+    mapping = career_categories(database)
+    feature_columns = [c for c in df.columns if c != "career"]
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[feature_columns], df["career"], test_size=0.2, random_state=42, stratify=df["career"]
+    )
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test = scaler.transform(X_test)
+    # The parameters train_mega_model.py fits both models with
+    params = {**FOREST_PARAMS, **forest_params("mega"), **(params or {})}
+
+    print(f"🚀 {len(X_train):,} training rows, {y_train.nunique()} careers in "
+          f"{len(set(mapping.get(c, 'Other') for c in y_train))} categories")
+    start = time.perf_counter()
+    flat = _fit_forest(X_train, y_train, params)
+    flat_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    hierarchical = HierarchicalForest.fit(X_train, y_train, mapping, params, workers)
+    hierarchical_seconds = time.perf_counter() - start
+    print(f"⏱️ Fit: flat {flat_seconds:.1f} s, hierarchical {hierarchical_seconds:.1f} s "
+          f"({workers or os.cpu_count()} worker processes)")
+
+    print(f"\n{'model':<14}{'top-1':>7}{'top-5':>7}{'category':>10}{'size (MB)':>11}{'width':>8}"
+          f"{'load (ms)':>11}{'1 row (ms)':>11}{f'{len(X_test):,} rows':>13}")
+    profile("flat", flat, X_test, y_test, mapping)
+    profile("hierarchical", hierarchical, X_test, y_test, mapping)
+    for m in max_categories:
+        hierarchical.max_categories = m
+        profile(f"  top-{m} cats", hierarchical, X_test, y_test, mapping)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a hierarchical career forest with the flat one")
+    parser.add_argument("data", help="training CSV written by train_mega_model.py")
+    parser.add_argument("--database", default="mega_career_database.pkl", help="pickled {category: [careers]}")
+    parser.add_argument("--workers", type=int, help="processes fitting the per-category forests")
+    parser.add_argument("--trees", type=int, help="override the forest_params(\"mega\") tree count")
+    parser.add_argument("--max-categories", type=int, nargs="*", default=[1, 2],
+                        help="also time routing each row to only its m most probable categories")
+    args = parser.parse_args()
+
+    with open(args.database, "rb") as f:
+        database = pickle.load(f)
+    params = {"n_estimators": args.trees} if args.trees else None
+    benchmark(args.data, database, args.workers, params, args.max_categories)
+
+
+if __name__ == "__main__":
+    main()
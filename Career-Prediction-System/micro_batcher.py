@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Micro-Batching Prediction Coalescer
+Rows arriving from concurrent sessions within a short window share one predict_proba call
+
+Example:
+    python micro_batcher.py weights.pkl --clients 32 --requests 50 --max-wait-ms 3
+"""
+
+import os
+import time
+import queue
+import pickle
+import argparse
+import threading
+import warnings
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+# Defaults can be tuned per deployment without code changes
+MAX_WAIT_ENV = "CAREER_BATCH_MAX_WAIT_MS"
+MAX_BATCH_ENV = "CAREER_BATCH_MAX_SIZE"
+DEFAULT_MAX_WAIT_MS = 3.0
+DEFAULT_MAX_BATCH = 64
+
+# One batcher per name, shared by every Streamlit session in the process
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+class MicroBatcher:
+    """
+    Queues single-row requests and runs them through batch_fn in stacked batches.
+
+    A batch closes when max_batch rows are waiting or max_wait has passed since
+    its first row arrived. batch_fn takes an (n, n_features) matrix and returns
+    one result per row; each caller gets its own row back.
+    """
+
+    def __init__(self, batch_fn, max_wait=None, max_batch=None, name="batcher"):
+        if max_wait is None:
+            max_wait = float(os.environ.get(MAX_WAIT_ENV, DEFAULT_MAX_WAIT_MS)) / 1000
+        if max_batch is None:
+            max_batch = int(os.environ.get(MAX_BATCH_ENV, DEFAULT_MAX_BATCH))
+        self.batch_fn = batch_fn
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._rows = 0
+        self._queue_delay = 0.0
+        self._max_queue_delay = 0.0
+        self._predict_time = 0.0
+
+        self._worker = threading.Thread(target=self._run, name=f"{name}-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, row):
+        """Queue one feature row and return a Future for its result"""
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64).ravel(), future, time.perf_counter()))
+        return future
+
+    def predict(self, row, timeout=None):
+        """Block until the batch holding this row has been scored"""
+        return self.submit(row).result(timeout)
+
+    def _collect(self):
+        """Wait for a first row, then gather more until the batch is full or the window closes"""
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Rows that queued up during the previous batch are taken even past the deadline
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            rows, futures, enqueued = zip(*batch)
+            start = time.perf_counter()
+            try:
+                results = self.batch_fn(np.vstack(rows))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+            delays = [start - t for t in enqueued]
+            with self._stats_lock:
+                self._batch_sizes[len(batch)] += 1
+                self._rows += len(batch)
+                self._queue_delay += sum(delays)
+                self._max_queue_delay = max(self._max_queue_delay, max(delays))
+                self._predict_time += finished - start
+
+    def stats(self):
+        """Achieved batch sizes, queueing delay and time spent in batch_fn"""
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "batches": batches,
+                "rows": self._rows,
+                "mean_batch_size": self._rows / batches if batches else 0.0,
+                "max_batch_size": max(self._batch_sizes, default=0),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "mean_queue_delay_ms": self._queue_delay / self._rows * 1000 if self._rows else 0.0,
+                "max_queue_delay_ms": self._max_queue_delay * 1000,
+                "predict_ms_per_row": self._predict_time / self._rows * 1000 if self._rows else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._batch_sizes.clear()
+            self._rows = 0
+            self._queue_delay = 0.0
+            self._max_queue_delay = 0.0
+            self._predict_time = 0.0
+
+
+def label_batch_fn(get_model):
+    """batch_fn returning one label per row from a single predict_proba call"""
+    def predict_labels(X):
+        # Fetched per batch so a hot-reloaded model is picked up by the next batch
+        model = get_model()
+        proba = model.predict_proba(X)
+        return np.asarray(model.classes_).take(np.argmax(proba, axis=1))
+    return predict_labels
+
+
+def get_micro_batcher(name, batch_fn, **kwargs):
+    """Return the process-wide batcher called name, creating it on first use"""
+    with _batchers_lock:
+        batcher = _batchers.get(name)
+        if batcher is None:
+            batcher = MicroBatcher(batch_fn, name=name, **kwargs)
+            _batchers[name] = batcher
+        return batcher
+
+
+def benchmark(model_path, clients=32, requests=50, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+              max_batch=DEFAULT_MAX_BATCH):
+    """Concurrent single-row clients: one predict per click vs coalesced batches"""
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    model.set_params(n_jobs=1)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 10, size=(clients * requests, model.n_features_in_)).astype(np.float64)
+    batcher = MicroBatcher(label_batch_fn(lambda: model), max_wait_ms / 1000, max_batch, "benchmark")
+
+    def direct(i):
+        return model.predict(X[i:i + 1])[0]
+
+    def batched(i):
+        return batcher.predict(X[i])
+
+    print(f"🚀 {clients} concurrent clients x {requests} single-row predictions "
+          f"(max wait {max_wait_ms} ms, max batch {max_batch})")
+    results = {}
+    with ThreadPoolExecutor(clients) as pool:
+        for label, fn in (("per-click", direct), ("batched", batched)):
+            start = time.perf_counter()
+            results[label] = list(pool.map(fn, range(len(X))))
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<10} {elapsed:7.2f} s  {len(X) / elapsed:10,.0f} predictions/sec")
+
+    print(f"✅ Same labels: {results['per-click'] == results['batched']}")
+    stats = batcher.stats()
+    print(f"📊 {stats['batches']} batches, mean size {stats['mean_batch_size']:.1f}, "
+          f"max {stats['max_batch_size']}, queue delay mean {stats['mean_queue_delay_ms']:.2f} ms / "
+          f"max {stats['max_queue_delay_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched predictions")
+    parser.add_argument("model", nargs="?", default="weights.pkl")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="predictions per client")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args()
+    benchmark(args.model, args.clients, args.requests, args.max_wait_ms, args.max_batch)
+
+
+if __name__ == "__main__":
+    main()
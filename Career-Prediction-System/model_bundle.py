@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Memory-Mappable Model Bundles
+One directory per model: flattened tree arrays and scaler parameters as .npy blocks,
+plus a small JSON manifest for features, classes and vocabularies
+
+Example:
+    python model_bundle.py export mega_weights.pkl model_bundles/mega --scaler mega_scaler.pkl \\
+        --features mega_feature_names.pkl
+    python model_bundle.py benchmark mega_weights.pkl model_bundles/mega --processes 4
+"""
+
+import os
+import json
+import time
+import pickle
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+import multiprocessing as mp
+
+import numpy as np
+
+from forest_engine import FlatForest, sample_inputs
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+# Names the version directory a bundle path currently serves
+CURRENT_FILE = "CURRENT"
+# Older versions kept besides the current one, for processes that still map them
+KEEP_VERSIONS = 2
+
+FOREST_ARRAYS = ["feature", "threshold", "children", "missing_left",
+                 "value_offset", "leaf_values", "roots"]
+
+
+class ModelBundle:
+    """A loaded bundle: a FlatForest over (possibly memory-mapped) arrays plus metadata"""
+
+    def __init__(self, path, manifest, forest, scaler_mean=None, scaler_scale=None):
+        self.path = path
+        self.manifest = manifest
+        self.forest = forest
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+    @property
+    def n_features_in_(self):
+        return self.manifest["n_features"]
+
+    @property
+    def feature_names(self):
+        return self.manifest["feature_names"]
+
+    @property
+    def classes_(self):
+        return self.forest.classes_
+
+    @property
+    def vocabularies(self):
+        return self.manifest.get("vocabularies", {})
+
+    def transform(self, X):
+        """Apply the bundled StandardScaler, if any"""
+        X = np.asarray(X, dtype=np.float64)
+        if self.scaler_mean is None:
+            return X
+        return (X - self.scaler_mean) / self.scaler_scale
+
+    def predict_proba(self, X):
+        return self.forest.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.forest.predict(self.transform(X))
+
+
+def save_bundle(path, model, feature_names, scaler=None, vocabularies=None, extra=None):
+    """
+    Write a fitted forest (and optional StandardScaler) as a new version of the
+    bundle at path. Published .npy files are never rewritten, since other processes
+    may have them memory-mapped: each version gets its own directory, and the
+    CURRENT pointer is switched to it with os.replace once it is complete.
+    """
+    os.makedirs(path, exist_ok=True)
+    forest = FlatForest.from_sklearn(model)
+
+    arrays = {name: getattr(forest, name) for name in FOREST_ARRAYS}
+    if scaler is not None:
+        arrays["scaler_mean"] = np.asarray(scaler.mean_, dtype=np.float64)
+        arrays["scaler_scale"] = np.asarray(scaler.scale_, dtype=np.float64)
+
+    digest = hashlib.sha256()
+    files = {}
+    for name in arrays:
+        arrays[name] = np.ascontiguousarray(arrays[name])
+        digest.update(name.encode())
+        digest.update(arrays[name].tobytes())
+        files[name] = f"{name}.npy"
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "version": digest.hexdigest()[:16],
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "model_type": type(model).__name__,
+        "n_trees": forest.n_trees,
+        "max_depth": int(forest.max_depth),
+        "n_features": int(forest.n_features_in_),
+        "feature_names": list(feature_names),
+        "classes": [str(c) for c in forest.classes_],
+        "vocabularies": vocabularies or {},
+        "arrays": files,
+    }
+    if extra:
+        manifest.update(extra)
+
+    version_dir = f"v{manifest['version']}"
+    target = os.path.join(path, version_dir)
+    if not os.path.isdir(target):
+        # Same arrays, same version: an existing directory already holds them
+        tmp_dir = target + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, files[name]), array, allow_pickle=False)
+        write_json(os.path.join(tmp_dir, MANIFEST_FILE), manifest)
+        os.replace(tmp_dir, target)
+    else:
+        write_json(os.path.join(target, MANIFEST_FILE), manifest)
+
+    # The pointer goes last so a half-written version is never picked up
+    tmp_path = os.path.join(path, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version_dir + "\n")
+    os.replace(tmp_path, os.path.join(path, CURRENT_FILE))
+    prune_versions(path, version_dir)
+    return manifest
+
+
+def write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def prune_versions(path, current):
+    """
+    Delete all but the newest KEEP_VERSIONS old versions, and files of the old
+    single-directory layout. Unlinking leaves existing mappings valid on POSIX;
+    where a mapped file cannot be deleted (Windows) it is left for the next save.
+    """
+    old = [entry for entry in os.listdir(path)
+           if entry.startswith("v") and entry != current and not entry.endswith(".tmp")
+           and os.path.isdir(os.path.join(path, entry))]
+    old.sort(key=lambda entry: os.path.getmtime(os.path.join(path, entry)), reverse=True)
+    for entry in old[KEEP_VERSIONS:]:
+        shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+
+    for entry in os.listdir(path):
+        if entry == MANIFEST_FILE or entry.endswith(".npy"):
+            try:
+                os.remove(os.path.join(path, entry))
+            except OSError:
+                pass
+
+
+def current_version_dir(path):
+    """The directory holding the version of the bundle at path that is served now"""
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        # Bundles written before versioned directories keep everything in path
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            return path
+        raise
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format_version')} in {path}")
+    return manifest
+
+
+def load_bundle(path, mmap=True):
+    """Open the current version of a bundle; with mmap=True every process shares the same physical pages"""
+    path = current_version_dir(path)
+    manifest = read_manifest(path)
+    mode = "r" if mmap else None
+    arrays = {
+        name: np.load(os.path.join(path, filename), mmap_mode=mode, allow_pickle=False)
+        for name, filename in manifest["arrays"].items()
+    }
+
+    forest = FlatForest(
+        feature=arrays["feature"],
+        threshold=arrays["threshold"],
+        children=arrays["children"],
+        missing_left=arrays["missing_left"],
+        value_offset=arrays["value_offset"],
+        leaf_values=arrays["leaf_values"],
+        roots=np.asarray(arrays["roots"]),
+        classes=np.asarray(manifest["classes"], dtype=object),
+        n_features=manifest["n_features"],
+        max_depth=manifest["max_depth"],
+    )
+    return ModelBundle(path, manifest, forest,
+                       arrays.get("scaler_mean"), arrays.get("scaler_scale"))
+
+
+def export_from_pickles(model_path, bundle_path, features_path=None, scaler_path=None):
+    """Convert existing pickled artifacts into a bundle"""
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+
+    feature_names = getattr(model, "feature_names_in_", None)
+    if features_path:
+        with open(features_path, "rb") as f:
+            feature_names = pickle.load(f)
+    if feature_names is None:
+        feature_names = [f"x{i}" for i in range(model.n_features_in_)]
+
+    scaler = None
+    if scaler_path:
+        with open(scaler_path, "rb") as f:
+            scaler = pickle.load(f)
+
+    return save_bundle(bundle_path, model, feature_names, scaler=scaler)
+
+
+def memory_usage_kb():
+    """(RSS, PSS) of this process in kB; PSS splits shared pages between their users"""
+    usage = {}
+    for source in ("/proc/self/smaps_rollup", "/proc/self/status"):
+        try:
+            with open(source) as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in ("Rss", "Pss", "VmRSS"):
+                        usage.setdefault(key, int(value.split()[0]))
+        except OSError:
+            continue
+    return usage.get("Rss", usage.get("VmRSS", 0)), usage.get("Pss", 0)
+
+
+def _load_worker(kind, source, X, barrier, results):
+    """Load one model in a fresh process, predict, and report load time and memory"""
+    start = time.perf_counter()
+    if kind == "pickle":
+        with open(source, "rb") as f:
+            model = pickle.load(f)
+    else:
+        model = load_bundle(source)
+    load_ms = (time.perf_counter() - start) * 1000
+    model.predict_proba(X)
+    # Wait until every worker has loaded so shared pages are counted across all of them
+    barrier.wait()
+    rss, pss = memory_usage_kb()
+    results.put((load_ms, rss, pss))
+    barrier.wait()
+
+
+def benchmark(model_path, bundle_path, processes=4):
+    """Cold-load time and per-process memory: pickle vs memory-mapped bundle"""
+    bundle = load_bundle(bundle_path)
+    X = sample_inputs(bundle.forest, 1)
+    if bundle.scaler_mean is not None:
+        X = X * bundle.scaler_scale + bundle.scaler_mean
+
+    print(f"📦 {bundle_path}: version {bundle.version}, {bundle.forest.n_trees} trees, "
+          f"{len(bundle.classes_)} classes")
+    print(f"   pickle {os.path.getsize(model_path) / 1e6:.1f} MB on disk, bundle "
+          f"{sum(os.path.getsize(os.path.join(bundle.path, f)) for f in os.listdir(bundle.path)) / 1e6:.1f} MB")
+    print(f"\n{'loader':<8}{'load (ms)':>12}{'RSS/proc (MB)':>16}{'PSS/proc (MB)':>16}   ({processes} processes)")
+
+    ctx = mp.get_context("spawn")
+    for kind, source in (("pickle", model_path), ("bundle", bundle_path)):
+        barrier = ctx.Barrier(processes)
+        results = ctx.Queue()
+        workers = [ctx.Process(target=_load_worker, args=(kind, source, X, barrier, results))
+                   for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        stats = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        load_ms, rss, pss = (np.mean([s[i] for s in stats]) for i in range(3))
+        print(f"{kind:<8}{load_ms:>12.1f}{rss / 1024:>16.1f}{pss / 1024:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and benchmark model bundles")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="convert pickled artifacts into a bundle")
+    export.add_argument("model")
+    export.add_argument("bundle")
+    export.add_argument("--features", help="pickled feature name list")
+    export.add_argument("--scaler", help="pickled StandardScaler")
+
+    bench = sub.add_parser("benchmark", help="compare cold-load time and memory")
+    bench.add_argument("model")
+    bench.add_argument("bundle")
+    bench.add_argument("--processes", type=int, default=4)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        manifest = export_from_pickles(args.model, args.bundle, args.features, args.scaler)
+        print(f"✅ Wrote bundle {args.bundle} (version {manifest['version']})")
+    else:
+        benchmark(args.model, args.bundle, args.processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Model Registry
+Loads each model, scaler, vocabulary and career database once per process, on first use
+"""
+
+import os
+import sys
+import time
+import pickle
+import threading
+import warnings
+from types import SimpleNamespace
+
+import numpy as np
+
+from dataset_cache import read_dataset
+from feature_encoder import FeatureSchema, load_or_build_schema, model_feature_names, schema_path
+from model_bundle import CURRENT_FILE, current_version_dir, load_bundle, read_manifest
+from onnx_backend import OnnxModel
+from prediction_cache import artifact_version
+from cascade import CASCADE_FILE, load_forest_cascade
+
+TRAINING_DATA = "./data/mldata.csv"
+
+# Rating columns of the analytics heatmap, in the dataset's column order
+HEATMAP_COLUMNS = ["Logical quotient rating", "hackathons", "coding skills rating", "public speaking points"]
+
+# CAREER_MODEL_BACKEND=onnx makes get_fast_model() serve the onnxruntime sessions
+BACKEND_ENV = "CAREER_MODEL_BACKEND"
+
+# Registry name -> pickle written by the training scripts
+PICKLE_RESOURCES = {
+    "base_model": "weights.pkl",
+    "enhanced_model": "enhanced_weights.pkl",
+    "enhanced_features": "feature_names.pkl",
+    "enhanced_careers": "career_list.pkl",
+    "mega_model": "mega_weights.pkl",
+    "mega_student": "mega_student.pkl",
+    "mega_hierarchical": "mega_hierarchical.pkl",
+    "mega_scaler": "mega_scaler.pkl",
+    "mega_features": "mega_feature_names.pkl",
+    "mega_careers": "mega_career_list.pkl",
+    "mega_career_database": "mega_career_database.pkl",
+}
+
+BUNDLE_RESOURCES = {
+    "base_bundle": "model_bundles/base",
+    "enhanced_bundle": "model_bundles/enhanced",
+    "mega_bundle": "model_bundles/mega",
+    "mega_student_bundle": "model_bundles/mega_student",
+}
+
+# Feature lists pickled next to models that predate feature_names_in_
+FEATURE_LISTS = {"enhanced_model": "enhanced_features"}
+
+# Bundles that get_fast_model() serves in place of the pickled model; the mega bundle
+# includes its scaler, so it is not a drop-in for mega_model
+MODEL_BUNDLES = {
+    "base_model": "base_bundle",
+    "enhanced_model": "enhanced_bundle",
+}
+
+# Written by the training scripts when skl2onnx is installed; mega includes its scaler,
+# so it takes raw features where mega_model expects scaled ones
+ONNX_RESOURCES = {
+    "base_model_onnx": "model_onnx/base.onnx",
+    "enhanced_model_onnx": "model_onnx/enhanced.onnx",
+    "mega_onnx": "model_onnx/mega.onnx",
+}
+
+
+class Resource:
+    """A named artifact, the files it is built from, and its load state"""
+
+    def __init__(self, name, loader, paths=(), warmup=None):
+        self.name = name
+        self.loader = loader
+        self.paths = list(paths)
+        self.warmup = warmup
+        self.lock = threading.Lock()
+        self.value = None
+        self.loaded = False
+        self.load_seconds = None
+        self.version = None
+        self.pending_version = None
+        self.failed_version = None
+        # (files version, error) of a load that found something missing
+        self.missing = None
+        self.reloads = 0
+        self.reload_failures = 0
+
+
+class ModelRegistry:
+    """
+    Thread-safe lazy registry; a resource is loaded by the first caller that needs it.
+
+    Once start_watching() is called, a background thread reloads any loaded resource
+    whose files change. The new value is warmed up before it replaces the old one,
+    so callers holding the old reference finish on it; a failed reload keeps it.
+    """
+
+    def __init__(self):
+        self._resources = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def register(self, name, loader, paths=(), warmup=None):
+        """Declare a resource; nothing is loaded until get(name) is called"""
+        with self._lock:
+            self._resources[name] = Resource(name, loader, paths, warmup)
+
+    def register_pickle(self, name, path, warmup=None):
+        self.register(name, pickle_loader(path), paths=[path], warmup=warmup)
+
+    def resource(self, name):
+        try:
+            return self._resources[name]
+        except KeyError:
+            raise KeyError(f"Unknown resource '{name}'") from None
+
+    def get(self, name):
+        """
+        Return the resource, loading it once. Load errors propagate and are retried
+        next time, except that a load missing a file or key (e.g. a cascade that was
+        never calibrated) fails fast until the resource's files change.
+        """
+        resource = self.resource(name)
+        if resource.loaded:
+            return resource.value
+
+        with resource.lock:
+            if not resource.loaded:
+                # Fingerprint first, so a rewrite during the load is still picked up
+                version = files_version(resource.paths)
+                if resource.missing is not None and resource.missing[0] == version:
+                    raise resource.missing[1].with_traceback(None)
+                start = time.perf_counter()
+                try:
+                    resource.value = resource.loader()
+                except (FileNotFoundError, KeyError) as e:
+                    resource.missing = (version, e)
+                    raise
+                resource.missing = None
+                # Inclusive of any resources the loader pulled in first
+                resource.load_seconds = time.perf_counter() - start
+                resource.version = version
+                resource.loaded = True
+                print(f"⏱️ Loaded {name} in {resource.load_seconds * 1000:.1f} ms", file=sys.stderr)
+        return resource.value
+
+    def get_pickle(self, path):
+        """Return an unpickled file, registering it under its path on first use"""
+        with self._lock:
+            if path not in self._resources:
+                self._resources[path] = Resource(path, pickle_loader(path), [path], warm_up_model)
+        return self.get(path)
+
+    def is_loaded(self, name):
+        return name in self._resources and self._resources[name].loaded
+
+    def reload(self, name):
+        """Load a fresh copy in the calling thread, warm it up and swap it in"""
+        resource = self.resource(name)
+        version = files_version(resource.paths)
+        try:
+            start = time.perf_counter()
+            value = resource.loader()
+            if resource.warmup is not None:
+                resource.warmup(value)
+            seconds = time.perf_counter() - start
+        except Exception as e:
+            resource.failed_version = version
+            resource.reload_failures += 1
+            print(f"❌ Reloading {name} failed, keeping the current version: {e}", file=sys.stderr)
+            return False
+
+        with resource.lock:
+            # A single reference assignment: readers see either the old or the new value
+            resource.value = value
+            resource.version = version
+            resource.load_seconds = seconds
+            resource.reloads += 1
+        print(f"🔄 Reloaded {name} in {seconds * 1000:.1f} ms", file=sys.stderr)
+        return True
+
+    def check_for_updates(self):
+        """Reload every loaded resource whose files changed and have since stopped changing"""
+        with self._lock:
+            resources = list(self._resources.values())
+        # Registration order puts models before the encoders built from them
+        for resource in resources:
+            if not resource.loaded:
+                continue
+            version = files_version(resource.paths)
+            if version == resource.version or version == resource.failed_version:
+                resource.pending_version = None
+                continue
+            # Wait one more poll so a file still being written is not read half-way
+            if version != resource.pending_version:
+                resource.pending_version = version
+                continue
+            resource.pending_version = None
+            self.reload(resource.name)
+
+    def start_watching(self, interval=2.0):
+        """Poll artifact files from a daemon thread; safe to call on every app rerun"""
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._stop.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, args=(interval,), name="model-registry-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.check_for_updates()
+            except Exception as e:
+                print(f"⚠️ Model watcher error: {e}", file=sys.stderr)
+
+    def load_timings(self):
+        """Seconds spent loading each resource that has been loaded so far"""
+        with self._lock:
+            resources = list(self._resources.values())
+        return {r.name: r.load_seconds for r in resources if r.loaded}
+
+    def print_load_report(self):
+        with self._lock:
+            resources = [r for r in self._resources.values() if r.loaded]
+        print(f"\n📊 Registry: {len(resources)} of {len(self._resources)} resources loaded")
+        for r in sorted(resources, key=lambda r: -r.load_seconds):
+            print(f"  {r.name:<28} {r.load_seconds * 1000:10.1f} ms  "
+                  f"reloads {r.reloads}, failed {r.reload_failures}")
+
+
+def files_version(paths):
+    """Fingerprint of a resource's files; changes whenever any of them is rewritten"""
+    return "|".join(artifact_version(path) for path in paths)
+
+
+def warm_up_model(model):
+    """Run a dummy prediction so first-request costs are paid before the swap"""
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is None or not hasattr(model, "predict"):
+        return
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model.predict(np.zeros((2, n_features)))
+
+
+def pickle_loader(path):
+    def load():
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return load
+
+
+def load_training_data(path=TRAINING_DATA):
+    """The dataset the category vocabularies are learned from"""
+    df = read_dataset(path)
+    df["workshops"] = df["workshops"].replace(["testing"], "Testing")
+    return df
+
+
+def load_rating_correlations(path=TRAINING_DATA):
+    """Correlations between the numeric ratings, for the analytics heatmap; reads only those columns"""
+    return read_dataset(path, HEATMAP_COLUMNS).corr()
+
+
+def load_schema(registry, model_name, legacy_features):
+    """
+    The FeatureSchema saved with a model, validated against it. Artifacts trained
+    before schemas were saved get one rebuilt from the training CSV once, and
+    saved so later starts skip the CSV.
+    """
+    # Checked against the bundle when there is one, so serving never unpickles the forest
+    try:
+        model = registry.get(MODEL_BUNDLES[model_name])
+    except (KeyError, FileNotFoundError):
+        model = registry.get(model_name)
+    return load_or_build_schema(PICKLE_RESOURCES[model_name], model,
+                                lambda: registry.get("training_data"), legacy_features)
+
+
+def check_saved_schema(model_name):
+    """
+    Startup check that unpickles no model: the saved schema parses, has every
+    vocabulary, and agrees with the bundle manifest (or the pickled feature list)
+    on features and classes. False if the model file is missing. The full check
+    against the model runs when the registry first loads it.
+    """
+    path = PICKLE_RESOURCES[model_name]
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(schema_path(path)):
+        # Rebuilt from the training data when the model is first used
+        return True
+
+    schema = FeatureSchema.load(schema_path(path))
+    facts = {"classes_": schema.classes or []}
+    try:
+        manifest = read_manifest(current_version_dir(BUNDLE_RESOURCES[MODEL_BUNDLES[model_name]]))
+        facts.update(n_features_in_=manifest["n_features"], feature_names_in_=manifest["feature_names"],
+                     classes_=manifest["classes"])
+    except (KeyError, FileNotFoundError):
+        if model_name in FEATURE_LISTS:
+            facts["feature_names_in_"] = registry.get(FEATURE_LISTS[model_name])
+    schema.validate(SimpleNamespace(**facts))
+    return True
+
+
+def create_default_registry():
+    registry = ModelRegistry()
+    for name, path in PICKLE_RESOURCES.items():
+        registry.register_pickle(name, path, warmup=warm_up_model)
+    for name, path in BUNDLE_RESOURCES.items():
+        # save_bundle() switches the pointer last, so it marks a complete new version
+        registry.register(name, lambda path=path: load_bundle(path),
+                          paths=[os.path.join(path, CURRENT_FILE)], warmup=warm_up_model)
+
+    for name, path in ONNX_RESOURCES.items():
+        registry.register(name, lambda path=path: OnnxModel(path), paths=[path], warmup=warm_up_model)
+
+    registry.register("training_data", load_training_data, paths=[TRAINING_DATA])
+    registry.register("rating_correlations", load_rating_correlations, paths=[TRAINING_DATA])
+    # Where each model's feature order comes from when it has no saved schema
+    legacy_features = {
+        "base_model": (lambda: model_feature_names(registry.get("base_model")), []),
+        "enhanced_model": (lambda: registry.get("enhanced_features"), [PICKLE_RESOURCES["enhanced_features"]]),
+    }
+    for name, prefix in (("base_model", "base"), ("enhanced_model", "enhanced")):
+        path = PICKLE_RESOURCES[name]
+        bundle = os.path.join(BUNDLE_RESOURCES[MODEL_BUNDLES[name]], CURRENT_FILE)
+        paths = [path, schema_path(path), bundle] + legacy_features[name][1]
+        # A model/schema mismatch raises SchemaMismatchError here, on the first load
+        registry.register(
+            f"{prefix}_schema",
+            lambda name=name: load_schema(registry, name, legacy_features[name][0]),
+            paths=paths,
+        )
+        registry.register(
+            f"{prefix}_encoder",
+            lambda prefix=prefix: registry.get(f"{prefix}_schema").encoder(),
+            paths=paths,
+        )
+    # Calibrated forest-prefix cascades; loading fails until cascade.py has been run
+    for name in ("base_model", "enhanced_model"):
+        path = PICKLE_RESOURCES[name]
+        bundle = os.path.join(BUNDLE_RESOURCES[MODEL_BUNDLES[name]], CURRENT_FILE)
+        registry.register(
+            f"{name}_cascade",
+            lambda name=name, path=path: load_forest_cascade(lambda: cascade_forest(registry, name), path),
+            paths=[path, CASCADE_FILE, bundle],
+        )
+    return registry
+
+
+def cascade_forest(registry, model_name):
+    """
+    The forest a cascade runs on: the bundle's memory-mapped FlatForest, shared by
+    every worker process, or the pickled model when there is no bundle
+    """
+    try:
+        return registry.get(MODEL_BUNDLES[model_name]).forest
+    except FileNotFoundError:
+        return registry.get(model_name)
+
+
+# One registry per process, shared by every page and Streamlit session
+registry = create_default_registry()
+
+
+def get_resource(name):
+    return registry.get(name)
+
+
+def get_pickle(path):
+    return registry.get_pickle(path)
+
+
+def fast_model_name(name):
+    """
+    Registry name of what get_fast_model(name) serves: the onnxruntime session when
+    the ONNX backend is selected, else the calibrated cascade if there is one, else
+    the memory-mapped bundle, else the pickled model
+    """
+    candidates = []
+    if os.environ.get(BACKEND_ENV) == "onnx":
+        candidates.append(f"{name}_onnx")
+    candidates.append(f"{name}_cascade")
+    if name in MODEL_BUNDLES:
+        # Every worker process shares the bundle's pages instead of unpickling its own copy
+        candidates.append(MODEL_BUNDLES[name])
+    for candidate in candidates:
+        try:
+            registry.get(candidate)
+            return candidate
+        except (FileNotFoundError, KeyError, ImportError):
+            continue
+    return name
+
+
+def get_fast_model(name):
+    """The fastest available backend for a model, see fast_model_name()"""
+    return registry.get(fast_model_name(name))
+
+
+def fast_model_version(name):
+    """Which backend get_fast_model(name) serves and the files it was loaded from, for cache keys"""
+    served = fast_model_name(name)
+    registry.get(served)
+    return f"{served}:{registry.resource(served).version}"
+
+
+def start_watching(interval=2.0):
+    registry.start_watching(interval)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+ONNX Export and Inference Backend
+Writes a trained scaler + classifier pipeline to ONNX and serves it through onnxruntime on CPU
+
+Example:
+    python onnx_backend.py export mega_weights.pkl model_onnx/mega.onnx --scaler mega_scaler.pkl
+    python onnx_backend.py check mega_weights.pkl model_onnx/mega.onnx --scaler mega_scaler.pkl
+    python onnx_backend.py benchmark weights.pkl model_onnx/base.onnx --threads 1 4
+"""
+
+import os
+import json
+import time
+import pickle
+import argparse
+import warnings
+import multiprocessing as mp
+
+import numpy as np
+
+# onnxruntime intra-op threads per session; 0 lets onnxruntime pick one per core
+THREADS_ENV = "CAREER_ONNX_THREADS"
+DEFAULT_THREADS = 1
+
+# Largest tolerated |onnx - sklearn| probability difference in check_parity()
+PARITY_TOLERANCE = 1e-5
+
+ONNX_DIR = "model_onnx"
+
+
+def export_onnx(path, model, feature_names, scaler=None):
+    """Write model (behind scaler, if given) to path as ONNX with a plain probability output"""
+    try:
+        from skl2onnx import to_onnx
+        from sklearn.pipeline import make_pipeline
+    except ImportError:
+        raise ImportError("ONNX export needs skl2onnx: pip install skl2onnx")
+
+    pipeline = make_pipeline(scaler, model) if scaler is not None else model
+    sample = np.zeros((1, len(feature_names)), dtype=np.float32)
+    # zipmap off: probabilities come back as one float tensor instead of a list of dicts
+    onx = to_onnx(pipeline, sample, options={id(model): {"zipmap": False}},
+                  target_opset={"": 17, "ai.onnx.ml": 3})
+
+    metadata = {
+        "classes": json.dumps([str(c) for c in model.classes_]),
+        "feature_names": json.dumps([str(name) for name in feature_names]),
+        "model_type": type(model).__name__,
+        "scaled": str(scaler is not None),
+    }
+    for key, value in metadata.items():
+        entry = onx.metadata_props.add()
+        entry.key, entry.value = key, value
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(onx.SerializeToString())
+    os.replace(tmp_path, path)
+    return path
+
+
+class OnnxModel:
+    """
+    onnxruntime session with the sklearn classifier surface the apps use
+    (classes_, n_features_in_, predict_proba, predict).
+
+    Inputs are raw (unscaled) features; a scaler exported with the model runs
+    inside the graph.
+    """
+
+    def __init__(self, path, intra_op_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The ONNX backend needs onnxruntime: pip install onnxruntime")
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        if intra_op_threads is None:
+            intra_op_threads = int(os.environ.get(THREADS_ENV, DEFAULT_THREADS))
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.path = path
+        self.intra_op_threads = intra_op_threads
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.classes_ = np.asarray(json.loads(metadata["classes"]), dtype=object)
+        self.feature_names = json.loads(metadata["feature_names"])
+        self.n_features_in_ = len(self.feature_names)
+        self._input = self.session.get_inputs()[0].name
+        self._proba = self.session.get_outputs()[1].name
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        return self.session.run([self._proba], {self._input: X})[0].astype(np.float64)
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def export_trained(name, model, feature_names, scaler=None):
+    """
+    Training-script hook: write model_onnx/<name>.onnx, or explain why not. A failed
+    conversion (e.g. out of memory on a very large forest) only skips the export,
+    so it never aborts a run whose other artifacts are still to be written.
+    """
+    path = os.path.join(ONNX_DIR, f"{name}.onnx")
+    try:
+        export_onnx(path, model, feature_names, scaler)
+    except ImportError as e:
+        print(f"⚠️ Skipping ONNX export: {e}")
+        return None
+    except Exception as e:
+        print(f"⚠️ ONNX export of {name} failed, continuing without it: {type(e).__name__}: {e}")
+        return None
+    return path
+
+
+def load_pickles(model_path, scaler_path=None):
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    scaler = None
+    if scaler_path:
+        with open(scaler_path, "rb") as f:
+            scaler = pickle.load(f)
+    return model, scaler
+
+
+def sklearn_proba(model, scaler, X):
+    return model.predict_proba(scaler.transform(X) if scaler is not None else X)
+
+
+def parity_inputs(model, n_rows, scaler=None, seed=0):
+    """Integer form answers, plus rows spread around the scaler's means"""
+    rng = np.random.default_rng(seed)
+    n_features = model.n_features_in_
+    X = rng.integers(0, 10, size=(n_rows, n_features)).astype(np.float64)
+    if scaler is not None:
+        X = np.vstack([X, rng.normal(scaler.mean_, scaler.scale_, size=(n_rows, n_features))])
+    return X
+
+
+def check_parity(model_path, onnx_path, scaler_path=None, n_rows=5000):
+    """Compare onnxruntime and sklearn probabilities; returns True when within tolerance"""
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    model, scaler = load_pickles(model_path, scaler_path)
+    onnx_model = OnnxModel(onnx_path)
+    X = parity_inputs(model, n_rows, scaler)
+
+    expected = sklearn_proba(model, scaler, X)
+    actual = onnx_model.predict_proba(X)
+    max_diff = float(np.abs(expected - actual).max())
+    agreement = float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1)))
+    same_classes = [str(c) for c in model.classes_] == list(onnx_model.classes_)
+
+    ok = same_classes and max_diff <= PARITY_TOLERANCE
+    print(f"🔍 {len(X):,} rows: max |onnx - sklearn| = {max_diff:.2e}, "
+          f"top-1 agreement {agreement:.2%}, classes {'match' if same_classes else 'DIFFER'}")
+    print("✅ Parity within tolerance" if ok else f"❌ Parity check failed (tolerance {PARITY_TOLERANCE})")
+    return ok
+
+
+def _backend_worker(kind, model_path, onnx_path, scaler_path, threads, X, results):
+    """Load one backend in a fresh process and report its latency and memory"""
+    from model_bundle import memory_usage_kb
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    before = memory_usage_kb()
+    start = time.perf_counter()
+    if kind == "sklearn":
+        model, scaler = load_pickles(model_path, scaler_path)
+        model.set_params(n_jobs=1)
+        predict = lambda rows: sklearn_proba(model, scaler, rows)
+    else:
+        predict = OnnxModel(onnx_path, threads).predict_proba
+    load_ms = (time.perf_counter() - start) * 1000
+
+    predict(X[:1])
+    single = []
+    for row in X[:200]:
+        start = time.perf_counter()
+        predict(row[np.newaxis, :])
+        single.append((time.perf_counter() - start) * 1000)
+    batch = []
+    for _ in range(5):
+        start = time.perf_counter()
+        predict(X)
+        batch.append((time.perf_counter() - start) * 1000)
+
+    after = memory_usage_kb()
+    results.put((load_ms, np.percentile(single, 50), np.percentile(single, 99), np.median(batch),
+                 (after[0] - before[0]) / 1024))
+
+
+def benchmark(model_path, onnx_path, scaler_path=None, threads=(1,), n_rows=1000):
+    """Load time, single-row p50/p99, batch latency and memory: sklearn vs onnxruntime"""
+    model, scaler = load_pickles(model_path, scaler_path)
+    X = parity_inputs(model, n_rows, scaler)[:n_rows]
+    del model, scaler
+
+    print(f"🚀 {model_path} vs {onnx_path} ({os.path.getsize(onnx_path) / 1e6:.1f} MB), "
+          f"{n_rows:,}-row batches, one fresh process per backend")
+    print(f"\n{'backend':<16}{'load (ms)':>11}{'1 row p50':>11}{'1 row p99':>11}"
+          f"{f'{n_rows:,} rows':>12}{'RSS (MB)':>10}")
+    ctx = mp.get_context("spawn")
+    runs = [("sklearn", None)] + [("onnx", t) for t in threads]
+    for kind, n_threads in runs:
+        results = ctx.Queue()
+        worker = ctx.Process(target=_backend_worker,
+                             args=(kind, model_path, onnx_path, scaler_path, n_threads, X, results))
+        worker.start()
+        worker.join()
+        if worker.exitcode != 0:
+            raise RuntimeError(f"{kind} benchmark process failed with exit code {worker.exitcode}")
+        load_ms, p50, p99, batch_ms, rss_mb = results.get()
+        label = kind if n_threads is None else f"onnx {n_threads} thread(s)"
+        print(f"{label:<16}{load_ms:>11.1f}{p50:>11.3f}{p99:>11.3f}{batch_ms:>12.2f}{rss_mb:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export models to ONNX and benchmark onnxruntime")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (("export", "write a pickled model (and scaler) as ONNX"),
+                               ("check", "compare ONNX and sklearn probabilities"),
+                               ("benchmark", "compare latency and memory against sklearn")):
+        cmd = sub.add_parser(command, help=help_text)
+        cmd.add_argument("model", help="pickled classifier")
+        cmd.add_argument("onnx", help="ONNX file")
+        cmd.add_argument("--scaler", help="pickled StandardScaler in front of the classifier")
+        if command == "export":
+            cmd.add_argument("--features", help="pickled feature name list")
+        elif command == "check":
+            cmd.add_argument("--rows", type=int, default=5000)
+        else:
+            cmd.add_argument("--rows", type=int, default=1000)
+            cmd.add_argument("--threads", type=int, nargs="+", default=[1],
+                             help="onnxruntime intra-op thread counts to compare")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        model, scaler = load_pickles(args.model, args.scaler)
+        feature_names = getattr(model, "feature_names_in_", None)
+        if args.features:
+            with open(args.features, "rb") as f:
+                feature_names = pickle.load(f)
+        if feature_names is None:
+            feature_names = [f"x{i}" for i in range(model.n_features_in_)]
+        export_onnx(args.onnx, model, feature_names, scaler)
+        print(f"✅ Wrote {args.onnx} ({os.path.getsize(args.onnx) / 1e6:.1f} MB)")
+    elif args.command == "check":
+        raise SystemExit(0 if check_parity(args.model, args.onnx, args.scaler, args.rows) else 1)
+    else:
+        benchmark(args.model, args.onnx, args.scaler, args.threads, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Parallel Model Fitting
+Fits several estimators at once in worker processes that read one training matrix
+from shared memory, each limited to its share of the machine's cores
+
+Example:
+    from parallel_fit import fit_parallel, fit_sequential
+    fitted = fit_parallel({"Decision Tree": tree.DecisionTreeClassifier(), ...}, x_train, y_train)
+"""
+
+import os
+import time
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.preprocessing import LabelEncoder
+from threadpoolctl import threadpool_limits
+
+# Constructor parameters that set an estimator's thread count, by library:
+# sklearn and XGBoost's sklearn API use n_jobs, XGBoost's native name is nthread
+THREAD_PARAMS = ("n_jobs", "nthread")
+
+
+class LabelEncodedClassifier(BaseEstimator, ClassifierMixin):
+    """
+    Classifier for string labels around one that needs 0..n-1 (XGBoost).
+
+    classes_ are the original labels, so it votes in the ensemble and answers
+    predict() with career names like the sklearn members.
+    """
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+
+    def fit(self, X, y):
+        self.encoder_ = LabelEncoder().fit(y)
+        self.estimator.fit(X, self.encoder_.transform(y))
+        return self
+
+    @property
+    def classes_(self):
+        return self.encoder_.classes_
+
+    @property
+    def n_features_in_(self):
+        return self.estimator.n_features_in_
+
+    @property
+    def feature_names_in_(self):
+        return self.estimator.feature_names_in_
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(X)
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def thread_params(estimator):
+    """Thread parameters of estimator, including ones of wrapped estimators (estimator__n_jobs)"""
+    return [name for name in estimator.get_params() if name.rsplit("__", 1)[-1] in THREAD_PARAMS]
+
+
+def set_threads(estimator, n_threads):
+    return estimator.set_params(**{name: n_threads for name in thread_params(estimator)})
+
+
+def thread_plan(estimators, cpus=None):
+    """
+    Threads per estimator, adding up to no more than cpus: one for each, and the
+    cores left over split between the estimators that can use more than one.
+    """
+    cpus = cpus or os.cpu_count()
+    plan = {name: 1 for name in estimators}
+    threaded = [name for name, estimator in estimators.items() if thread_params(estimator)]
+    spare = max(cpus - len(estimators), 0)
+    for i, name in enumerate(threaded):
+        plan[name] += spare // len(threaded) + (1 if i < spare % len(threaded) else 0)
+    return plan
+
+
+def share_array(array):
+    """Copy array into a new shared memory block; returns (block, spec for attach_array)"""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def attach_array(spec):
+    """(block, array) viewing a block made by share_array, without copying it"""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype, buffer=block.buf)
+
+
+def _fit_shared(name, estimator, spec, columns, y, n_threads):
+    """Worker: fit estimator on the shared matrix with n_threads threads"""
+    block, X = attach_array(spec)
+    try:
+        if columns is not None:
+            X = pd.DataFrame(X, columns=columns, copy=False)
+        set_threads(estimator, n_threads)
+        # Also caps OpenMP / BLAS pools the estimator does not expose a parameter for
+        with threadpool_limits(limits=n_threads):
+            start = time.perf_counter()
+            estimator.fit(X, y)
+            seconds = time.perf_counter() - start
+        del X
+        return name, estimator, seconds
+    finally:
+        block.close()
+
+
+def fit_parallel(estimators, X, y, cpus=None):
+    """
+    Fit unfitted clones of estimators ({name: estimator}) side by side.
+
+    X is copied once into shared memory that every worker maps; with fewer
+    cores than estimators, at most one worker per core runs and each fit uses
+    one thread. Returns ({name: fitted}, {name: fit seconds}, {name: threads},
+    wall seconds).
+    """
+    cpus = cpus or os.cpu_count()
+    plan = thread_plan(estimators, cpus)
+    columns = list(X.columns) if isinstance(X, pd.DataFrame) else None
+    y = np.asarray(y)
+
+    start = time.perf_counter()
+    block, spec = share_array(np.asarray(X, dtype=np.float64))
+    try:
+        # The multi-threaded fits are usually the long ones, so they start first
+        order = sorted(estimators, key=lambda name: -plan[name])
+        with ProcessPoolExecutor(min(len(estimators), cpus)) as pool:
+            futures = [pool.submit(_fit_shared, name, clone(estimators[name]), spec, columns, y, plan[name])
+                       for name in order]
+            results = [future.result() for future in futures]
+    finally:
+        block.close()
+        block.unlink()
+    wall = time.perf_counter() - start
+
+    fitted = {name: model for name, model, _ in results}
+    seconds = {name: s for name, _, s in results}
+    return {name: fitted[name] for name in estimators}, seconds, plan, wall
+
+
+def fit_sequential(estimators, X, y, n_threads=None):
+    """
+    The baseline: fit unfitted clones one after another in this process, each
+    with n_threads threads (None leaves them as configured)
+    """
+    fitted, seconds = {}, {}
+    start = time.perf_counter()
+    for name, estimator in estimators.items():
+        estimator = clone(estimator)
+        if n_threads is not None:
+            set_threads(estimator, n_threads)
+        with threadpool_limits(limits=n_threads):
+            model_start = time.perf_counter()
+            fitted[name] = estimator.fit(X, y)
+            seconds[name] = time.perf_counter() - model_start
+    return fitted, seconds, time.perf_counter() - start
@@ -0,0 +1,185 @@
+"""
+Prediction Result Cache
+Bounded LRU/TTL cache keyed on the encoded feature vector and the model version
+"""
+
+import os
+import time
+import atexit
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# One cache per model file, shared by every Streamlit session in the process
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def artifact_version(path):
+    """Fingerprint of a model file; changes whenever the file is rewritten"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with per-entry expiry and optional on-disk persistence"""
+
+    def __init__(self, model_path, max_entries=10000, ttl=24 * 3600,
+                 persist_path=None, check_interval=1.0, version_fn=None):
+        self.model_path = model_path
+        # What the served model's version is read from: by default model_path's
+        # fingerprint, or e.g. the registry version of the backend actually serving
+        self.version_fn = version_fn or (lambda: artifact_version(model_path))
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Read on the first lookup, so creating the cache never loads a model
+        self._version = None
+        self._last_check = float("-inf")
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        if persist_path:
+            atexit.register(self.save)
+
+    def key(self, features, version=None):
+        """Hash of the canonical float64 feature vector plus the model version"""
+        canonical = np.ascontiguousarray(features, dtype=np.float64)
+        digest = hashlib.blake2b(canonical.tobytes(), digest_size=16)
+        digest.update((version or self._version).encode())
+        return digest.hexdigest()
+
+    def current_version(self):
+        """
+        The served model's version, re-read at most every check_interval; every entry
+        is dropped once it changes. version_fn() may load the model on the first
+        call, so it runs outside the lock and sessions keep using the cache meanwhile.
+        """
+        now = time.monotonic()
+        if self._version is not None and now - self._last_check < self.check_interval:
+            return self._version
+        version = self.version_fn()
+        with self._lock:
+            if self._version is None:
+                self._version = version
+                if self.persist_path:
+                    self._restore()
+            elif now >= self._last_check and version != self._version:
+                self._version = version
+                self._entries.clear()
+                self.invalidations += 1
+            self._last_check = max(self._last_check, now)
+            return self._version
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _store(self, key, version, value):
+        with self._lock:
+            if version != self._version:
+                # Computed before a reload finished invalidating: never serve it under the new model
+                return
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, features):
+        """Return the cached prediction for features, or None"""
+        return self._lookup(self.key(features, self.current_version()))
+
+    def put(self, features, value):
+        version = self.current_version()
+        self._store(self.key(features, version), version, value)
+
+    def get_or_compute(self, features, compute):
+        """Return the cached prediction, calling compute() and storing it on a miss"""
+        # One version for the lookup and the store, so a miss that straddles a hot
+        # reload is dropped instead of being cached under the new model's key
+        version = self.current_version()
+        key = self.key(features, version)
+        value = self._lookup(key)
+        if value is None:
+            value = compute()
+            self._store(key, version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def save(self):
+        """Write unexpired entries for the current model version to persist_path"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            if self._version is None:
+                # Never used, so whatever was persisted is still current
+                return
+            now = time.time()
+            entries = [(k, v) for k, v in self._entries.items() if v[1] >= now]
+            state = {"version": self._version, "entries": entries}
+        tmp_path = self.persist_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f)
+        os.replace(tmp_path, self.persist_path)
+
+    def _restore(self):
+        """Restore entries saved for the same model version; anything else is discarded"""
+        try:
+            with open(self.persist_path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return
+        if state.get("version") != self._version:
+            return
+        now = time.time()
+        for key, entry in state["entries"][-self.max_entries:]:
+            if entry[1] >= now:
+                self._entries[key] = entry
+
+
+def get_prediction_cache(model_path, **kwargs):
+    """Return the process-wide cache for model_path, creating it on first use"""
+    with _caches_lock:
+        cache = _caches.get(model_path)
+        if cache is None:
+            cache = PredictionCache(model_path, **kwargs)
+            _caches[model_path] = cache
+        return cache
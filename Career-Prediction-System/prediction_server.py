@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Warm Prediction Server
+Loads the four career models once and answers predictions over localhost HTTP or a Unix socket
+"""
+
+import os
+import json
+import time
+import socket
+import argparse
+import threading
+import http.client
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+MODEL_FILES = ["model1.pkl", "model2.pkl", "model3.pkl", "model4.pkl"]
+MODEL_NAMES = ["Decision Tree", "SVM", "Random Forest", "XGBoost"]
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Clients pick the daemon up from these, so existing callers need no changes
+SOCKET_ENV = "CAREER_PREDICT_SOCKET"
+URL_ENV = "CAREER_PREDICT_URL"
+CASCADE_ENV = "CAREER_PREDICT_CASCADE"
+
+# Shared by predict_rows() calls made without an ensemble, e.g. predict.py's fallback
+_ensemble = None
+_ensemble_lock = threading.Lock()
+
+
+def load_models(model_dir="."):
+    """Return model1.pkl - model4.pkl from model_dir, unpickled once per process"""
+    # Imported here so thin clients of request_predictions() never pay for pandas
+    from model_registry import get_pickle
+
+    return [get_pickle(os.path.join(model_dir, filename)) for filename in MODEL_FILES]
+
+
+def default_ensemble(models):
+    """The process-wide ensemble for callers that do not bring their own, switched to models"""
+    global _ensemble
+    with _ensemble_lock:
+        if _ensemble is None:
+            from ensemble import CareerEnsemble
+
+            _ensemble = CareerEnsemble(models)
+    _ensemble.set_models(models)
+    return _ensemble
+
+
+def predict_rows(models, rows, ensemble=None, latency_budget_ms=None, top_k=5, cascade=False):
+    """Score a batch with the four-model ensemble, keeping predict.py's per-model output"""
+    from cascade import load_model_cascade
+
+    X = np.asarray(rows, dtype=float)
+    if X.ndim == 1:
+        X = X[None, :]
+    if ensemble is None:
+        # Built once: flattening the trees and starting the pool is not per-call work
+        ensemble = default_ensemble(models)
+    else:
+        ensemble.set_models(models)
+
+    model_cascade = load_model_cascade(ensemble) if cascade else None
+    if model_cascade is None:
+        # Also when cascade.py has not calibrated the models yet: every row gets the full vote
+        return vote_rows(models, X, ensemble.vote(X, latency_budget_ms), top_k)
+
+    # Rows the decision tree is sure about never reach the other three models
+    kept, cheap, escalated, full = model_cascade.vote(X)
+    results = [None] * X.shape[0]
+    for index, vote in ((kept, cheap), (escalated, full)):
+        if len(index):
+            for row, result in zip(index, vote_rows(models, X[index], vote, top_k)):
+                results[row] = dict(result, escalated=vote is full)
+    return results
+
+
+def vote_rows(models, X, vote, top_k=5):
+    """One result dict per row: per-model labels and scores plus the ensemble ranking"""
+    labels = []
+    scores = []
+    for index, name in enumerate(MODEL_NAMES):
+        member = vote.members.get(name)
+        if member is None:
+            # Skipped in fast or cascade mode
+            labels.append([None] * X.shape[0])
+            scores.append([None] * X.shape[0])
+            continue
+        # The SVM was trained without probability=True, so predict.py reported its margins
+        # and its own (one-vs-one) label
+        member_labels = models[index].predict(X) if name == "SVM" else member.labels
+        labels.append(np.asarray(member_labels).tolist())
+        scores.append(np.max(member.raw.reshape(X.shape[0], -1), axis=1).tolist())
+
+    ranking = vote.ranking(top_k)
+    return [
+        {
+            "labels": [labels[m][row] for m in range(len(MODEL_NAMES))],
+            "scores": [scores[m][row] for m in range(len(MODEL_NAMES))],
+            "ranking": [[career, probability] for career, probability in ranking[row]],
+            "latency_ms": vote.latency_ms,
+            "skipped": vote.skipped,
+        }
+        for row in range(X.shape[0])
+    ]
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """JSON endpoint: POST /predict with {"rows": [[...21 values...], ...]}
+
+    Optional keys: "latency_budget_ms" (fast mode) and "cascade": true.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok", "models": MODEL_NAMES})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            rows = payload["rows"] if "rows" in payload else [payload["row"]]
+            predictions = predict_rows(self.server.current_models(), rows, self.server.ensemble,
+                                       payload.get("latency_budget_ms"), cascade=payload.get("cascade", False))
+        except (KeyError, ValueError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        self.send_json(200, {"predictions": predictions})
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Per-request logging costs more than the prediction itself
+        pass
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that talks to a Unix domain socket instead of TCP"""
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def create_server(models, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, model_dir=None):
+    """Bind the prediction server to a TCP port or, if given, a Unix socket"""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, PredictionHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.models = models
+    server.ensemble = None
+    # With model_dir each request takes the registry's current models, so a hot
+    # reload applies to new requests while in-flight ones finish on the old set
+    if model_dir is None:
+        server.current_models = lambda: server.models
+    else:
+        server.current_models = lambda: load_models(model_dir)
+    if models:
+        from ensemble import CareerEnsemble
+
+        # One thread pool and one set of latency estimates for the whole server
+        server.ensemble = CareerEnsemble(models)
+    return server
+
+
+def request_predictions(rows, url=None, socket_path=None, timeout=5.0, latency_budget_ms=None,
+                        cascade=False):
+    """Send rows to a running prediction server and return its predictions"""
+    socket_path = socket_path or os.environ.get(SOCKET_ENV)
+    if socket_path:
+        conn = UnixHTTPConnection(socket_path, timeout=timeout)
+    else:
+        url = url or os.environ.get(URL_ENV, f"{DEFAULT_HOST}:{DEFAULT_PORT}")
+        conn = http.client.HTTPConnection(url.replace("http://", ""), timeout=timeout)
+
+    try:
+        request = {"rows": rows}
+        if latency_budget_ms is not None:
+            request["latency_budget_ms"] = latency_budget_ms
+        if cascade:
+            request["cascade"] = True
+        body = json.dumps(request)
+        conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+    finally:
+        conn.close()
+
+    if response.status != 200:
+        raise ValueError(payload.get("error", f"HTTP {response.status}"))
+    return payload["predictions"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the four career models from memory")
+    parser.add_argument("--model-dir", default=".", help="directory holding model1.pkl - model4.pkl")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--no-reload", action="store_true", help="do not watch the model files for retrains")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    models = load_models(args.model_dir)
+    print(f"✅ Loaded {len(models)} models in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    server = create_server(models, args.host, args.port, args.socket, model_dir=args.model_dir)
+    if not args.no_reload:
+        from model_registry import start_watching
+
+        start_watching()
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"🚀 Prediction server listening on {where}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down prediction server")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,64 +7,19 @@ Original file is located at
     https://colab.research.google.com/drive/1uPb1l8xzJkUPuLhKKhNQG5awA2hEzpRA
 """
 
-import pandas as pd
-import numpy as np
-import pickle
+import os
+import sys
 
-# Load the dataset
-df = pd.read_csv("../data/mldata.csv")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from feature_encoder import load_or_build_schema, profile_from_answers
+from model_registry import get_pickle, load_training_data
 
 # Load the trained model
-with open("../weights.pkl", "rb") as pickleFile:
-    regressor = pickle.load(pickleFile)
+regressor = get_pickle("../weights.pkl")
 
-category_cols = df[['certifications', 'workshops', 'Interested subjects', 'interested career area ', 'Type of company want to settle in?', 
-                    'Interested Type of Books']]
-for i in category_cols:
-  print(i)
-
-Certifi = list(df['certifications'].unique())
-print(Certifi)
-certi_code = list(df['certifications_code'].unique())
-print(certi_code)
-
-Workshops = list(df['workshops'].unique())
-print(Workshops)
-Workshops_code = list(df['workshops_code'].unique())
-print(Workshops_code)
-
-Certi_l = list(df['certifications'].unique())
-certi_code = list(df['certifications_code'].unique())
-C = dict(zip(Certi_l,certi_code))
-
-Workshops = list(df['workshops'].unique())
-print(Workshops)
-Workshops_code = list(df['workshops_code'].unique())
-print(Workshops_code)
-W = dict(zip(Workshops,Workshops_code))
-
-Interested_subjects = list(df['Interested subjects'].unique())
-print(Interested_subjects)
-Interested_subjects_code = list(df['Interested subjects_code'].unique())
-ISC = dict(zip(Interested_subjects,Interested_subjects_code))
-
-interested_career_area = list(df['interested career area '].unique())
-print(interested_career_area)
-interested_career_area_code = list(df['interested career area _code'].unique())
-ICA = dict(zip(interested_career_area,interested_career_area_code))
-
-Typeofcompany = list(df['Type of company want to settle in?'].unique())
-print(Typeofcompany)
-Typeofcompany_code = list(df['Type of company want to settle in?_code'].unique())
-TOCO = dict(zip(Typeofcompany,Typeofcompany_code))
-
-Interested_Books = list(df['Interested Type of Books'].unique())
-print(Interested_subjects)
-Interested_Books_code = list(df['Interested Type of Books_code'].unique())
-IB = dict(zip(Interested_Books,Interested_Books_code))
-
-Range_dict = {"poor": 0, "medium": 1, "excellent": 2}
-print(Range_dict)
+# Encoder built from the vocabularies saved with the model, in the model's column order;
+# the dataset is only read if weights.pkl predates its schema file
+encoder = load_or_build_schema("../weights.pkl", regressor, lambda: load_training_data("../data/mldata.csv")).encoder()
 
 # pip install gradio  # Install this package using: pip install gradio
 
@@ -295,179 +250,17 @@ iface = gr.Interface(
 if __name__ == "__main__":
     iface.launch(debug = True)'''
 
-A = 'yes'
-B = 'No'
-col = [A,B]
-for i in col:
-  if(i=='yes'):
-    i = 1
-  print(i)
-
-Certi_l = list(df['certifications'].unique())
-certi_code = list(df['certifications_code'].unique())
-C = dict(zip(Certi_l,certi_code))
-
-Workshops = list(df['workshops'].unique())
-print(Workshops)
-Workshops_code = list(df['workshops_code'].unique())
-print(Workshops_code)
-W = dict(zip(Workshops,Workshops_code))
-
-Interested_subjects = list(df['Interested subjects'].unique())
-print(Interested_subjects)
-Interested_subjects_code = list(df['Interested subjects_code'].unique())
-ISC = dict(zip(Interested_subjects,Interested_subjects_code))
-
-interested_career_area = list(df['interested career area '].unique())
-print(interested_career_area)
-interested_career_area_code = list(df['interested career area _code'].unique())
-ICA = dict(zip(interested_career_area,interested_career_area_code))
-
-Typeofcompany = list(df['Type of company want to settle in?'].unique())
-print(Typeofcompany)
-Typeofcompany_code = list(df['Type of company want to settle in?_code'].unique())
-TOCO = dict(zip(Typeofcompany,Typeofcompany_code))
-
-Interested_Books = list(df['Interested Type of Books'].unique())
-print(Interested_subjects)
-Interested_Books_code = list(df['Interested Type of Books_code'].unique())
-IB = dict(zip(Interested_Books,Interested_Books_code))
-
-Range_dict = {"poor": 0, "medium": 1, "excellent": 2}
-print(Range_dict)
-
-f =[]
-A = 'r programming'
-clms = ['r programming',0]
-for i in clms:
-  for key in C:
-    if(i==key):
-      i = C[key]
-      f.append(i)
-print(f)
-
-C = dict(zip(Certi_l,certi_code))
-  
-print(C)
-
-import numpy as np
-array = np.array([1,2,3,4])
-array.reshape(-1,1)
-
-'''for i in clms:
-  if(i==(for key in C)):
-    print(i)'''
 
 import gradio as gr
 def inputlist(Name,Contact_Number,Email_address,Logical_quotient_rating, coding_skills_rating, hackathons, public_speaking_points, self_learning_capability, 
        Extra_courses_did, Taken_inputs_from_seniors_or_elders,worked_in_teams_ever,Introvert, reading_and_writing_skills,
        memory_capability_score, smart_or_hard_work, Management_or_Technical,
        Interested_subjects, Interested_Type_of_Books,certifications, workshops, Type_of_company_want_to_settle_in, interested_career_area ):
-  #1,1,1,1,'Yes','Yes''Yes''Yes''Yes',"poor","poor","Smart worker", "Management","programming","Series","information security"."testing","BPA","testing"
-  Afeed = [Logical_quotient_rating, coding_skills_rating, hackathons, public_speaking_points]
-
-  input_list_col = [self_learning_capability,Extra_courses_did,Taken_inputs_from_seniors_or_elders,worked_in_teams_ever,Introvert,reading_and_writing_skills,memory_capability_score,smart_or_hard_work,Management_or_Technical,Interested_subjects,Interested_Type_of_Books,certifications,workshops,Type_of_company_want_to_settle_in,interested_career_area]
-  feed = []
-  K=0
-  j=0
-  for i in input_list_col:
-    if(i=='Yes'):
-      j=2
-      feed.append(j)
-       
-      print("feed 1",i)
-    
-    elif(i=="No"):
-      j=3
-      feed.append(j)
-       
-      print("feed 2",j)
-    
-    elif(i=='Management'):
-      j=1
-      k=0
-      feed.append(j)
-      feed.append(K)
-       
-      print("feed 10,11",i,j,k)
-
-    elif(i=='Technical'):
-      j=0
-      k=1
-      feed.append(j)
-      feed.append(K)
-       
-      print("feed 12,13",i,j,k)
-
-    elif(i=='Smart worker'):
-      j=1
-      k=0
-      feed.append(j)
-      feed.append(K)
-       
-      print("feed 14,15",i,j,k)
-
-    elif(i=='Hard Worker'):
-      j=0
-      k=1
-      feed.append(j)
-      feed.append(K)
-      print("feed 16,17",i,j,k)
-    
-    else:
-      for key in Range_dict:
-        if(i==key):
-          j = Range_dict[key]
-          feed.append(j)
-         
-          print("feed 3",i,j)
-
-      for key in C:
-        if(i==key):
-          j = C[key]
-          feed.append(j)
-          
-          print("feed 4",i,j)
-      
-      for key in W:
-        if(i==key):
-          j = W[key]
-          feed.append(j)
-          
-          print("feed 5",i,j)
-      
-      for key in ISC:
-        if(i==key):
-          j = ISC[key]
-          feed.append(j)
-          
-          print("feed 6",i,j)
-
-      for key in ICA:
-        if(i==key):
-          j = ICA[key]
-          feed.append(j)
-          
-          print("feed 7",i,j)
-
-      for key in TOCO:
-        if(i==key):
-          j = TOCO[key]
-          feed.append(j)
-          
-          print("feed 8",i,j)
-
-      for key in IB:
-        if(i==key):
-          j = IB[key]
-          feed.append(j)
-          
-          print("feed 9",i,j)
-
-   
-       
-  t = Afeed+feed    
-  output = regressor.predict([t])
+  profile = profile_from_answers(Logical_quotient_rating, coding_skills_rating, hackathons, public_speaking_points, self_learning_capability,
+       Extra_courses_did, Taken_inputs_from_seniors_or_elders, worked_in_teams_ever, Introvert, reading_and_writing_skills,
+       memory_capability_score, smart_or_hard_work, Management_or_Technical, Interested_subjects, Interested_Type_of_Books,
+       certifications, workshops, Type_of_company_want_to_settle_in, interested_career_area)
+  output = regressor.predict(encoder.encode_profile(profile))
   
   return(output)
   
@@ -1,47 +1,33 @@
+import os
 import sys
-import pickle
 import numpy as np
 
-file1 = open('./model1.pkl', 'rb')
-clf1 = pickle.load(file1)
-file1.close()
-
-file2 = open('./model2.pkl', 'rb')
-clf2 = pickle.load(file2)
-file2.close()
-
-file3 = open('./model3.pkl', 'rb')
-clf3 = pickle.load(file3)
-file3.close()
-
-file4 = open('./model4.pkl', 'rb')
-clf4 = pickle.load(file4)
-file4.close()
-
-
-userdata = [[sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5], sys.argv[6], sys.argv[7], sys.argv[8], sys.argv[9], sys.argv[10], sys.argv[11], sys.argv[12], sys.argv[13], sys.argv[14], sys.argv[15], sys.argv[16], sys.argv[17], sys.argv[18], sys.argv[19],sys.argv[20],sys.argv[21] ]]
-
-# Prediction By Decision Tree
-print(clf1.predict(userdata)) 
-classprobs1 = clf1.predict_proba(userdata)
-predclassprob1 = np.max(classprobs1)
-
-# Prediction By SVM
-print(clf2.predict(userdata)) 
-classprobs2 = clf2.decision_function(userdata)
-predclassprob2 = np.max(classprobs2)
-
-# Prediction By Random Forest
-print(clf3.predict(userdata)) 
-classprobs3 = clf3.predict_proba(userdata)
-predclassprob3 = np.max(classprobs3)
-
-# Prediction By XGBoost
-print(clf4.predict(userdata)) 
-classprobs4 = clf4.predict_proba(userdata)
-predclassprob4 = np.max(classprobs4)
-
-print(predclassprob1)
-print(predclassprob2)
-print(predclassprob3)
-print(predclassprob4)
\ No newline at end of file
+# The models live in a long-running prediction_server.py process; this script only
+# forwards the 21 argv values to it so existing callers keep the same contract.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from prediction_server import CASCADE_ENV, load_models, predict_rows, request_predictions
+
+userdata = [sys.argv[1:22]]
+# With CAREER_PREDICT_CASCADE=1 the decision tree answers alone when it is confident
+cascade = os.environ.get(CASCADE_ENV) == "1"
+
+try:
+    try:
+        result = request_predictions(userdata, cascade=cascade)[0]
+    except ValueError:
+        # A server that refuses the cascade (none calibrated) still answers with all four models
+        result = request_predictions(userdata)[0]
+except OSError:
+    # No server running, so pay the unpickling cost in this process
+    result = predict_rows(load_models("."), userdata, cascade=cascade)[0]
+
+# Prediction By Decision Tree, SVM, Random Forest and XGBoost
+for label in result["labels"]:
+    print(np.array([label]))
+
+for score in result["scores"]:
+    print(score)
+
+# Weighted soft vote of all four models, best career first
+for career, probability in result["ranking"]:
+    print(f"{career}: {probability:.4f}")
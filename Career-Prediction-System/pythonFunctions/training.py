@@ -1,147 +1,118 @@
+#!/usr/bin/env python3
+"""
+Model Training
+Fits the Decision Tree, SVM, Random Forest and XGBoost models on data/mldata.csv in
+parallel worker processes and saves them as pkl/model1.pkl - model4.pkl
+
+Example:
+    python training.py --compare
+"""
+
 # Importing Libraries
+import os
 import sys
-import pandas as pd
-import numpy as np
+import argparse
 from sklearn.model_selection import train_test_split
 from sklearn import tree, svm
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import confusion_matrix, accuracy_score
-from xgboost import XGBClassifier
+from sklearn.metrics import accuracy_score
 import pickle
 
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from feature_encoder import LEGACY_FEATURE_NAMES, preprocess_frame
+from dataset_cache import read_dataset
+from parallel_fit import LabelEncodedClassifier, fit_parallel, fit_sequential
+
+DATA_PATH = os.path.join(HERE, "..", "data", "mldata.csv")
+PKL_DIR = os.path.join(HERE, "pkl")
+TARGET = "Suggested Job Role"
+
+# Saved as model1.pkl - model4.pkl in this order, the order prediction_server.py expects
+MODEL_NAMES = ["Decision Tree", "SVM", "Random Forest", "XGBoost"]
+
+
+def load_split(path=DATA_PATH):
+    # Loading Dataset
+    df = read_dataset(path)
+
+    # Number, Label and Dummy Variable Encoding
+    df = preprocess_frame(df)
+
+    # Building Model
+    feed = df[LEGACY_FEATURE_NAMES + [TARGET]]
+
+    # Taking all independent variable columns
+    df_train_x = feed.drop(TARGET, axis=1)
+
+    # Target variable column
+    df_train_y = feed[TARGET]
+
+    # Train-Test Splitting
+    return train_test_split(df_train_x, df_train_y, test_size=0.20, random_state=42)
+
+
+def build_models():
+    try:
+        from xgboost import XGBClassifier
+    except ImportError:
+        raise ImportError("xgboost is required for model4.pkl: pip install xgboost")
+
+    return {
+        # Decision Tree Classifier
+        "Decision Tree": tree.DecisionTreeClassifier(),
+        # SVM Classifier
+        "SVM": svm.SVC(),
+        # Random Forest Classifier
+        "Random Forest": RandomForestClassifier(n_estimators=100),
+        # XGBoost Classifier; it needs the job roles encoded as 0..n-1
+        "XGBoost": LabelEncodedClassifier(XGBClassifier(random_state=42, learning_rate=0.02, n_estimators=300)),
+    }
+
+
+def save_models(models, pkl_dir=PKL_DIR):
+    os.makedirs(pkl_dir, exist_ok=True)
+    for i, name in enumerate(MODEL_NAMES, start=1):
+        with open(os.path.join(pkl_dir, f"model{i}.pkl"), "wb") as f:
+            pickle.dump(models[name], f)
+
+
+def report(x_test, y_test, parallel, sequential=None):
+    """Fit time per model and in total, next to the sequential baseline when it ran"""
+    fitted, seconds, threads, wall = parallel
+    baseline = sequential[1] if sequential else {}
+    print(f"\n{'model':<16}{'threads':>8}{'parallel':>11}{'sequential':>12}{'accuracy':>10}")
+    for name, model in fitted.items():
+        accuracy = accuracy_score(y_test, model.predict(x_test))
+        before = f"{baseline[name]:.2f}s" if name in baseline else "-"
+        print(f"{name:<16}{threads[name]:>8}{seconds[name]:>10.2f}s{before:>12}{accuracy:>10.3f}")
+    before = f"{sequential[2]:.2f}s" if sequential else "-"
+    print(f"{'total (wall)':<16}{sum(threads.values()):>8}{wall:>10.2f}s{before:>12}")
+    if sequential:
+        print(f"⏱️ {sequential[2] / wall:.2f}x the speed of fitting in sequence, on {os.cpu_count()} core(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the four career models in parallel")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--cpus", type=int, default=None, help="cores to use (default: all)")
+    parser.add_argument("--compare", action="store_true",
+                        help="also fit the models one after another, single-threaded, and compare")
+    args = parser.parse_args()
+
+    x_train, x_test, y_train, y_test = load_split(args.data)
+    models = build_models()
+
+    sequential = None
+    if args.compare:
+        # The original script's order and settings: one fit at a time, one thread each
+        sequential = fit_sequential(models, x_train, y_train, n_threads=1)
+
+    parallel = fit_parallel(models, x_train, y_train, args.cpus)
+    report(x_test, y_test, parallel, sequential)
+    save_models(parallel[0])
+    print("All Model Building Done!")
+
 
-# Loading Dataset
-df = pd.read_csv("D:\projects\Future Foundary\Career-Prediction-System\data\mldata.csv")
-
-
-# Number Encoding
-cols = df[
-    [
-        "self-learning capability?",
-        "Extra-courses did",
-        "Taken inputs from seniors or elders",
-        "worked in teams ever?",
-        "Introvert",
-    ]
-]
-for i in cols:
-    cleanup_nums = {i: {"yes": 1, "no": 0}}
-    df = df.replace(cleanup_nums)
-
-
-mycol = df[["reading and writing skills", "memory capability score"]]
-for i in mycol:
-    cleanup_nums = {i: {"poor": 0, "medium": 1, "excellent": 2}}
-    df = df.replace(cleanup_nums)
-
-
-# Label Encoding
-category_cols = df[
-    [
-        "certifications",
-        "workshops",
-        "Interested subjects",
-        "interested career area ",
-        "Type of company want to settle in?",
-        "Interested Type of Books",
-    ]
-]
-for i in category_cols:
-    df[i] = df[i].astype("category")
-    df[i + "_code"] = df[i].cat.codes
-
-
-# Dummy Variable Encoding
-df = pd.get_dummies(
-    df, columns=["Management or Technical", "hard/smart worker"], prefix=["A", "B"]
-)
-
-
-# Building Model
-feed = df[
-    [
-        "Logical quotient rating",
-        "coding skills rating",
-        "hackathons",
-        "public speaking points",
-        "self-learning capability?",
-        "Extra-courses did",
-        "Taken inputs from seniors or elders",
-        "worked in teams ever?",
-        "Introvert",
-        "reading and writing skills",
-        "memory capability score",
-        "B_hard worker",
-        "B_smart worker",
-        "A_Management",
-        "A_Technical",
-        "Interested subjects_code",
-        "Interested Type of Books_code",
-        "certifications_code",
-        "workshops_code",
-        "Type of company want to settle in?_code",
-        "interested career area _code",
-        "Suggested Job Role",
-    ]
-]
-
-
-# Taking all independent variable columns
-df_train_x = feed.drop("Suggested Job Role", axis=1)
-
-# Target variable column
-df_train_y = feed["Suggested Job Role"]
-
-# Train-Test Splitting
-x_train, x_test, y_train, y_test = train_test_split(
-    df_train_x, df_train_y, test_size=0.20, random_state=42
-)
-
-
-# Decision Tree Classifier
-clf1 = tree.DecisionTreeClassifier()
-clf1 = clf1.fit(x_train, y_train)
-
-# SVM Classifier
-clf2 = svm.SVC()
-clf2 = clf2.fit(x_train, y_train)
-
-
-# Random Forest Classifier
-clf3 = RandomForestClassifier(n_estimators=100)
-clf3 = clf3.fit(x_train, y_train)
-
-# XGBoost Classifier
-clf4 = XGBClassifier(random_state=42, learning_rate=0.02, n_estimators=300)
-clf4 = clf3.fit(x_train, y_train)
-
-
-# feed = df[['Logical quotient rating', 'coding skills rating', 'hackathons', 'public speaking points', 'self-learning capability?','Extra-courses did',
-#            'Taken inputs from seniors or elders', 'worked in teams ever?', 'Introvert', 'reading and writing skills', 'memory capability score',
-#            'B_hard worker', 'B_smart worker', 'A_Management', 'A_Technical', 'Interested subjects_code', 'Interested Type of Books_code', 'certifications_code',
-#            'workshops_code', 'Type of company want to settle in?_code',  'interested career area _code',
-#              'Suggested Job Role']]
-
-
-# Decision Tree Model
-file1 = open("pkl/model1.pkl", "wb")
-pickle.dump(clf1, file1)
-file1.close()
-
-# SVM Model
-file2 = open("pkl/model2.pkl", "wb")
-pickle.dump(clf2, file2)
-file2.close()
-
-# Random Forest Model
-file3 = open("pkl/model3.pkl", "wb")
-pickle.dump(clf3, file3)
-file3.close()
-
-# XGBoost Model
-file4 = open("pkl/model4.pkl", "wb")
-pickle.dump(clf4, file4)
-file4.close()
-
-
-print("All Model Building Done!")
+if __name__ == "__main__":
+    main()
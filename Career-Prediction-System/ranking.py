@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Top-k Career Ranking
+Vectorized top-k selection over (n_rows x n_classes) probability matrices, with an
+optional minimum probability and per-category grouping
+
+Example:
+    python ranking.py --rows 10000 --classes 300 -k 10
+"""
+
+import time
+import argparse
+
+import numpy as np
+
+OTHER_CATEGORY = "Other"
+
+
+class Ranking:
+    """
+    Top-k class columns and their probabilities per row, best first.
+
+    Slots cut by the minimum probability hold column -1 and score 0. Class labels
+    are only looked up in labels()/rows(), at the display boundary.
+    """
+
+    def __init__(self, indices, scores):
+        self.indices = indices
+        self.scores = scores
+
+    @property
+    def valid(self):
+        return self.indices >= 0
+
+    def __len__(self):
+        return self.indices.shape[0]
+
+    def labels(self, classes):
+        """Label matrix matching indices, with None in the cut slots"""
+        labels = np.asarray(classes, dtype=object).take(np.maximum(self.indices, 0))
+        labels[~self.valid] = None
+        return labels
+
+    def row(self, i, classes):
+        """[(label, probability), ...] for row i"""
+        return [(classes[j], float(p)) for j, p in zip(self.indices[i], self.scores[i]) if j >= 0]
+
+    def rows(self, classes):
+        return [self.row(i, classes) for i in range(len(self))]
+
+
+def top_k(proba, k=10, min_probability=None):
+    """
+    The k most probable columns of every row via argpartition, so only the k
+    winners are sorted. Ties are ordered by column, like a stable argsort.
+    """
+    proba = np.asarray(proba)
+    if proba.ndim == 1:
+        proba = proba[np.newaxis, :]
+    n_rows, n_classes = proba.shape
+    k = min(k, n_classes)
+
+    if k < n_classes:
+        indices = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+        indices.sort(axis=1)
+    else:
+        indices = np.broadcast_to(np.arange(n_classes), (n_rows, n_classes)).copy()
+    scores = np.take_along_axis(proba, indices, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    indices = np.take_along_axis(indices, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+
+    if min_probability is not None:
+        cut = scores < min_probability
+        indices[cut] = -1
+        scores[cut] = 0.0
+    return Ranking(indices, scores)
+
+
+class CategoryIndex:
+    """
+    Maps a model's class columns onto the categories of a {category: [careers]}
+    database such as MEGA_CAREER_DATABASE. Careers found in no category are
+    grouped under "Other". Build once per model and reuse across requests.
+    """
+
+    def __init__(self, classes, database):
+        career_category = {}
+        for category, careers in database.items():
+            for career in careers:
+                career_category.setdefault(career, category)
+
+        self.categories = list(database)
+        ids = {category: i for i, category in enumerate(self.categories)}
+        column_ids = [ids.get(career_category.get(career), -1) for career in classes]
+        if -1 in column_ids:
+            self.categories.append(OTHER_CATEGORY)
+            column_ids = [len(self.categories) - 1 if i == -1 else i for i in column_ids]
+        self.column_ids = np.asarray(column_ids, dtype=np.intp)
+        self.columns = [np.flatnonzero(self.column_ids == g) for g in range(len(self.categories))]
+
+        # One-hot (n_classes x n_categories) so category totals are one matrix product
+        self._membership = np.zeros((len(self.column_ids), len(self.categories)))
+        self._membership[np.arange(len(self.column_ids)), self.column_ids] = 1.0
+
+    def category_scores(self, proba):
+        """(n_rows x n_categories) total probability of each category"""
+        return np.asarray(proba) @ self._membership
+
+    def top_categories(self, proba, k=3, min_probability=None):
+        """Ranking over categories; label it with self.categories"""
+        return top_k(self.category_scores(proba), k, min_probability)
+
+    def top_k_by_category(self, proba, k=3, min_probability=None):
+        """{category: Ranking over all class columns} with the k best careers of each category"""
+        proba = np.asarray(proba)
+        if proba.ndim == 1:
+            proba = proba[np.newaxis, :]
+        grouped = {}
+        for category, columns in zip(self.categories, self.columns):
+            if columns.size == 0:
+                continue
+            ranking = top_k(proba[:, columns], k, min_probability)
+            # Back to columns of the full matrix, keeping -1 for cut slots
+            ranking.indices = np.where(ranking.valid, columns.take(np.maximum(ranking.indices, 0)), -1)
+            grouped[category] = ranking
+        return grouped
+
+
+def benchmark(n_rows=10000, n_classes=300, k=10, repeats=5):
+    """Per-row zip-and-sort vs full argsort vs partial selection"""
+    rng = np.random.default_rng(0)
+    proba = rng.dirichlet(np.full(n_classes, 0.3), size=n_rows)
+    classes = [f"career_{j}" for j in range(n_classes)]
+
+    def python_sort():
+        return [sorted(zip(classes, row), key=lambda x: x[1], reverse=True)[:k] for row in proba]
+
+    def full_argsort():
+        order = np.argsort(-proba, axis=1, kind="stable")[:, :k]
+        return order, np.take_along_axis(proba, order, axis=1)
+
+    def partial():
+        return top_k(proba, k)
+
+    reference = full_argsort()
+    ranking = partial()
+    same = np.array_equal(reference[0], ranking.indices) and np.array_equal(reference[1], ranking.scores)
+
+    print(f"🏁 Top-{k} of {n_classes} classes for {n_rows:,} rows (median of {repeats})")
+    for label, fn in (("python sort", python_sort), ("full argsort", full_argsort), ("argpartition", partial)):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        ms = float(np.median(samples))
+        print(f"  {label:<14}{ms:10.2f} ms  {n_rows / ms * 1000:14,.0f} rows/sec")
+    print(f"✅ Same indices and scores as the full sort: {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark top-k ranking over probability matrices")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--classes", type=int, default=300)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.rows, args.classes, args.k, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@
 Retrain the career prediction model with current scikit-learn version
 """
 
-import pandas as pd
 import numpy as np
 import pickle
 from sklearn.model_selection import train_test_split
@@ -11,60 +10,20 @@ from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 
+from dataset_cache import read_dataset
+from feature_encoder import FeatureSchema, preprocess_frame, schema_path
+from model_bundle import save_bundle
+from onnx_backend import export_trained
+
 def preprocess_data(df):
     """Preprocess the dataset for training"""
-    # Create a copy to avoid modifying the original
-    newdf = df.copy()
-    
-    # Binary encoding for Yes/No categorical variables
-    yes_no_cols = [
-        "self-learning capability?",
-        "Extra-courses did",
-        "Taken inputs from seniors or elders",
-        "worked in teams ever?",
-        "Introvert",
-    ]
-    
-    for col in yes_no_cols:
-        if col in newdf.columns:
-            cleanup_nums = {col: {"yes": 1, "no": 0}}
-            newdf = newdf.replace(cleanup_nums)
-    
-    # Number encoding for skill levels
-    skill_cols = ["reading and writing skills", "memory capability score"]
-    for col in skill_cols:
-        if col in newdf.columns:
-            cleanup_nums = {col: {"poor": 0, "medium": 1, "excellent": 2}}
-            newdf = newdf.replace(cleanup_nums)
-    
-    # Category encoding for other categorical features
-    category_cols = [
-        "certifications",
-        "workshops", 
-        "Interested subjects",
-        "interested career area ",
-        "Type of company want to settle in?",
-        "Interested Type of Books",
-    ]
-    
-    for col in category_cols:
-        if col in newdf.columns:
-            newdf[col] = newdf[col].astype("category")
-            newdf[col + "_code"] = newdf[col].cat.codes
-    
-    # Dummy variable encoding for Management/Technical and Smart/Hard worker
-    if "Management or Technical" in newdf.columns:
-        newdf = pd.get_dummies(newdf, columns=["Management or Technical"], prefix=["A"])
-    
-    if "hard/smart worker" in newdf.columns:
-        newdf = pd.get_dummies(newdf, columns=["hard/smart worker"], prefix=["B"])
-    
-    return newdf
+    # Single pass shared with the apps' encoder; df is left untouched
+    return preprocess_frame(df)
 
 def train_model():
     """Train and save the career prediction model"""
     print("Loading dataset...")
-    df = pd.read_csv("./data/mldata.csv")
+    df = read_dataset("./data/mldata.csv")
     
     # Fix the data inconsistency mentioned in the original code
     df["workshops"] = df["workshops"].replace(["testing"], "Testing")
@@ -142,6 +101,17 @@ def train_model():
         pickle.dump(model, f)
     
     print("Model saved successfully as 'weights.pkl'")
+
+    # Feature contract checked against the model whenever the apps load it
+    schema = FeatureSchema.from_training(df, available_features, model)
+    schema.save(schema_path("weights.pkl"))
+    print(f"Feature schema saved as '{schema_path('weights.pkl')}'")
+
+    manifest = save_bundle("model_bundles/base", model, available_features, vocabularies=schema.vocabularies)
+    print(f"Model bundle saved to 'model_bundles/base' (version {manifest['version']})")
+    onnx_path = export_trained("base", model, available_features)
+    if onnx_path:
+        print(f"ONNX model saved to '{onnx_path}'")
     
     return model, available_features
 
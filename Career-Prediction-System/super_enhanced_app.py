@@ -7,13 +7,15 @@ import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import pickle
 import time
 import streamlit as st
 from datetime import datetime, timedelta
 import requests
 import json
 from db import *
+from feature_encoder import SchemaMismatchError
+from model_registry import get_resource, start_watching
+from ranking import top_k
 
 # Configure Streamlit page
 st.set_page_config(
@@ -76,24 +78,31 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load the enhanced trained model
+# Pick up retrained models without restarting the app (no-op on Streamlit reruns)
+start_watching()
+
+BASIC_CAREERS = ["Software Developer", "Data Scientist", "Web Developer", "Mobile App Developer"]
+
+def load_prediction_model():
+    """
+    Return (model, encoder, careers in predict_proba column order). The registry loads
+    each once per process and checks the model against its feature schema, so a
+    mismatch raises SchemaMismatchError here rather than inside a prediction.
+    """
+    try:
+        model = get_resource("enhanced_model")
+        return model, get_resource("enhanced_encoder"), list(model.classes_)
+    except FileNotFoundError:
+        st.warning("⚠️ Enhanced model not found, using basic model")
+        return get_resource("base_model"), None, BASIC_CAREERS
+
+# Load the feature schema and check it against the enhanced bundle (or model) now, so a
+# mismatch or a missing schema that cannot be rebuilt fails at startup, not per prediction
 try:
-    with open("enhanced_weights.pkl", "rb") as pickleFile:
-        regressor = pickle.load(pickleFile)
-    
-    with open("feature_names.pkl", "rb") as f:
-        model_features = pickle.load(f)
-    
-    with open("career_list.pkl", "rb") as f:
-        available_careers = pickle.load(f)
-        
-    st.success(f"✅ Enhanced model loaded successfully! {len(available_careers)} career predictions available.")
-    
+    get_resource("enhanced_schema")
 except FileNotFoundError:
-    st.warning("⚠️ Enhanced model not found, using basic model")
-    with open("weights.pkl", "rb") as pickleFile:
-        regressor = pickle.load(pickleFile)
-    available_careers = ["Software Developer", "Data Scientist", "Web Developer", "Mobile App Developer"]
+    # No enhanced model: load_prediction_model() falls back to the basic one
+    pass
 
 # Massive expansion of career categories and detailed information
 SUPER_CAREER_DATABASE = {
@@ -510,39 +519,34 @@ def prepare_prediction_inputs(logical_quotient, hackathons, coding_skills, publi
 
 def get_career_predictions(inputs):
     try:
+        regressor, encoder, available_careers = load_prediction_model()
+        
         # Convert inputs to the format expected by your model
-        if available_careers and len(available_careers) > 10:
-            # Use enhanced model
-            input_array = np.array([[
-                inputs['Logical quotient rating'],
-                inputs['hackathons'],
-                inputs['coding skills rating'],
-                inputs['public speaking points'],
-                inputs['self-learning capability?'],
-                inputs['Extra-courses did'],
-                inputs['certifications'],
-                inputs['workshops'],
-                inputs['reading and writing skills'],
-                inputs['memory capability score'],
-                inputs['Management_or_Technical'],
-                inputs['Team player'],
-                inputs['Introvert']
-            ]])
+        if encoder is not None:
+            # Use enhanced model; the encoder fills its columns by name, in the schema's order.
+            # The form only covers part of the questionnaire; the rest encodes as unknown
+            profile = {
+                'Logical quotient rating': inputs['Logical quotient rating'],
+                'hackathons': inputs['hackathons'],
+                'coding skills rating': inputs['coding skills rating'],
+                'public speaking points': inputs['public speaking points'],
+                'self-learning capability?': "yes" if inputs['self-learning capability?'] else "no",
+                'Extra-courses did': "yes" if inputs['Extra-courses did'] else "no",
+                'worked in teams ever?': "yes" if inputs['Team player'] else "no",
+                'Introvert': "yes" if inputs['Introvert'] else "no",
+                'Management or Technical': "Management" if inputs['Management_or_Technical'] else "Technical",
+            }
+            input_array = encoder.encode_profile(profile)
             
-            # Get prediction probabilities
-            try:
-                probabilities = regressor.predict_proba(input_array)[0]
-                career_scores = list(zip(available_careers, probabilities))
-                career_scores.sort(key=lambda x: x[1], reverse=True)
-                return career_scores[:10]  # Top 10 predictions
-            except:
-                # Fallback to simple prediction
-                prediction = regressor.predict(input_array)[0]
-                return [(prediction, 0.9)]
+            # Top 10 predictions; labels are only looked up for the winners
+            return top_k(regressor.predict_proba(input_array), 10).row(0, available_careers)
         else:
             # Use basic model
             return [("Software Developer", 0.8), ("Data Scientist", 0.7), ("Web Developer", 0.6)]
     
+    except SchemaMismatchError:
+        # Encoding against the wrong schema would give confident wrong answers; fail loudly
+        raise
     except Exception as e:
         st.error(f"Prediction error: {str(e)}")
         return [("Software Developer", 0.5)]
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Vectorized Synthetic Career Data
+Generates train_mega_model.py's training rows as numpy array operations driven by a
+per-category parameter table, in reproducible chunks that can run in worker processes
+
+Example:
+    python synthetic_data.py --scale 1 10 --workers 1 4
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Score features drawn from N(mean, std) clipped to 1-10 when the category has a
+# pattern for them, else uniformly from 3-8
+SCORE_FEATURES = [
+    'logical_quotient', 'hackathons', 'coding_skills', 'public_speaking',
+    'certifications', 'workshops', 'reading_writing', 'memory_capability',
+    'math_interest', 'science_interest', 'english_interest',
+    'computer_interest', 'business_interest'
+]
+SCORE_CLIP = (1, 10)
+UNIFORM_RANGE = (3, 8)
+
+# 0/1 features and their probability of a 1 when the category has no pattern for them
+BINARY_FEATURES = {
+    'self_learning': 0.7, 'extra_courses': 0.7, 'team_player': 0.7,
+    'management_or_technical': 0.4, 'introvert': 0.4
+}
+
+# Column order of the generated frame, as train_mega_model.generate_career_sample builds it
+FEATURE_COLUMNS = [
+    'logical_quotient', 'hackathons', 'coding_skills', 'public_speaking',
+    'certifications', 'workshops', 'reading_writing', 'memory_capability',
+    'self_learning', 'extra_courses', 'team_player', 'management_or_technical',
+    'introvert', 'math_interest', 'science_interest', 'english_interest',
+    'computer_interest', 'business_interest'
+]
+
+# Base patterns for different career categories: (mean, std) for score features,
+# probability of a 1 for binary ones
+CATEGORY_PATTERNS = {
+    "Technology & Software": {
+        'logical_quotient': (7, 2), 'coding_skills': (8, 1.5), 'hackathons': (3, 2),
+        'computer_interest': (9, 1), 'math_interest': (7, 2), 'management_or_technical': 0.2
+    },
+    "Data Science & AI": {
+        'logical_quotient': (8, 1.5), 'coding_skills': (8, 1.5), 'math_interest': (9, 1),
+        'science_interest': (8, 1.5), 'certifications': (3, 2), 'management_or_technical': 0.15
+    },
+    "Cybersecurity": {
+        'logical_quotient': (8, 1.5), 'coding_skills': (7, 2), 'certifications': (4, 2),
+        'workshops': (8, 3), 'management_or_technical': 0.3
+    },
+    "Business & Management": {
+        'public_speaking': (8, 1.5), 'business_interest': (9, 1), 'team_player': 0.9,
+        'management_or_technical': 0.8, 'english_interest': (8, 1.5)
+    },
+    "Product & Design": {
+        'public_speaking': (7, 2), 'team_player': 0.8, 'english_interest': (8, 1.5),
+        'computer_interest': (7, 2), 'management_or_technical': 0.6
+    }
+}
+DEFAULT_PATTERN = "Technology & Software"
+
+# Rows per chunk; each chunk gets its own spawned random stream, so the output
+# depends on the seed and chunk size but not on how many workers run the chunks
+CHUNK_ROWS = 50_000
+
+SAMPLES_PER_CAREER = (50, 100)
+
+
+def parameter_table(categories):
+    """Per-category arrays: score mean/std/gaussian mask and binary probabilities"""
+    n = len(categories)
+    table = {
+        "mean": np.zeros((n, len(SCORE_FEATURES))),
+        "std": np.ones((n, len(SCORE_FEATURES))),
+        "gaussian": np.zeros((n, len(SCORE_FEATURES)), dtype=bool),
+        "prob": np.tile(np.array(list(BINARY_FEATURES.values())), (n, 1)),
+    }
+    for g, category in enumerate(categories):
+        pattern = CATEGORY_PATTERNS.get(category, CATEGORY_PATTERNS[DEFAULT_PATTERN])
+        for j, feature in enumerate(SCORE_FEATURES):
+            if feature in pattern:
+                table["mean"][g, j], table["std"][g, j] = pattern[feature]
+                table["gaussian"][g, j] = True
+        for j, feature in enumerate(BINARY_FEATURES):
+            if feature in pattern:
+                table["prob"][g, j] = pattern[feature]
+    return table
+
+
+def generate_rows(rng, category_ids, table):
+    """
+    One sample per entry of category_ids (indices into the table), as
+    (scores, binaries) matrices in SCORE_FEATURES / BINARY_FEATURES order.
+    Pass np.full(n, g) for all samples of one career.
+    """
+    category_ids = np.asarray(category_ids, dtype=np.intp)
+    n = len(category_ids)
+    scores = rng.uniform(*UNIFORM_RANGE, size=(n, len(SCORE_FEATURES)))
+    gaussian = table["gaussian"][category_ids]
+    normal = rng.normal(table["mean"][category_ids][gaussian], table["std"][category_ids][gaussian])
+    scores[gaussian] = np.clip(normal, *SCORE_CLIP)
+    binaries = (rng.random((n, len(BINARY_FEATURES))) < table["prob"][category_ids]).astype(np.int64)
+    return scores, binaries
+
+
+def _generate_chunk(seed_sequence, category_ids, table):
+    return generate_rows(np.random.default_rng(seed_sequence), category_ids, table)
+
+
+def career_list(database):
+    """
+    (careers, category of each) in database order. A career listed under two
+    categories appears twice, both times with the last category, as in
+    create_mega_dataset's original loop.
+    """
+    careers, category_of = [], {}
+    for category, names in database.items():
+        for career in names:
+            careers.append(career)
+            category_of[career] = category
+    return careers, [category_of[career] for career in careers]
+
+
+def generate_dataset(database, scale=1, seed=42, workers=1, chunk_rows=CHUNK_ROWS):
+    """
+    DataFrame of FEATURE_COLUMNS + 'career' with 50-100 x scale rows per career
+    of database ({category: [careers]}).
+
+    SeedSequence(seed) spawns one stream for the per-career sample counts and
+    one per chunk of chunk_rows rows; chunks run in a process pool when
+    workers > 1 and give the same frame for any number of workers.
+    """
+    careers, categories = career_list(database)
+    category_names = list(dict.fromkeys(categories))
+    category_index = {category: g for g, category in enumerate(category_names)}
+    table = parameter_table(category_names)
+
+    low, high = SAMPLES_PER_CAREER
+    count_stream, chunk_root = np.random.SeedSequence(seed).spawn(2)
+    counts = np.random.default_rng(count_stream).integers(low * scale, high * scale + 1, size=len(careers))
+    career_ids = np.repeat(np.arange(len(careers)), counts)
+    row_categories = np.array([category_index[c] for c in categories], dtype=np.intp)[career_ids]
+
+    starts = range(0, len(career_ids), chunk_rows)
+    streams = chunk_root.spawn(len(starts))
+    chunks = [row_categories[start:start + chunk_rows] for start in starts]
+    workers = min(workers or os.cpu_count(), len(chunks))
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(_generate_chunk, streams, chunks, [table] * len(chunks)))
+    else:
+        parts = [_generate_chunk(stream, chunk, table) for stream, chunk in zip(streams, chunks)]
+
+    scores = np.vstack([s for s, _ in parts])
+    binaries = np.vstack([b for _, b in parts])
+    columns = dict(zip(SCORE_FEATURES, scores.T))
+    columns.update(zip(BINARY_FEATURES, binaries.T))
+    df = pd.DataFrame({name: columns[name] for name in FEATURE_COLUMNS})
+    df['career'] = np.asarray(careers, dtype=object)[career_ids]
+    return df
+
+
+def category_means(df, mapping):
+    """Mean of every feature per category, for comparing generators"""
+    return df.groupby(df['career'].map(mapping))[FEATURE_COLUMNS].mean()
+
+
+def benchmark(scales=(1, 10), workers=(1,), seed=42):
+    """Rows/sec of the per-row generator in train_mega_model.py vs generate_dataset()"""
+    from train_mega_model import MEGA_CAREER_DATABASE, create_mega_dataset_per_row
+    from hierarchical import career_categories
+
+    mapping = career_categories(MEGA_CAREER_DATABASE)
+    print(f"🚀 {len(career_list(MEGA_CAREER_DATABASE)[0])} careers in {len(MEGA_CAREER_DATABASE)} categories")
+    print(f"\n{'generator':<24}{'scale':>6}{'rows':>12}{'seconds':>10}{'rows/sec':>14}")
+
+    start = time.perf_counter()
+    reference = create_mega_dataset_per_row(MEGA_CAREER_DATABASE)
+    seconds = time.perf_counter() - start
+    print(f"{'per-row loop':<24}{1:>6}{len(reference):>12,}{seconds:>10.2f}{len(reference) / seconds:>14,.0f}")
+
+    frames = {}
+    for scale in scales:
+        for n_workers in workers:
+            start = time.perf_counter()
+            df = generate_dataset(MEGA_CAREER_DATABASE, scale, seed, n_workers)
+            seconds = time.perf_counter() - start
+            label = f"vectorized, {n_workers} worker(s)"
+            print(f"{label:<24}{scale:>6}{len(df):>12,}{seconds:>10.2f}{len(df) / seconds:>14,.0f}")
+            frames.setdefault(scale, []).append(df)
+
+    reproducible = all(frames[s][0].equals(df) for s in frames for df in frames[s][1:])
+    print(f"\n✅ Same rows for every worker count: {reproducible}")
+    if 1 in frames:
+        diff = (category_means(frames[1][0], mapping) - category_means(reference, mapping)).abs()
+        print(f"📊 Largest per-category feature mean difference vs the per-row loop "
+              f"at scale 1: {diff.to_numpy().max():.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized mega dataset generator")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10],
+                        help="multiples of the 50-100 samples per career")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1],
+                        help="process counts to compare; every count must produce the same rows")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    benchmark(args.scale, args.workers, args.seed)
+
+
+if __name__ == "__main__":
+    main()
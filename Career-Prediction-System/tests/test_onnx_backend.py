@@ -0,0 +1,92 @@
+"""
+Parity of the onnxruntime backend with the sklearn models it is exported from
+
+Example:
+    python -m pytest tests/test_onnx_backend.py -q
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+import onnx_backend
+from onnx_backend import PARITY_TOLERANCE, OnnxModel, export_onnx, export_trained
+
+# onnx_backend itself imports both lazily
+pytest.importorskip("skl2onnx")
+pytest.importorskip("onnxruntime")
+
+CAREERS = np.array(["Data Scientist", "Network Engineer", "Product Manager", "UI/UX Designer", "Web Developer"])
+FEATURES = [f"rating_{i}" for i in range(8)]
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    """Unscaled ratings on different ranges, so the scaler actually matters"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(5, 2, size=(800, len(FEATURES))) * np.arange(1, len(FEATURES) + 1)
+    y = CAREERS[np.digitize(X[:, 0] / 2 + X[:, 3] / 8, [4, 6, 8, 10])]
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def scaled_forest(training_data, tmp_path_factory):
+    X, y = training_data
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    path = str(tmp_path_factory.mktemp("onnx") / "forest.onnx")
+    export_onnx(path, model, FEATURES, scaler)
+    return scaler, model, OnnxModel(path)
+
+
+def test_scaled_forest_probabilities(scaled_forest, training_data):
+    scaler, model, session = scaled_forest
+    X, _ = training_data
+    rng = np.random.default_rng(1)
+    X = np.vstack([X, rng.uniform(X.min(axis=0), X.max(axis=0), size=(500, X.shape[1]))])
+
+    expected = model.predict_proba(scaler.transform(X))
+    actual = session.predict_proba(X)
+    assert actual.shape == expected.shape
+    assert np.max(np.abs(actual - expected)) <= PARITY_TOLERANCE
+
+    # Labels agree wherever the top two classes are further apart than the tolerance
+    top2 = np.sort(expected, axis=1)[:, -2:]
+    clear = top2[:, 1] - top2[:, 0] > 2 * PARITY_TOLERANCE
+    assert np.array_equal(session.predict(X)[clear], model.predict(scaler.transform(X))[clear])
+
+
+def test_scaled_forest_metadata(scaled_forest):
+    _, model, session = scaled_forest
+    assert list(session.classes_) == list(model.classes_)
+    assert session.feature_names == FEATURES
+    assert session.n_features_in_ == model.n_features_in_
+
+
+def test_single_row(scaled_forest, training_data):
+    scaler, model, session = scaled_forest
+    X, _ = training_data
+    expected = model.predict_proba(scaler.transform(X[:1]))
+    assert np.max(np.abs(session.predict_proba(X[0]) - expected)) <= PARITY_TOLERANCE
+
+
+def test_unscaled_tree(training_data, tmp_path):
+    X, y = training_data
+    model = DecisionTreeClassifier(max_depth=10, random_state=0).fit(X, y)
+    session = OnnxModel(export_onnx(str(tmp_path / "tree.onnx"), model, FEATURES))
+    assert list(session.classes_) == list(model.classes_)
+    assert np.max(np.abs(session.predict_proba(X) - model.predict_proba(X))) <= PARITY_TOLERANCE
+
+
+def test_failed_export_does_not_raise(training_data, tmp_path, monkeypatch):
+    X, y = training_data
+    model = DecisionTreeClassifier(max_depth=3).fit(X, y)
+
+    def out_of_memory(*args, **kwargs):
+        raise MemoryError("simulated")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(onnx_backend, "export_onnx", out_of_memory)
+    assert export_trained("base", model, FEATURES) is None
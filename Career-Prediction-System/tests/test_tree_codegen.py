@@ -0,0 +1,100 @@
+"""
+Equivalence of tree_codegen's generated modules with the sklearn models they come from
+
+Example:
+    python -m pytest tests/test_tree_codegen.py -q
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from forest_engine import FlatForest
+from tree_codegen import generate_module, import_generated
+
+CAREERS = np.array(["Database Developer", "Software Engineer", "Technical Support", "Web Developer"])
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    """Questionnaire-like integer ratings with a label that depends on a few of them"""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 10, size=(600, 6)).astype(np.float64)
+    X[:, 5] += rng.normal(0, 0.3, size=600)
+    y = CAREERS[(X[:, 0] + X[:, 1] > 9).astype(int) * 2 + (X[:, 5] > 4.5).astype(int)]
+    flip = rng.random(600) < 0.1
+    y[flip] = rng.choice(CAREERS, size=flip.sum())
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def models(training_data):
+    X, y = training_data
+    return {
+        "tree": DecisionTreeClassifier(random_state=0).fit(X, y),
+        "forest": RandomForestClassifier(n_estimators=7, max_depth=6, random_state=0).fit(X, y),
+    }
+
+
+def boundary_rows(model, base):
+    """Rows with one feature set exactly on, and one float32 step either side of, each split threshold"""
+    forest = FlatForest.from_sklearn(model)
+    internal = forest.value_offset < 0
+    rows = []
+    for feature, threshold in zip(forest.feature[internal], forest.threshold[internal]):
+        t32 = np.float32(threshold)
+        for value in (threshold, float(np.nextafter(t32, np.float32(-np.inf))), float(t32),
+                      float(np.nextafter(t32, np.float32(np.inf)))):
+            row = base.copy()
+            row[feature] = value
+            rows.append(row)
+    return np.array(rows)
+
+
+@pytest.fixture(params=["tree", "forest"])
+def model(request, models):
+    return models[request.param]
+
+
+@pytest.fixture(params=["arrays", "branches"])
+def module(request, model, tmp_path):
+    path = tmp_path / f"predictor_{request.param}.py"
+    path.write_text(generate_module(model, style=request.param))
+    return import_generated(str(path))
+
+
+def assert_equivalent(model, module, X):
+    expected_proba = model.predict_proba(X)
+    expected_labels = model.predict(X)
+    for row, proba, label in zip(X, expected_proba, expected_labels):
+        row = row.tolist()
+        assert module.predict_proba(row) == proba.tolist()
+        assert module.predict(row) == label
+
+
+def test_random_rows(model, module, training_data):
+    X, _ = training_data
+    rng = np.random.default_rng(1)
+    assert_equivalent(model, module, np.vstack([X[:200], rng.uniform(-1, 11, size=(200, X.shape[1]))]))
+
+
+def test_threshold_boundaries(model, module, training_data):
+    X, _ = training_data
+    assert_equivalent(model, module, boundary_rows(model, X[0]))
+
+
+def test_metadata(model, module):
+    assert list(module.CLASSES) == list(model.classes_)
+    assert module.N_FEATURES == model.n_features_in_
+    assert module.predict_rows([[5.0] * model.n_features_in_]) == list(model.predict([[5.0] * model.n_features_in_]))
+
+
+def test_wrong_row_length(module, model):
+    with pytest.raises(ValueError):
+        module.predict_proba([0.0] * (model.n_features_in_ + 1))
+
+
+def test_unknown_style(models):
+    with pytest.raises(ValueError):
+        generate_module(models["tree"], style="bytecode")
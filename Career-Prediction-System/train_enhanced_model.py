@@ -6,11 +6,19 @@ Enhanced Career Prediction Model with Extended Career Options
 import pandas as pd
 import numpy as np
 import pickle
+import time
+import argparse
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.preprocessing import LabelEncoder
 import warnings
+
+from dataset_cache import read_dataset
+from feature_encoder import FeatureSchema, preprocess_frame, schema_path
+from forest_search import forest_params
+from model_bundle import save_bundle
+from onnx_backend import export_trained
 warnings.filterwarnings('ignore')
 
 # Extended career mapping - maps original careers to broader categories
@@ -86,8 +94,71 @@ EMERGING_CAREERS = [
     'Biomedical Engineer', 'Health Informatics Specialist', 'EdTech Developer'
 ]
 
-def expand_career_dataset(df):
+# Seed for the expansion variations and synthetic profiles, so retraining is repeatable
+EXPANSION_SEED = 42
+
+def career_expansion_table():
+    """One row per (source career, expanded career) pair of CAREER_EXPANSION_MAP, with its variation masks"""
+    pairs = [(source, career, k) for source, careers in CAREER_EXPANSION_MAP.items()
+             for k, career in enumerate(careers)]
+    table = pd.DataFrame(pairs, columns=['source', 'career', 'variant'])
+    table['data'] = table['career'].str.contains('Data|Analytics')
+    table['manager'] = table['career'].str.contains('Manager|Lead|Director')
+    table['creative'] = table['career'].isin(CREATIVE_CAREERS)
+    table['technical'] = table['career'].str.contains('Engineer|Developer')
+    return table
+
+def expand_career_dataset(df, seed=None):
     """Expand the dataset with additional career paths and synthetic data"""
+    rng = np.random.default_rng(seed)
+    table = career_expansion_table()
+    
+    # Original rows, then each row's variations, as the row-by-row version ordered them
+    originals = df.reset_index(drop=True).assign(_row=np.arange(len(df)), _variant=-1)
+    variants = originals.drop(columns='_variant').merge(table, left_on='Suggested Job Role', right_on='source')
+    variants['Suggested Job Role'] = variants['career']
+    variants['_variant'] = variants['variant']
+    variants = add_career_specific_variations_vectorized(variants, rng)
+    
+    expanded = pd.concat([originals, variants[originals.columns]], ignore_index=True)
+    expanded = expanded.sort_values(['_row', '_variant'], kind='stable').drop(columns=['_row', '_variant'])
+    
+    # Add completely new career paths with synthetic data
+    synthetic = pd.DataFrame(generate_synthetic_career_data(np.random.RandomState(seed)))
+    return pd.concat([expanded, synthetic], ignore_index=True)
+
+def add_career_specific_variations_vectorized(rows, rng):
+    """add_career_specific_variations as column-wise masked updates; masks come from career_expansion_table()"""
+    n = len(rows)
+    
+    # Data Science careers tend to have higher analytical skills
+    data = rows['data'].to_numpy()
+    rows.loc[data, 'Logical quotient rating'] = np.minimum(
+        10, rows.loc[data, 'Logical quotient rating'] + rng.integers(1, 3, data.sum()))
+    rows.loc[data & (rng.random(n) > 0.3), 'reading and writing skills'] = 'excellent'
+    
+    # Management roles tend to have better communication
+    manager = rows['manager'].to_numpy()
+    rows.loc[manager, 'public speaking points'] = np.minimum(
+        10, rows.loc[manager, 'public speaking points'] + rng.integers(1, 4, manager.sum()))
+    rows.loc[manager, 'Management or Technical'] = 'Management'
+    rows.loc[manager, 'worked in teams ever?'] = 'yes'
+    
+    # Creative roles have different characteristics
+    creative = rows['creative'].to_numpy()
+    rows.loc[creative, 'Interested Type of Books'] = rng.choice(['Art', 'Design', 'Creative', 'Visual'], creative.sum())
+    rows.loc[creative, 'Management or Technical'] = rng.choice(['Management', 'Technical'], creative.sum())
+    
+    # Technical specialists
+    technical = rows['technical'].to_numpy()
+    rows.loc[technical, 'coding skills rating'] = np.minimum(
+        10, rows.loc[technical, 'coding skills rating'] + rng.integers(1, 3, technical.sum()))
+    rows.loc[technical, 'Management or Technical'] = 'Technical'
+    
+    return rows
+
+def expand_career_dataset_per_row(df):
+    """Original iterrows() expansion, kept as the baseline for benchmark_expansion()"""
     expanded_rows = []
     
     for _, row in df.iterrows():
@@ -137,56 +208,56 @@ def add_career_specific_variations(row, career):
     
     return row
 
-def generate_synthetic_career_data():
-    """Generate synthetic data for new career paths"""
+def generate_synthetic_career_data(random_state=np.random):
+    """Generate synthetic data for new career paths; random_state is np.random or a RandomState"""
     synthetic_data = []
     all_new_careers = BUSINESS_CAREERS + CREATIVE_CAREERS + EMERGING_CAREERS
     
     for career in all_new_careers:
         # Generate 10-20 samples per new career
-        for _ in range(np.random.randint(10, 21)):
-            row = generate_synthetic_profile(career)
+        for _ in range(random_state.randint(10, 21)):
+            row = generate_synthetic_profile(career, random_state)
             synthetic_data.append(row)
     
     return synthetic_data
 
-def generate_synthetic_profile(career):
+def generate_synthetic_profile(career, random_state=np.random):
     """Generate a realistic synthetic profile for a given career"""
     
     # Base profile
     profile = {
-        'Logical quotient rating': np.random.randint(3, 9),
-        'hackathons': np.random.randint(0, 8),
-        'coding skills rating': np.random.randint(2, 8),
-        'public speaking points': np.random.randint(2, 9),
-        'self-learning capability?': np.random.choice(['yes', 'no'], p=[0.7, 0.3]),
-        'Extra-courses did': np.random.choice(['yes', 'no'], p=[0.6, 0.4]),
-        'certifications': np.random.choice([
+        'Logical quotient rating': random_state.randint(3, 9),
+        'hackathons': random_state.randint(0, 8),
+        'coding skills rating': random_state.randint(2, 8),
+        'public speaking points': random_state.randint(2, 9),
+        'self-learning capability?': random_state.choice(['yes', 'no'], p=[0.7, 0.3]),
+        'Extra-courses did': random_state.choice(['yes', 'no'], p=[0.6, 0.4]),
+        'certifications': random_state.choice([
             'information security', 'machine learning', 'cloud computing',
             'data science', 'project management', 'digital marketing'
         ]),
-        'workshops': np.random.choice([
+        'workshops': random_state.choice([
             'data science', 'cloud computing', 'leadership', 'design thinking'
         ]),
-        'reading and writing skills': np.random.choice(['poor', 'medium', 'excellent'], p=[0.1, 0.4, 0.5]),
-        'memory capability score': np.random.choice(['poor', 'medium', 'excellent'], p=[0.1, 0.5, 0.4]),
-        'Interested subjects': np.random.choice([
+        'reading and writing skills': random_state.choice(['poor', 'medium', 'excellent'], p=[0.1, 0.4, 0.5]),
+        'memory capability score': random_state.choice(['poor', 'medium', 'excellent'], p=[0.1, 0.5, 0.4]),
+        'Interested subjects': random_state.choice([
             'programming', 'Management', 'data engineering', 'business strategy'
         ]),
-        'interested career area ': np.random.choice([
+        'interested career area ': random_state.choice([
             'technology', 'business', 'creative', 'consulting'
         ]),
-        'Type of company want to settle in?': np.random.choice([
+        'Type of company want to settle in?': random_state.choice([
             'Technology', 'Startup', 'Consulting', 'Healthcare', 'Finance'
         ]),
-        'Taken inputs from seniors or elders': np.random.choice(['yes', 'no'], p=[0.7, 0.3]),
-        'Interested Type of Books': np.random.choice([
+        'Taken inputs from seniors or elders': random_state.choice(['yes', 'no'], p=[0.7, 0.3]),
+        'Interested Type of Books': random_state.choice([
             'Business', 'Technology', 'Self-help', 'Science', 'Biography'
         ]),
-        'Management or Technical': get_mgmt_tech_preference(career),
-        'hard/smart worker': np.random.choice(['smart worker', 'hard worker'], p=[0.6, 0.4]),
-        'worked in teams ever?': np.random.choice(['yes', 'no'], p=[0.8, 0.2]),
-        'Introvert': np.random.choice(['yes', 'no'], p=[0.4, 0.6]),
+        'Management or Technical': get_mgmt_tech_preference(career, random_state),
+        'hard/smart worker': random_state.choice(['smart worker', 'hard worker'], p=[0.6, 0.4]),
+        'worked in teams ever?': random_state.choice(['yes', 'no'], p=[0.8, 0.2]),
+        'Introvert': random_state.choice(['yes', 'no'], p=[0.4, 0.6]),
         'Suggested Job Role': career
     }
     
@@ -197,7 +268,7 @@ def generate_synthetic_profile(career):
         profile['worked in teams ever?'] = 'yes'
     
     elif career in CREATIVE_CAREERS:
-        profile['Interested Type of Books'] = np.random.choice(['Art', 'Design', 'Creative'])
+        profile['Interested Type of Books'] = random_state.choice(['Art', 'Design', 'Creative'])
         profile['hackathons'] = max(0, profile['hackathons'] - 2)  # Less hackathons
     
     elif career in EMERGING_CAREERS:
@@ -207,7 +278,7 @@ def generate_synthetic_profile(career):
     
     return profile
 
-def get_mgmt_tech_preference(career):
+def get_mgmt_tech_preference(career, random_state):
     """Determine management vs technical preference based on career"""
     management_careers = [
         'Product Manager', 'Project Manager', 'Operations Manager', 'HR Manager',
@@ -219,22 +290,23 @@ def get_mgmt_tech_preference(career):
     elif 'Developer' in career or 'Engineer' in career or 'Analyst' in career:
         return 'Technical'
     else:
-        return np.random.choice(['Management', 'Technical'])
+        return random_state.choice(['Management', 'Technical'])
 
-def train_enhanced_model():
-    """Train the enhanced career prediction model"""
+def prepare_training_data():
+    """(expanded dataset, feature names, X, y) as the enhanced model is trained on them"""
     print("Loading and expanding dataset...")
     
     # Load original data
-    df = pd.read_csv("./data/mldata.csv")
+    df = read_dataset("./data/mldata.csv")
     df["workshops"] = df["workshops"].replace(["testing"], "Testing")
     
     print(f"Original dataset shape: {df.shape}")
     print(f"Original careers: {len(df['Suggested Job Role'].unique())}")
     
     # Expand dataset
-    expanded_df = expand_career_dataset(df)
-    print(f"Expanded dataset shape: {expanded_df.shape}")
+    start = time.perf_counter()
+    expanded_df = expand_career_dataset(df, seed=EXPANSION_SEED)
+    print(f"Expanded dataset shape: {expanded_df.shape} ({time.perf_counter() - start:.2f} s)")
     print(f"Total careers: {len(expanded_df['Suggested Job Role'].unique())}")
     
     # Preprocess data
@@ -261,6 +333,11 @@ def train_enhanced_model():
     
     X = processed_df[available_features]
     y = processed_df["Suggested Job Role"]
+    return expanded_df, available_features, X, y
+
+def train_enhanced_model():
+    """Train the enhanced career prediction model"""
+    expanded_df, available_features, X, y = prepare_training_data()
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
@@ -271,14 +348,11 @@ def train_enhanced_model():
     
     # Train ensemble model
     print("Training Enhanced Random Forest model...")
-    model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=15,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        class_weight='balanced'  # Handle class imbalance
-    )
+    # n_estimators, max_depth, min_samples_* and class_weight='balanced' (class imbalance)
+    # come from forest_search.json, or from the last forest_search.py selection
+    params = forest_params("enhanced")
+    print(f"Forest parameters: {params}")
+    model = RandomForestClassifier(**params, random_state=42)
     
     model.fit(X_train, y_train)
     
@@ -302,7 +376,20 @@ def train_enhanced_model():
     with open("career_list.pkl", "wb") as f:
         pickle.dump(list(model.classes_), f)
     
+    # Feature contract (names, vocabularies of the expanded dataset, class order),
+    # checked against the model whenever the apps load it
+    schema = FeatureSchema.from_training(expanded_df, available_features, model)
+    schema.save(schema_path("enhanced_weights.pkl"))
+    
+    # Memory-mappable bundle with the same vocabularies
+    manifest = save_bundle("model_bundles/enhanced", model, available_features, vocabularies=schema.vocabularies)
+    onnx_path = export_trained("enhanced", model, available_features)
+    
     print("✅ Enhanced model saved successfully!")
+    print(f"Feature schema: {schema_path('enhanced_weights.pkl')}")
+    print(f"Bundle: model_bundles/enhanced (version {manifest['version']})")
+    if onnx_path:
+        print(f"ONNX model: {onnx_path}")
     print(f"Career options available: {len(model.classes_)}")
     
     # Display some sample careers
@@ -317,44 +404,49 @@ def train_enhanced_model():
 
 def preprocess_enhanced_data(df):
     """Enhanced preprocessing for the expanded dataset"""
-    newdf = df.copy()
-    
-    # Binary encoding
-    yes_no_cols = ["self-learning capability?", "Extra-courses did", 
-                   "Taken inputs from seniors or elders", "worked in teams ever?", "Introvert"]
-    
-    for col in yes_no_cols:
-        if col in newdf.columns:
-            cleanup_nums = {col: {"yes": 1, "no": 0}}
-            newdf = newdf.replace(cleanup_nums)
-    
-    # Skill level encoding
-    skill_cols = ["reading and writing skills", "memory capability score"]
-    for col in skill_cols:
-        if col in newdf.columns:
-            cleanup_nums = {col: {"poor": 0, "medium": 1, "excellent": 2}}
-            newdf = newdf.replace(cleanup_nums)
-    
-    # Category encoding
-    category_cols = ["certifications", "workshops", "Interested subjects", 
-                    "interested career area ", "Type of company want to settle in?", 
-                    "Interested Type of Books"]
-    
-    for col in category_cols:
-        if col in newdf.columns:
-            newdf[col] = newdf[col].astype("category")
-            newdf[col + "_code"] = newdf[col].cat.codes
-    
-    # Dummy encoding
-    if "Management or Technical" in newdf.columns:
-        newdf = pd.get_dummies(newdf, columns=["Management or Technical"], prefix=["A"])
-    
-    if "hard/smart worker" in newdf.columns:
-        newdf = pd.get_dummies(newdf, columns=["hard/smart worker"], prefix=["B"])
-    
-    return newdf
+    return preprocess_frame(df)
+
+def benchmark_expansion(repeats=3):
+    """Time expand_career_dataset against the iterrows() version and compare their outputs"""
+    df = read_dataset("./data/mldata.csv")
+    df["workshops"] = df["workshops"].replace(["testing"], "Testing")
+    
+    timings = {}
+    for label, expand in (("iterrows()", expand_career_dataset_per_row),
+                          ("vectorized", lambda data: expand_career_dataset(data, seed=EXPANSION_SEED))):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = expand(df)
+            samples.append(time.perf_counter() - start)
+        timings[label] = (min(samples), result)
+        print(f"⏱️ {label:<12}{min(samples):8.3f} s  {len(result):,} rows")
+    
+    # Same rows in the same order up to the synthetic tail; adjusted columns only match in distribution
+    reference, result = timings["iterrows()"][1], timings["vectorized"][1]
+    n = len(df) + df['Suggested Job Role'].map(lambda c: len(CAREER_EXPANSION_MAP.get(c, []))).sum()
+    reference, result = reference.head(n), result.head(n)
+    adjusted = ['Logical quotient rating', 'public speaking points', 'coding skills rating',
+                'reading and writing skills', 'Management or Technical', 'worked in teams ever?',
+                'Interested Type of Books']
+    untouched = [c for c in df.columns if c not in adjusted]
+    same = reference[untouched].reset_index(drop=True).equals(result[untouched].reset_index(drop=True))
+    numeric = adjusted[:3]
+    drift = (reference.groupby('Suggested Job Role')[numeric].mean()
+             - result.groupby('Suggested Job Role')[numeric].mean()).abs().to_numpy().max()
+    print(f"✅ Expanded rows and untouched columns identical: {same}")
+    print(f"📊 Largest per-career mean difference in the adjusted ratings: {drift:.3f}")
+    print(f"🚀 Speedup: {timings['iterrows()'][0] / timings['vectorized'][0]:.0f}x")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the enhanced career model")
+    parser.add_argument("--benchmark-expansion", action="store_true",
+                        help="only time the dataset expansion against the iterrows() version")
+    args = parser.parse_args()
+    if args.benchmark_expansion:
+        benchmark_expansion()
+        raise SystemExit(0)
+    
     try:
         model, features = train_enhanced_model()
         print(f"\n🎉 Enhanced training completed successfully!")
@@ -5,10 +5,19 @@ Advanced Career Database with 300+ Career Paths
 import pandas as pd
 import numpy as np
 import pickle
+import argparse
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import warnings
+
+from dataset_cache import build_cache
+from distill import distill, report
+from forest_search import forest_params
+from hierarchical import HierarchicalForest, career_categories
+from model_bundle import save_bundle
+from onnx_backend import export_trained
+from synthetic_data import CATEGORY_PATTERNS, DEFAULT_PATTERN, career_list, generate_dataset
 warnings.filterwarnings('ignore')
 
 # Massive career database with 300+ careers across all industries
@@ -176,31 +185,38 @@ MEGA_CAREER_DATABASE = {
     ]
 }
 
-def create_mega_dataset():
+# Model inputs, in training order
+MEGA_FEATURE_COLUMNS = [
+    'logical_quotient', 'hackathons', 'coding_skills', 'public_speaking',
+    'self_learning', 'extra_courses', 'certifications', 'workshops',
+    'reading_writing', 'memory_capability', 'management_or_technical',
+    'team_player', 'introvert', 'math_interest', 'science_interest',
+    'english_interest', 'computer_interest', 'business_interest'
+]
+
+def create_mega_dataset(scale=1, workers=None, seed=42):
     """Create an expanded dataset with 300+ careers"""
     
-    # Flatten all careers into a single list
+    print(f"Total careers in database: {len(career_list(MEGA_CAREER_DATABASE)[0])}")
+    
+    # 50-100 samples per career (times scale), generated as array operations in seeded chunks
+    df = generate_dataset(MEGA_CAREER_DATABASE, scale=scale, seed=seed, workers=workers)
+    print(f"Generated {len(df)} training samples")
+    print(f"Career distribution:\n{df['career'].value_counts().head(10)}")
+    
+    return df
+
+def create_mega_dataset_per_row(database=MEGA_CAREER_DATABASE):
+    """Original one-sample-at-a-time generator, kept as the synthetic_data.py benchmark baseline"""
     all_careers = []
     career_categories = {}
     
-    for category, careers in MEGA_CAREER_DATABASE.items():
+    for category, careers in database.items():
         for career in careers:
             all_careers.append(career)
             career_categories[career] = category
     
-    print(f"Total careers in database: {len(all_careers)}")
-    
-    # Generate synthetic training data for each career
     np.random.seed(42)
-    
-    features = [
-        'logical_quotient', 'hackathons', 'coding_skills', 'public_speaking',
-        'self_learning', 'extra_courses', 'certifications', 'workshops',
-        'reading_writing', 'memory_capability', 'management_or_technical',
-        'team_player', 'introvert', 'math_interest', 'science_interest',
-        'english_interest', 'computer_interest', 'business_interest'
-    ]
-    
     data = []
     
     for career in all_careers:
@@ -214,41 +230,13 @@ def create_mega_dataset():
             sample['career'] = career
             data.append(sample)
     
-    df = pd.DataFrame(data)
-    print(f"Generated {len(df)} training samples")
-    print(f"Career distribution:\n{df['career'].value_counts().head(10)}")
-    
-    return df
+    return pd.DataFrame(data)
 
 def generate_career_sample(career, category):
     """Generate realistic training sample for a specific career"""
     
-    # Base patterns for different career categories
-    patterns = {
-        "Technology & Software": {
-            'logical_quotient': (7, 2), 'coding_skills': (8, 1.5), 'hackathons': (3, 2),
-            'computer_interest': (9, 1), 'math_interest': (7, 2), 'management_or_technical': 0.2
-        },
-        "Data Science & AI": {
-            'logical_quotient': (8, 1.5), 'coding_skills': (8, 1.5), 'math_interest': (9, 1),
-            'science_interest': (8, 1.5), 'certifications': (3, 2), 'management_or_technical': 0.15
-        },
-        "Cybersecurity": {
-            'logical_quotient': (8, 1.5), 'coding_skills': (7, 2), 'certifications': (4, 2),
-            'workshops': (8, 3), 'management_or_technical': 0.3
-        },
-        "Business & Management": {
-            'public_speaking': (8, 1.5), 'business_interest': (9, 1), 'team_player': 0.9,
-            'management_or_technical': 0.8, 'english_interest': (8, 1.5)
-        },
-        "Product & Design": {
-            'public_speaking': (7, 2), 'team_player': 0.8, 'english_interest': (8, 1.5),
-            'computer_interest': (7, 2), 'management_or_technical': 0.6
-        }
-    }
-    
     # Get pattern for this category or use default
-    pattern = patterns.get(category, patterns["Technology & Software"])
+    pattern = CATEGORY_PATTERNS.get(category, CATEGORY_PATTERNS[DEFAULT_PATTERN])
     
     sample = {}
     
@@ -292,20 +280,14 @@ def generate_career_sample(career, category):
     
     return sample
 
-def train_mega_model():
-    """Train the enhanced model with 300+ careers"""
+def train_mega_model(scale=1, workers=None, onnx=False):
+    """Train the enhanced model with 300+ careers; onnx=True also exports model_onnx/mega.onnx"""
     
     print("🚀 Creating mega career dataset...")
-    df = create_mega_dataset()
+    df = create_mega_dataset(scale, workers)
     
     # Prepare features and target
-    feature_columns = [
-        'logical_quotient', 'hackathons', 'coding_skills', 'public_speaking',
-        'self_learning', 'extra_courses', 'certifications', 'workshops',
-        'reading_writing', 'memory_capability', 'management_or_technical',
-        'team_player', 'introvert', 'math_interest', 'science_interest',
-        'english_interest', 'computer_interest', 'business_interest'
-    ]
+    feature_columns = MEGA_FEATURE_COLUMNS
     
     X = df[feature_columns]
     y = df['career']
@@ -323,14 +305,11 @@ def train_mega_model():
     
     # Train Random Forest with optimal parameters for large dataset
     print("🤖 Training Random Forest model...")
-    rf_model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=20,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        n_jobs=-1
-    )
+    # n_estimators, max_depth and min_samples_* come from forest_search.json,
+    # or from the last forest_search.py selection
+    params = forest_params("mega")
+    print(f"🌲 Forest parameters: {params}")
+    rf_model = RandomForestClassifier(**params, random_state=42, n_jobs=-1)
     
     rf_model.fit(X_train_scaled, y_train)
     
@@ -368,8 +347,37 @@ def train_mega_model():
     with open("mega_career_database.pkl", "wb") as f:
         pickle.dump(MEGA_CAREER_DATABASE, f)
     
+    manifest = save_bundle("model_bundles/mega", rf_model, feature_columns, scaler=scaler)
+    
+    # Compact student trained on the forest's soft probabilities, for latency-sensitive serving
+    print("🧪 Distilling a compact student model...")
+    student = distill(rf_model, X_train_scaled)
+    report(rf_model, student, X_test_scaled, y_test)
+    
+    with open("mega_student.pkl", "wb") as f:
+        pickle.dump(student, f)
+    
+    student_manifest = save_bundle("model_bundles/mega_student", student, feature_columns, scaler=scaler,
+                                   extra={"teacher_version": manifest["version"]})
+    
+    # Category classifier + per-category career forests, fitted in parallel processes
+    print("🌳 Training hierarchical category -> career model...")
+    # Same parameters as the flat forest, so a forest_search.py selection applies to both
+    hierarchical = HierarchicalForest.fit(X_train_scaled, y_train, career_categories(MEGA_CAREER_DATABASE),
+                                          params)
+    hierarchical_accuracy = np.mean(hierarchical.predict(X_test_scaled) == y_test.to_numpy())
+    print(f"✅ Hierarchical test accuracy: {hierarchical_accuracy:.3f} (flat: {test_accuracy:.3f})")
+    
+    with open("mega_hierarchical.pkl", "wb") as f:
+        pickle.dump(hierarchical, f)
+    
     # Save the training dataset for future reference
     df.to_csv("mega_training_data.csv", index=False)
+    # Columnar copy, so later readers (hierarchical.py, distill.py) skip CSV parsing
+    build_cache("mega_training_data.csv")
+    
+    # Opt-in and last: converting the full forest can need more memory than training it
+    onnx_path = export_trained("mega", rf_model, feature_columns, scaler=scaler) if onnx else None
     
     print("🎉 Mega model training completed!")
     print(f"📁 Saved files:")
@@ -379,8 +387,20 @@ def train_mega_model():
     print("  - mega_career_list.pkl (all career options)")
     print("  - mega_career_database.pkl (career database)")
     print("  - mega_training_data.csv (training dataset)")
+    print("  - dataset_cache/ (columnar copy of the training dataset)")
+    print(f"  - model_bundles/mega/ (memory-mappable bundle, version {manifest['version']})")
+    if onnx_path:
+        print(f"  - {onnx_path} (scaler + forest for onnxruntime)")
+    print("  - mega_student.pkl (distilled student model)")
+    print("  - mega_hierarchical.pkl (category -> career model)")
+    print(f"  - model_bundles/mega_student/ (student bundle, version {student_manifest['version']})")
     
     return rf_model, scaler, feature_columns, list(y.unique())
 
 if __name__ == "__main__":
-    train_mega_model()
+    parser = argparse.ArgumentParser(description="Train the 300+ career mega model")
+    parser.add_argument("--scale", type=int, default=1, help="multiple of the 50-100 synthetic samples per career")
+    parser.add_argument("--workers", type=int, help="processes generating the synthetic data")
+    parser.add_argument("--onnx", action="store_true", help="also export model_onnx/mega.onnx for onnxruntime")
+    args = parser.parse_args()
+    train_mega_model(args.scale, args.workers, args.onnx)
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Standalone Tree Predictor Generator
+Writes a fitted decision tree or small forest out as a plain Python module, so
+predicting needs neither sklearn nor numpy nor unpickling
+
+Example:
+    python tree_codegen.py export pythonFunctions/pkl/model1.pkl model1_predictor.py --style branches
+    python tree_codegen.py check pythonFunctions/pkl/model1.pkl model1_predictor.py --rows 10000
+    python tree_codegen.py benchmark pythonFunctions/pkl/model1.pkl model1_predictor.py
+"""
+
+import os
+import sys
+import time
+import pickle
+import argparse
+import py_compile
+import importlib.util
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+from forest_engine import FlatForest, sample_inputs
+
+# Nested if/else deeper than this trips CPython's parser/indentation limits
+MAX_BRANCH_DEPTH = 80
+
+MODULE_HEADER = '''"""
+Generated Career Predictor
+{description}
+
+Generated by tree_codegen.py on {created}; do not edit by hand.
+"""
+
+from array import array
+
+CLASSES = {classes}
+FEATURE_NAMES = {feature_names}
+N_FEATURES = {n_features}
+N_CLASSES = {n_classes}
+N_TREES = {n_trees}
+
+# Sparse leaf distributions: one ((class index, ...), (probability, ...)) pair per leaf
+LEAF_CLASSES = {leaf_classes}
+LEAF_PROBA = {leaf_proba}
+'''
+
+ARRAYS_BODY = '''
+# Node tables of all trees; a node is a leaf when LEAF[node] >= 0
+FEATURE = {feature}
+THRESHOLD = {threshold}
+LEFT = {left}
+RIGHT = {right}
+MISSING_LEFT = {missing_left}
+LEAF = {leaf}
+ROOTS = {roots}
+
+
+def _leaves(x):
+    for node in ROOTS:
+        while LEAF[node] < 0:
+            value = x[FEATURE[node]]
+            if value <= THRESHOLD[node] or (value != value and MISSING_LEFT[node]):
+                node = LEFT[node]
+            else:
+                node = RIGHT[node]
+        yield LEAF[node]
+'''
+
+BRANCHES_BODY = '''
+{trees}
+
+TREES = ({tree_names},)
+
+
+def _leaves(x):
+    for tree in TREES:
+        yield tree(x)
+'''
+
+PREDICT_FUNCTIONS = '''
+
+def predict_proba(row):
+    """Class probabilities for one row, in CLASSES order"""
+    if len(row) != N_FEATURES:
+        raise ValueError("row has %d features, model expects %d" % (len(row), N_FEATURES))
+    # Inputs are rounded to float32 first, exactly as sklearn does before comparing
+    x = array("f", row)
+    totals = [0.0] * N_CLASSES
+    for leaf in _leaves(x):
+        for j, p in zip(LEAF_CLASSES[leaf], LEAF_PROBA[leaf]):
+            totals[j] += p
+    return [total / N_TREES for total in totals]
+
+
+def predict(row):
+    """Most probable class for one row"""
+    proba = predict_proba(row)
+    return CLASSES[proba.index(max(proba))]
+
+
+def predict_rows(rows):
+    return [predict(row) for row in rows]
+'''
+
+
+def python_literal(values):
+    """Tuple literal whose floats round-trip exactly"""
+    items = ", ".join(repr(v) for v in values)
+    return f"({items},)" if len(values) == 1 else f"({items})"
+
+
+def class_literal(value):
+    """Plain Python value for a class label (numpy scalars do not repr as literals)"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def sparse_leaves(forest):
+    """Per leaf, the classes with a non-zero probability and those probabilities"""
+    leaf_classes, leaf_proba = [], []
+    for values in forest.leaf_values:
+        nonzero = np.flatnonzero(values)
+        leaf_classes.append(tuple(int(j) for j in nonzero))
+        leaf_proba.append(tuple(float(values[j]) for j in nonzero))
+    return leaf_classes, leaf_proba
+
+
+def tree_function(forest, index, root):
+    """def _tree_<index>(x) as nested if/else returning the leaf's row in LEAF_PROBA"""
+    lines = [f"def _tree_{index}(x):"]
+
+    def emit(node, depth):
+        pad = "    " * depth
+        offset = forest.value_offset[node]
+        if offset >= 0:
+            lines.append(f"{pad}return {int(offset)}")
+            return
+        if depth > MAX_BRANCH_DEPTH:
+            raise ValueError(f"Tree {index} is too deep for --style branches, use --style arrays")
+        feature = int(forest.feature[node])
+        threshold = repr(float(forest.threshold[node]))
+        condition = f"x[{feature}] <= {threshold}"
+        if forest.missing_left[node]:
+            condition += f" or x[{feature}] != x[{feature}]"
+        lines.append(f"{pad}if {condition}:")
+        emit(forest.children[2 * node], depth + 1)
+        lines.append(f"{pad}else:")
+        emit(forest.children[2 * node + 1], depth + 1)
+
+    emit(root, 1)
+    return "\n".join(lines)
+
+
+def generate_module(model, feature_names=None, style="arrays", description=None):
+    """Source code of a dependency-free module reproducing model.predict_proba"""
+    forest = FlatForest.from_sklearn(model)
+    if feature_names is None:
+        feature_names = getattr(model, "feature_names_in_", None)
+    if feature_names is None:
+        feature_names = [f"x{i}" for i in range(forest.n_features_in_)]
+
+    leaf_classes, leaf_proba = sparse_leaves(forest)
+    source = MODULE_HEADER.format(
+        description=description or f"{type(model).__name__} with {forest.n_trees} tree(s)",
+        created=datetime.now().isoformat(timespec="seconds"),
+        classes=python_literal([class_literal(c) for c in forest.classes_]),
+        feature_names=python_literal([str(name) for name in feature_names]),
+        n_features=forest.n_features_in_,
+        n_classes=forest.n_classes,
+        n_trees=forest.n_trees,
+        leaf_classes=python_literal(leaf_classes),
+        leaf_proba=python_literal(leaf_proba),
+    )
+
+    if style == "arrays":
+        is_leaf = forest.value_offset >= 0
+        source += ARRAYS_BODY.format(
+            feature=python_literal(forest.feature.tolist()),
+            threshold=python_literal(forest.threshold.tolist()),
+            left=python_literal(forest.children[0::2].tolist()),
+            right=python_literal(forest.children[1::2].tolist()),
+            missing_left=python_literal([int(m) for m in forest.missing_left & ~is_leaf]),
+            leaf=python_literal(forest.value_offset.tolist()),
+            roots=python_literal(forest.roots.tolist()),
+        )
+    elif style == "branches":
+        trees = [tree_function(forest, i, root) for i, root in enumerate(forest.roots)]
+        source += BRANCHES_BODY.format(
+            trees="\n\n\n".join(trees),
+            tree_names=", ".join(f"_tree_{i}" for i in range(len(trees))),
+        )
+    else:
+        raise ValueError(f"Unknown style {style!r}, expected 'arrays' or 'branches'")
+
+    return source + PREDICT_FUNCTIONS
+
+
+def export_module(model_path, output_path, style="arrays", features_path=None):
+    """Generate the module for a pickled model and write it to output_path"""
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    feature_names = None
+    if features_path:
+        with open(features_path, "rb") as f:
+            feature_names = pickle.load(f)
+
+    source = generate_module(model, feature_names, style, f"Generated from {os.path.basename(model_path)}")
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(source)
+    os.replace(tmp_path, output_path)
+    return os.path.getsize(output_path)
+
+
+def import_generated(path):
+    """Import a generated module from its file path"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def check_equivalence(model_path, module_path, n_rows=10000):
+    """Compare the generated module with the pickled model row by row; returns mismatches"""
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    module = import_generated(module_path)
+    forest = FlatForest.from_sklearn(model)
+
+    # Rows around the split thresholds, the integer answers the forms produce, and exact thresholds
+    rng = np.random.default_rng(0)
+    X = np.vstack([
+        sample_inputs(forest, n_rows),
+        rng.integers(0, 10, size=(n_rows, forest.n_features_in_)).astype(np.float64),
+        forest.threshold[rng.integers(0, len(forest.threshold), size=(n_rows, forest.n_features_in_))],
+    ])
+
+    expected_proba = np.asarray(model.predict_proba(X))
+    expected_labels = np.asarray(model.predict(X))
+    mismatches = 0
+    for row, proba, label in zip(X, expected_proba, expected_labels):
+        row = row.tolist()
+        if module.predict_proba(row) != proba.tolist() or module.predict(row) != label:
+            mismatches += 1
+
+    print(f"🔍 {len(X):,} rows: {mismatches} mismatches "
+          f"({'✅ identical probabilities and labels' if mismatches == 0 else '❌ not equivalent'})")
+    return mismatches
+
+
+def cold_start_ms(code, repeats):
+    """Median wall time of a fresh interpreter running code, in milliseconds"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=os.getcwd())
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def benchmark(model_path, module_path, repeats=5):
+    """Cold start (interpreter + load + first prediction) and warm per-row latency"""
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    n_features = model.n_features_in_
+    row = [1.0] * n_features
+    module_dir, module_file = os.path.split(os.path.abspath(module_path))
+    module_name = os.path.splitext(module_file)[0]
+
+    # Byte-compile once so the generated module is timed the way it is deployed
+    py_compile.compile(module_path, doraise=True)
+
+    pickle_code = (f"import pickle, warnings; warnings.filterwarnings('ignore'); "
+                   f"m = pickle.load(open({model_path!r}, 'rb')); m.predict([{row!r}])")
+    module_code = (f"import sys; sys.path.insert(0, {module_dir!r}); "
+                   f"import {module_name}; {module_name}.predict({row!r})")
+    baseline = cold_start_ms("pass", repeats)
+    pickled = cold_start_ms(pickle_code, repeats)
+    generated = cold_start_ms(module_code, repeats)
+
+    print(f"🚀 Cold start, fresh interpreter + load + first prediction (median of {repeats}):")
+    print(f"  {'empty interpreter':<20}{baseline:10.1f} ms")
+    print(f"  {'pickle + sklearn':<20}{pickled:10.1f} ms")
+    print(f"  {'generated module':<20}{generated:10.1f} ms   "
+          f"({(pickled - baseline) / max(generated - baseline, 1e-3):.1f}x less load overhead)")
+
+    module = import_generated(module_path)
+    X = np.random.default_rng(0).integers(0, 10, size=(200, n_features)).astype(np.float64)
+    for label, fn in (("sklearn predict", lambda r: model.predict(r[np.newaxis, :])),
+                      ("generated predict", lambda r: module.predict(r.tolist()))):
+        start = time.perf_counter()
+        for r in X:
+            fn(r)
+        print(f"  {label:<20}{(time.perf_counter() - start) / len(X) * 1000:10.3f} ms per row (warm)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate dependency-free predictor modules from trees")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="write the predictor module for a pickled model")
+    export.add_argument("model")
+    export.add_argument("output")
+    export.add_argument("--style", choices=["arrays", "branches"], default="arrays",
+                        help="node lookup tables (any size) or nested if/else (single or small trees)")
+    export.add_argument("--features", help="pickled feature name list")
+
+    check = sub.add_parser("check", help="verify the module reproduces the model exactly")
+    check.add_argument("model")
+    check.add_argument("module")
+    check.add_argument("--rows", type=int, default=10000)
+
+    bench = sub.add_parser("benchmark", help="compare cold-start time against unpickling")
+    bench.add_argument("model")
+    bench.add_argument("module")
+    bench.add_argument("--repeats", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        size = export_module(args.model, args.output, args.style, args.features)
+        print(f"✅ Wrote {args.output} ({size / 1e6:.2f} MB)")
+    elif args.command == "check":
+        sys.exit(1 if check_equivalence(args.model, args.module, args.rows) else 0)
+    else:
+        benchmark(args.model, args.module, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,12 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import pickle
 import requests
 import json
 from datetime import datetime, timedelta
 import seaborn as sns
 import matplotlib.pyplot as plt
+from model_registry import get_resource
 
 class CareerAnalytics:
     def __init__(self):
@@ -24,10 +24,9 @@ class CareerAnalytics:
     def load_career_data(self):
         """Load career database and model data"""
         try:
-            with open("mega_career_database.pkl", "rb") as f:
-                self.career_database = pickle.load(f)
-            with open("mega_career_list.pkl", "rb") as f:
-                self.all_careers = pickle.load(f)
+            # Shared across every CareerAnalytics instance; unpickled once per process
+            self.career_database = get_resource("mega_career_database")
+            self.all_careers = get_resource("mega_careers")
             print(f"✅ Loaded {len(self.all_careers)} careers from mega database")
         except FileNotFoundError:
             print("⚠️ Mega database not found, using default data")